@@ -0,0 +1,60 @@
+"""
+Admin endpoints - diagnostics for a running server
+"""
+import logging
+import secrets
+import time
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import JSONResponse, Response
+
+from app.config import settings
+from app.core.spans import span_ring
+from app.core.video_stream import stream_manager
+
+logger = logging.getLogger(__name__)
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Check X-Admin-Token; without a configured ADMIN_TOKEN nothing is allowed"""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints disabled (ADMIN_TOKEN not set)")
+    if not secrets.compare_digest(x_admin_token or "", settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.post("/profile", response_class=Response)
+async def profile_stream(
+    seconds: float = Query(10.0, gt=0, description="Profile duration (upper bound when frames is set)"),
+    frames: Optional[int] = Query(None, ge=1, description="Stop after this many processed frames")
+):
+    """Profile the live capture/analysis loop and return a zip of reports"""
+    if seconds > settings.PROFILE_MAX_SECONDS:
+        raise HTTPException(status_code=400,
+                            detail=f"seconds must be at most {settings.PROFILE_MAX_SECONDS}")
+    try:
+        report = await stream_manager.profile(seconds, frames)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error profiling stream: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    filename = time.strftime("profile-%Y%m%d-%H%M%S.zip")
+    return Response(content=report, media_type="application/zip",
+                    headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
+@router.get("/trace")
+async def get_trace(
+    seconds: Optional[float] = Query(None, gt=0, description="Only spans from the last N seconds")
+):
+    """Recent per-frame spans as Chrome trace-event JSON"""
+    if span_ring is None:
+        raise HTTPException(status_code=404, detail="Tracing disabled (set TRACE_BUFFER_SIZE)")
+    trace = span_ring.to_chrome_trace(seconds, process_name=settings.APP_NAME)
+    filename = time.strftime("trace-%Y%m%d-%H%M%S.json")
+    return JSONResponse(content=trace,
+                        headers={"Content-Disposition": f'attachment; filename="{filename}"'})
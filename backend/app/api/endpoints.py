@@ -4,7 +4,7 @@ REST API endpoints
 import logging
 import uuid
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import FileResponse, JSONResponse
 import os
@@ -25,21 +25,45 @@ from app.models.schemas import (
     HistoryResponse,
     CurrentDataResponse,
     HealthResponse,
+    StreamStats,
 )
-from app.core.pulse_detector import PulseDetectorManager
+from app.core.metrics import metrics
+# Shared with the stream, which feeds samples into the current session
+from app.core.pulse_detector import detector_manager
+from app.core.video_stream import stream_manager
+from app.core.broadcast import broadcaster
+from app.core.camera_registry import camera_registry
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# Global pulse detector manager
-detector_manager = PulseDetectorManager()
+
+def _active_sessions():
+    """Active detection sessions by id"""
+    return {sid: s for sid, s in list(detector_manager.sessions.items()) if s.active}
+
+
+def _session_fps(session) -> float:
+    """Sample rate over the session's last 30 samples"""
+    times, _ = session.signal.tail(30)
+    if len(times) < 2 or times[-1] <= times[0]:
+        return 0.0
+    return (len(times) - 1) / float(times[-1] - times[0])
+
+
+if metrics is not None:
+    metrics.gauge("pulse_active_sessions", "Active detection sessions",
+                  lambda: len(_active_sessions()))
+    metrics.gauge("pulse_session_fps", "Sample rate of each active detection session",
+                  lambda: {(sid,): _session_fps(s) for sid, s in _active_sessions().items()},
+                  ["session"])
 
 
 @router.get("/status", response_model=SystemStatus)
 async def get_status():
     """Get system status"""
     try:
-        active_cameras = detector_manager.get_available_cameras()
+        active_cameras = await camera_registry.get_available()
         return SystemStatus(
             status="running",
             camera_available=len(active_cameras) > 0,
@@ -56,13 +80,14 @@ async def get_cameras():
     """Get available cameras"""
     try:
         cameras = []
-        for cam_id in settings.CAMERA_DEVICES:
-            available = detector_manager.is_camera_available(cam_id)
+        for state in await camera_registry.get_cameras():
             cameras.append(
                 CameraInfo(
-                    id=cam_id,
-                    name=f"Camera {cam_id}",
-                    available=available
+                    id=state.camera_id,
+                    name=f"Camera {state.camera_id}",
+                    available=state.available,
+                    in_use=state.in_use,
+                    checked_at=state.checked_at
                 )
             )
         return CameraListResponse(cameras=cameras)
@@ -139,11 +164,20 @@ async def get_history(limit: int = Query(10, description="Number of sessions to
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/stream/stats", response_model=StreamStats)
+async def get_stream_stats():
+    """Get video stream capture/processing counters"""
+    return StreamStats(**stream_manager.get_stats(), **broadcaster.get_stats())
+
+
 @router.get("/data/current", response_model=CurrentDataResponse)
-async def get_current_data(session_id: str = Query(..., description="Session ID")):
+async def get_current_data(
+    session_id: str = Query(..., description="Session ID"),
+    since: Optional[int] = Query(None, ge=0, description="Cursor from a previous next_cursor")
+):
     """Get current session data"""
     try:
-        data = detector_manager.get_current_data(session_id)
+        data = detector_manager.get_current_data(session_id, since)
         if data is None:
             raise HTTPException(status_code=404, detail="Session not found")
         return data
@@ -3,11 +3,17 @@ WebSocket endpoint for real-time video streaming
 """
 import logging
 import json
+import math
 import asyncio
+import time
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import Dict, Set
+from typing import Dict, Optional, Set
 
-from app.core.video_stream import VideoStreamManager
+from app.core.video_stream import stream_manager
+from app.core.broadcast import broadcaster, Subscriber
+from app.core.metrics import metrics
+from app.core.spans import span_ring
+from app.core.protocol import FORMAT_BINARY, FORMAT_JSON, FORMATS, SignalCursor
 from app.models.schemas import WebSocketMessage, ErrorResponse
 
 logger = logging.getLogger(__name__)
@@ -16,9 +22,6 @@ router = APIRouter()
 # Active WebSocket connections
 active_connections: Set[WebSocket] = set()
 
-# Video stream manager
-stream_manager = VideoStreamManager()
-
 
 class ConnectionManager:
     """Manage WebSocket connections"""
@@ -44,114 +47,218 @@ class ConnectionManager:
         except Exception as e:
             logger.error(f"Error sending data: {e}")
 
-    async def broadcast(self, data: dict):
-        """Broadcast data to all connections"""
-        disconnected = set()
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(data)
-            except Exception as e:
-                logger.error(f"Error broadcasting: {e}")
-                disconnected.add(connection)
 
-        # Remove disconnected clients
-        for connection in disconnected:
-            self.disconnect(connection)
+manager = ConnectionManager()
 
 
-manager = ConnectionManager()
+class ClientSession:
+    """Per-connection state shared by the reader and writer tasks"""
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.camera_id = 0
+        # Frame wire format, from ?format= or the "start" message (json by default)
+        self.frame_format = websocket.query_params.get("format", FORMAT_JSON)
+        if self.frame_format not in FORMATS:
+            self.frame_format = FORMAT_JSON
+        # Delta telemetry: send only raw signal samples the client has not seen
+        self.delta = websocket.query_params.get("telemetry") == "delta"
+        self.cursor: Optional[SignalCursor] = None
+        # Video rate for this client (telemetry always comes at the stream rate)
+        self.video_fps: Optional[float] = _parse_fps(websocket.query_params.get("video_fps"))
+        # Adapt video quality to the link (?adaptive=false or "adaptive" on start)
+        self.adaptive = websocket.query_params.get("adaptive", "true").lower() != "false"
+        # Frame queue fed by the shared broadcast hub while streaming
+        self.subscription: Optional[Subscriber] = None
+        # Set when the subscription changes, to wake an idle writer
+        self.changed = asyncio.Event()
+        # Control replies and frames are sent from different tasks
+        self.send_lock = asyncio.Lock()
+
+    async def send_json(self, data: dict):
+        async with self.send_lock:
+            await manager.send_json(self.websocket, data)
+
+    async def subscribe(self):
+        """(Re)subscribe to the broadcast hub with the current settings"""
+        await self.unsubscribe()
+        # A (re)start always begins with a full snapshot
+        self.cursor = SignalCursor() if self.delta else None
+        self.subscription = await broadcaster.subscribe(self.camera_id, self.video_fps, self.adaptive)
+        self.changed.set()
+
+    async def unsubscribe(self):
+        subscription, self.subscription = self.subscription, None
+        self.changed.set()
+        if subscription:
+            await broadcaster.unsubscribe(subscription)
+
+
+def _parse_fps(value) -> Optional[float]:
+    """Positive frame rate from a client value, or None for the default"""
+    try:
+        fps = float(value)
+    except (TypeError, ValueError):
+        return None
+    return fps if fps > 0 else None
+
+
+def _number(value) -> Optional[float]:
+    """A numeric client value as float, None if missing or not a number"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        return None
+    return float(value)
 
 
 @router.websocket("/ws/pulse")
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for real-time pulse detection"""
     await manager.connect(websocket)
+    session = ClientSession(websocket)
 
-    camera_id = 0
-    session_active = False
-
+    # Control messages and frame delivery run independently: a start/stop
+    # is handled as soon as it arrives, and frames go out as soon as the
+    # hub queues them
+    reader = asyncio.create_task(_read_messages(session))
+    writer = asyncio.create_task(_write_frames(session))
     try:
-        while True:
-            # Receive message from client
-            try:
-                data = await asyncio.wait_for(websocket.receive_text(), timeout=0.1)
-                message = json.loads(data)
-
-                msg_type = message.get("type")
-
-                if msg_type == "start":
-                    camera_id = message.get("camera_id", 0)
-                    logger.info(f"Starting video stream with camera {camera_id}")
-                    await stream_manager.start_stream(camera_id)
-                    session_active = True
-                    await manager.send_json(
-                        websocket,
-                        {"type": "status", "message": "Stream started"}
-                    )
-
-                elif msg_type == "stop":
-                    logger.info("Stopping video stream")
-                    await stream_manager.stop_stream()
-                    session_active = False
-                    await manager.send_json(
-                        websocket,
-                        {"type": "status", "message": "Stream stopped"}
-                    )
-
-                elif msg_type == "toggle_search":
-                    await stream_manager.toggle_face_search()
-                    await manager.send_json(
-                        websocket,
-                        {"type": "status", "message": "Toggled face search"}
-                    )
-
-                elif msg_type == "ping":
-                    await manager.send_json(websocket, {"type": "pong"})
-
-            except asyncio.TimeoutError:
-                # No message received, continue to send frames
-                pass
-            except json.JSONDecodeError as e:
-                logger.error(f"Invalid JSON: {e}")
-                await manager.send_json(
-                    websocket,
-                    {"type": "error", "message": "Invalid JSON format"}
+        done, _ = await asyncio.wait({reader, writer}, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if error and not isinstance(error, WebSocketDisconnect):
+                logger.error(f"WebSocket error: {error}")
+                try:
+                    await session.send_json({"type": "error", "message": str(error)})
+                except Exception:
+                    pass
+    finally:
+        for task in (reader, writer):
+            task.cancel()
+        # Let both finish before unsubscribing so the writer never outlives
+        # its subscription
+        await asyncio.gather(reader, writer, return_exceptions=True)
+        logger.info("Client disconnected")
+        manager.disconnect(websocket)
+        await session.unsubscribe()
+
+
+async def _read_messages(session: ClientSession):
+    """Handle client control messages until the client disconnects"""
+    websocket = session.websocket
+    while True:
+        data = await websocket.receive_text()
+        try:
+            message = json.loads(data)
+        except json.JSONDecodeError as e:
+            logger.error(f"Invalid JSON: {e}")
+            await session.send_json({"type": "error", "message": "Invalid JSON format"})
+            continue
+
+        msg_type = message.get("type")
+
+        if msg_type == "start":
+            requested_format = message.get("format", session.frame_format)
+            if requested_format not in FORMATS:
+                await session.send_json(
+                    {"type": "error", "message": f"Unsupported format: {requested_format}"}
                 )
                 continue
+            session.camera_id = message.get("camera_id", 0)
+            session.frame_format = requested_format
+            session.delta = message.get("telemetry", "delta" if session.delta else "full") == "delta"
+            if "video_fps" in message:
+                session.video_fps = _parse_fps(message["video_fps"])
+            if isinstance(message.get("adaptive"), bool):
+                session.adaptive = message["adaptive"]
+            logger.info(f"Starting video stream with camera {session.camera_id}")
+            await session.subscribe()
+            await session.send_json({
+                "type": "status", "message": "Stream started", "format": session.frame_format,
+                "telemetry": "delta" if session.delta else "full",
+                "fps": broadcaster.fps, "video_fps": session.subscription.video_fps,
+                "adaptive": session.subscription.quality.adaptive
+            })
 
-            # Send frame if session is active
-            if session_active:
-                try:
-                    frame_data = await stream_manager.get_frame()
-                    if frame_data:
-                        await manager.send_json(websocket, frame_data)
-                    else:
-                        # Small delay if no frame available
-                        await asyncio.sleep(0.01)
-                except Exception as e:
-                    logger.error(f"Error getting frame: {e}")
-                    await manager.send_json(
-                        websocket,
-                        {"type": "error", "message": f"Error getting frame: {str(e)}"}
-                    )
+        elif msg_type == "stop":
+            logger.info("Stopping video stream")
+            await session.unsubscribe()
+            await session.send_json({"type": "status", "message": "Stream stopped"})
+
+        elif msg_type == "toggle_search":
+            await stream_manager.toggle_face_search()
+            await session.send_json({"type": "status", "message": "Toggled face search"})
+
+        elif msg_type == "ack":
+            epoch = message.get("epoch")
+            if (session.cursor is not None and isinstance(message.get("seq"), int)
+                    and (epoch is None or isinstance(epoch, int))):
+                session.cursor.ack(message["seq"], epoch)
+            capture_ts, received = _number(message.get("capture_ts")), _number(message.get("received"))
+            if capture_ts is not None and received is not None and session.subscription:
+                latencies = session.subscription.latency.ack(
+                    capture_ts, received, _number(message.get("rendered")),
+                    _number(message.get("sent")), at=time.time())
+                if latencies:
+                    session.subscription.quality.acked(latencies["receive"])
+                if latencies and metrics is not None:
+                    for stage in ("receive", "render"):
+                        if stage in latencies:
+                            metrics.latency.observe(latencies[stage], stage)
+
+        elif msg_type == "resync":
+            if session.cursor is not None:
+                session.cursor.reset()
+
+        elif msg_type == "ping":
+            await session.send_json({"type": "pong"})
+
+
+async def _write_frames(session: ClientSession):
+    """Send the frames the hub queues for this client; a slow client only
+    loses its own oldest frames"""
+    websocket = session.websocket
+    while True:
+        subscription = session.subscription
+        if subscription is None or subscription.closed:
+            session.changed.clear()
+            await session.changed.wait()
+            continue
+        item = await subscription.get()
+        if item is None:
+            # Unsubscribed (stop or restart); pick up the new state
+            continue
+        packet, tier = item
+        # Each packet is serialized once per format and quality tier and
+        # shared by every client using that format and tier
+        frame_format = session.frame_format
+        start = time.perf_counter()
+        message = packet.encode(frame_format, session.cursor, tier)
+        encoded = time.perf_counter()
+        async with session.send_lock:
+            if frame_format == FORMAT_BINARY:
+                await websocket.send_bytes(message)
             else:
-                # Small delay when inactive
-                await asyncio.sleep(0.1)
+                await websocket.send_text(message)
+        end = time.perf_counter()
+        send_latency = subscription.latency.sent(packet.capture_ts, time.time())
+        # Time blocked in send is time the socket buffer took to drain
+        subscription.quality.sent(end - encoded)
+        if subscription.update_quality(time.monotonic()):
+            await session.send_json({"type": "quality",
+                                     **subscription.quality.get_stats(subscription.video_fps)})
+        if metrics is not None or span_ring is not None:
+            if metrics is not None:
+                metrics.send_seconds.observe(end - encoded, frame_format)
+                metrics.sent_bytes.inc(len(message), frame_format)
+                metrics.latency.observe(send_latency, "send")
+            if span_ring is not None:
+                track = f"client {subscription.id}"
+                span_ring.add("serialize", start, encoded, track, client=subscription.id)
+                span_ring.add("send", encoded, end, track, client=subscription.id,
+                              format=frame_format, bytes=len(message), tier=tier,
+                              capture_ts=round(packet.capture_ts, 6))
 
-    except WebSocketDisconnect:
-        logger.info("Client disconnected")
-        manager.disconnect(websocket)
-        if session_active:
-            await stream_manager.stop_stream()
-    except Exception as e:
-        logger.error(f"WebSocket error: {e}")
-        try:
-            await manager.send_json(
-                websocket,
-                {"type": "error", "message": str(e)}
-            )
-        except:
-            pass
-        manager.disconnect(websocket)
-        if session_active:
-            await stream_manager.stop_stream()
+
+if metrics is not None:
+    metrics.gauge("pulse_ws_clients", "Connected WebSocket clients",
+                  lambda: len(manager.active_connections))
@@ -29,6 +29,24 @@ class Settings(BaseSettings):
     # Camera settings
     CAMERA_DEVICES: List[int] = [0, 1]
     DEFAULT_CAMERA: int = 0
+    # Seconds an unused camera stays open (and capturing) in the pool so the
+    # next stream start or camera switch does not have to reopen it
+    CAMERA_IDLE_TIMEOUT: float = float(os.getenv("CAMERA_IDLE_TIMEOUT", "30"))
+    # Frame source: "device" (webcams), "synthetic" (a generated face with a
+    # pulse, for load tests without hardware) or "file" (CAMERA_FILE, looped)
+    CAMERA_SOURCE: str = os.getenv("CAMERA_SOURCE", "device")
+    CAMERA_FILE: str = os.getenv("CAMERA_FILE", "")
+    # Synthetic source: frame size and rate, pulse rate and amplitude (grey
+    # levels), sensor noise (grey levels) and head sway (pixels)
+    SYNTHETIC_WIDTH: int = int(os.getenv("SYNTHETIC_WIDTH", "640"))
+    SYNTHETIC_HEIGHT: int = int(os.getenv("SYNTHETIC_HEIGHT", "480"))
+    SYNTHETIC_FPS: float = float(os.getenv("SYNTHETIC_FPS", "30"))
+    SYNTHETIC_BPM: float = float(os.getenv("SYNTHETIC_BPM", "72"))
+    SYNTHETIC_AMPLITUDE: float = float(os.getenv("SYNTHETIC_AMPLITUDE", "3"))
+    SYNTHETIC_NOISE: float = float(os.getenv("SYNTHETIC_NOISE", "2"))
+    SYNTHETIC_MOTION: float = float(os.getenv("SYNTHETIC_MOTION", "20"))
+    # Seconds between background re-enumerations of CAMERA_DEVICES
+    CAMERA_SCAN_INTERVAL: float = float(os.getenv("CAMERA_SCAN_INTERVAL", "10"))
 
     # Pulse detection settings
     BPM_MIN: int = int(os.getenv("BPM_MIN", "50"))
@@ -36,16 +54,69 @@ class Settings(BaseSettings):
     BUFFER_SIZE: int = 250
     DATA_SPIKE_LIMIT: float = 2500.0
     FACE_DETECTOR_SMOOTHNESS: int = 10
+    # Run the Haar cascade every N frames and track the face in between;
+    # a tracker confidence below the threshold forces an early detection
+    DETECTION_INTERVAL: int = int(os.getenv("DETECTION_INTERVAL", "5"))
+    TRACKING_CONFIDENCE: float = float(os.getenv("TRACKING_CONFIDENCE", "0.6"))
+    # Search only around the last face (downscaled) and fall back to a
+    # full-frame scan after this many consecutive misses; with the face
+    # locked, this many misses in a row count as the face lost (BPM reset)
+    ROI_DETECTION: bool = os.getenv("ROI_DETECTION", "true").lower() == "true"
+    ROI_MAX_MISSES: int = int(os.getenv("ROI_MAX_MISSES", "3"))
+    # Face detector: "cascade" (Haar), "yunet" (cv2.FaceDetectorYN) or "dnn"
+    # (SSD face model via cv2.dnn); empty model paths use the default files
+    FACE_DETECTOR_BACKEND: str = os.getenv("FACE_DETECTOR_BACKEND", "cascade")
+    FACE_DETECTOR_MODEL: str = os.getenv("FACE_DETECTOR_MODEL", "")
+    FACE_DETECTOR_CONFIG: str = os.getenv("FACE_DETECTOR_CONFIG", "")
+    # Spectral estimator for the BPM band: "fft" or "sliding"
+    SPECTRAL_ENGINE: str = os.getenv("SPECTRAL_ENGINE", "fft")
+    # Where a camera's capture/analysis pipeline runs: "thread" (in the API
+    # process) or "process" (one worker process per camera, results passed
+    # through shared memory)
+    EXECUTION_MODE: str = os.getenv("EXECUTION_MODE", "thread")
+    # OpenCV threads per worker process; 0 splits the CPUs across CAMERA_DEVICES
+    WORKER_CV_THREADS: int = int(os.getenv("WORKER_CV_THREADS", "0"))
+    # Samples retained per detection session (1 hour at 30 fps); older samples
+    # are dropped from the session and its CSV export, with a warning logged
+    SESSION_BUFFER_SIZE: int = int(os.getenv("SESSION_BUFFER_SIZE", "108000"))
 
     # Video settings
     FRAME_WIDTH: int = 640
     FRAME_HEIGHT: int = 480
     JPEG_QUALITY: int = 80
-    TARGET_FPS: int = 30
+    # Rate of the capture/analysis/encode loop
+    TARGET_FPS: int = int(os.getenv("TARGET_FPS", "30"))
+    # Default rate at which viewers get JPEG video; telemetry still arrives at
+    # TARGET_FPS. Clients can ask for a lower rate with "video_fps" on start
+    VIDEO_FPS: int = int(os.getenv("VIDEO_FPS", os.getenv("TARGET_FPS", "30")))
+    # Draw the status overlay into streamed frames; disable for headless
+    # analysis when the client draws its own overlay
+    RENDER_OVERLAY: bool = os.getenv("RENDER_OVERLAY", "true").lower() == "true"
+    # Frames queued per WebSocket viewer before the oldest is dropped
+    CLIENT_QUEUE_SIZE: int = int(os.getenv("CLIENT_QUEUE_SIZE", "2"))
+    # Step each viewer's JPEG quality, resolution and video rate down when
+    # its link backs up and up again once it keeps up (clients can opt out
+    # with "adaptive": false); acknowledged receive latency above this many
+    # ms counts as congestion
+    ADAPTIVE_QUALITY: bool = os.getenv("ADAPTIVE_QUALITY", "true").lower() == "true"
+    ADAPTIVE_MAX_LATENCY_MS: float = float(os.getenv("ADAPTIVE_MAX_LATENCY_MS", "250"))
 
     # Data storage
     DATA_DIR: str = os.getenv("DATA_DIR", os.path.join(os.getcwd(), "data"))
 
+    # Collect Prometheus metrics, served at /api/metrics; off means no
+    # instrumentation runs at all
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+    # Per-frame trace spans kept for /api/v1/admin/trace (0 disables tracing);
+    # only recorded when ADMIN_TOKEN is set, since nothing else can read them
+    TRACE_BUFFER_SIZE: int = int(os.getenv("TRACE_BUFFER_SIZE", "0"))
+    # Required in the X-Admin-Token header of /api/v1/admin requests;
+    # empty disables the admin endpoints (every request is refused)
+    ADMIN_TOKEN: str = os.getenv("ADMIN_TOKEN", "")
+    # Longest on-demand profile (seconds) /api/v1/admin/profile accepts
+    PROFILE_MAX_SECONDS: float = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+
     # Logging
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "info").upper()
 
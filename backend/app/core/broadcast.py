@@ -0,0 +1,240 @@
+"""
+Frame broadcast hub - capture, analyze and encode once, fan out to all viewers
+"""
+import logging
+import asyncio
+import itertools
+import time
+from typing import Any, Dict, Optional, Set, Tuple
+
+from app.config import settings
+from app.core.latency import STAGES, LatencyTracker
+from app.core.metrics import metrics
+from app.core.pacing import PacingClock, RateDecimator, RateMeter
+from app.core.protocol import FramePacket
+from app.core.quality import QualityController
+from app.core.video_stream import VideoStreamManager, stream_manager
+
+logger = logging.getLogger(__name__)
+
+
+class Subscriber:
+    """A viewer's bounded frame queue (drop-oldest when full)"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, maxsize: int, video_fps: float = 0.0, source_fps: float = 0.0,
+                 adaptive: bool = True):
+        self.id = next(self._ids)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, maxsize))
+        # JPEG quality tier, stepped with the viewer's link
+        self.quality = QualityController(adaptive)
+        # Frames with video are picked at video_fps (capped by the tier);
+        # the rest go out as telemetry
+        self.video_fps = video_fps
+        self.video = RateDecimator(self.quality.video_fps(video_fps), source_fps)
+        self.delivered = 0
+        self.dropped = 0
+        self.closed = False
+        # Capture -> send/receive/render, fed by the writer and client acks
+        self.latency = LatencyTracker()
+
+    def put(self, frame: Tuple[FramePacket, Optional[int]]):
+        """Queue a (packet, quality tier or None for no video) pair without
+        ever blocking the producer"""
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+                self.quality.dropped()
+                if metrics is not None:
+                    metrics.frames_dropped.inc(1, "client_queue")
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(frame)
+
+    async def get(self) -> Optional[Tuple[FramePacket, Optional[int]]]:
+        """Wait for the next queued (packet, quality tier) pair; None once closed"""
+        if self.closed:
+            return None
+        frame = await self.queue.get()
+        if frame is None:
+            return None
+        self.delivered += 1
+        return frame
+
+    def update_quality(self, now: float) -> bool:
+        """Step the quality tier if the link calls for it; True if it changed"""
+        tier = self.quality.tier
+        if not self.quality.update(now):
+            return False
+        self.video.set_rate(self.quality.video_fps(self.video_fps))
+        if metrics is not None:
+            metrics.quality_changes.inc(1, "down" if self.quality.tier > tier else "up")
+        logger.info(f"Viewer {self.id} quality tier {tier} -> {self.quality.tier}")
+        return True
+
+    def close(self):
+        """Wake up a pending get() with None"""
+        if self.closed:
+            return
+        self.closed = True
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Delivery counters and achieved video rate"""
+        video = self.video.meter.get_stats()
+        return {
+            "id": self.id,
+            "target_video_fps": self.video_fps,
+            "video_fps": video["fps"],
+            "video_jitter_ms": video["jitter_ms"],
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "latency": self.latency.get_stats(),
+            "quality": self.quality.get_stats(self.video_fps),
+        }
+
+
+class FrameBroadcaster:
+    """Run a single capture/processing loop and fan frames out to subscribers"""
+
+    def __init__(self, manager: VideoStreamManager, queue_size: int = settings.CLIENT_QUEUE_SIZE,
+                 fps: float = settings.TARGET_FPS):
+        self.manager = manager
+        self.queue_size = queue_size
+        self.fps = fps
+        self.subscribers: Set[Subscriber] = set()
+        self.frames = 0
+        # Analysis loop pacing and the rate at which JPEGs actually get encoded
+        self.clock = PacingClock(fps)
+        self.analysis_meter = RateMeter()
+        self.video_meter = RateMeter()
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    async def subscribe(self, camera_id: int, video_fps: Optional[float] = None,
+                        adaptive: bool = True) -> Subscriber:
+        """Add a viewer, starting (or switching) the shared stream if needed"""
+        async with self._lock:
+            if not self.manager.active or self.manager.camera_id != camera_id:
+                await self.manager.start_stream(camera_id)
+                self.clock.reset()
+                self.analysis_meter.reset()
+                self.video_meter.reset()
+            if video_fps is None:
+                video_fps = settings.VIDEO_FPS
+            # Video can never be faster than the analysis loop
+            video_fps = min(float(video_fps), float(self.fps)) if self.fps > 0 else float(video_fps)
+            subscriber = Subscriber(self.queue_size, video_fps, self.fps,
+                                    adaptive and settings.ADAPTIVE_QUALITY)
+            self.subscribers.add(subscriber)
+            if self._task is None or self._task.done():
+                self._task = asyncio.create_task(self._produce())
+            logger.info(f"Viewer subscribed. Total viewers: {len(self.subscribers)}")
+            return subscriber
+
+    async def unsubscribe(self, subscriber: Subscriber):
+        """Remove a viewer, stopping the stream when the last one leaves"""
+        async with self._lock:
+            if subscriber not in self.subscribers:
+                return
+            self.subscribers.discard(subscriber)
+            subscriber.close()
+            logger.info(f"Viewer unsubscribed. Total viewers: {len(self.subscribers)}")
+            if self.subscribers:
+                return
+            task, self._task = self._task, None
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+            await self.manager.stop_stream()
+
+    async def _produce(self):
+        """Process each frame once, at TARGET_FPS, and queue it for every subscriber"""
+        while self.subscribers:
+            await self.clock.wait()
+            # Only encode JPEGs for the tiers of viewers due for video, once
+            # per tier (tiers can change while the frame is processed)
+            tick = time.monotonic()
+            subscribers = list(self.subscribers)
+            due = {s: s.quality.tier for s in subscribers if s.video.due(tick)}
+            try:
+                packet = await self.manager.get_frame(tiers=sorted(set(due.values())))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error producing frame: {e}")
+                await asyncio.sleep(0.1)
+                continue
+            if packet is None:
+                if not self.manager.active:
+                    await asyncio.sleep(0.1)
+                elif metrics is not None:
+                    metrics.frames_dropped.inc(1, "no_frame")
+                continue
+            self.frames += 1
+            if metrics is not None:
+                metrics.frames.inc()
+            done = time.monotonic()
+            self.analysis_meter.tick(done)
+            if packet.jpegs:
+                self.video_meter.tick(done)
+            for subscriber in subscribers:
+                tier = due.get(subscriber)
+                if tier not in packet.jpegs or not subscriber.video.take(tick):
+                    tier = None
+                subscriber.put((packet, tier))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Fan-out counters and achieved rates"""
+        analysis = self.analysis_meter.get_stats()
+        video = self.video_meter.get_stats()
+        return {
+            "subscribers": len(self.subscribers),
+            "broadcast_frames": self.frames,
+            "subscriber_drops": sum(s.dropped for s in self.subscribers),
+            "target_fps": self.fps,
+            "analysis_fps": analysis["fps"],
+            "analysis_jitter_ms": analysis["jitter_ms"],
+            "video_fps": video["fps"],
+            "video_jitter_ms": video["jitter_ms"],
+            "viewers": [s.get_stats() for s in self.subscribers],
+        }
+
+
+# Global broadcast hub instance
+broadcaster = FrameBroadcaster(stream_manager)
+
+if metrics is not None:
+    metrics.gauge("pulse_subscribers", "Viewers subscribed to the broadcast hub",
+                  lambda: len(broadcaster.subscribers))
+    metrics.gauge("pulse_analysis_fps", "Achieved analysis loop rate",
+                  lambda: broadcaster.analysis_meter.get_stats()["fps"])
+    metrics.gauge("pulse_video_fps", "Rate at which JPEG frames are encoded",
+                  lambda: broadcaster.video_meter.get_stats()["fps"])
+    metrics.gauge("pulse_viewer_video_fps", "Video rate delivered to each viewer",
+                  lambda: {(s.id,): s.video.meter.get_stats()["fps"]
+                           for s in list(broadcaster.subscribers)},
+                  ["viewer"])
+    metrics.gauge("pulse_viewer_quality_tier", "Video quality tier of each viewer (0 = full)",
+                  lambda: {(s.id,): s.quality.tier for s in list(broadcaster.subscribers)},
+                  ["viewer"])
+
+    def _viewer_latency():
+        values = {}
+        for s in list(broadcaster.subscribers):
+            for stage in STAGES:
+                p95 = s.latency.percentile(stage, 95)
+                if p95 is not None:
+                    values[(s.id, stage)] = p95
+        return values
+
+    metrics.gauge("pulse_viewer_latency_p95_seconds",
+                  "95th percentile capture to send/receive/render latency per viewer",
+                  _viewer_latency, ["viewer", "stage"])
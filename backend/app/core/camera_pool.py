@@ -0,0 +1,206 @@
+"""
+Camera pool - open each device once, share it, keep it warm between users
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import sys
+import os
+
+import cv2
+
+# Add lib to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../lib'))
+from device import open_camera
+
+from app.config import settings
+from app.core.capture import FrameGrabber, FrameReader
+
+logger = logging.getLogger(__name__)
+
+
+def open_source(camera_id: int):
+    """Open camera `camera_id` from the configured CAMERA_SOURCE"""
+    options = {}
+    if settings.CAMERA_SOURCE == "synthetic":
+        options = dict(width=settings.SYNTHETIC_WIDTH, height=settings.SYNTHETIC_HEIGHT,
+                       fps=settings.SYNTHETIC_FPS, bpm=settings.SYNTHETIC_BPM,
+                       amplitude=settings.SYNTHETIC_AMPLITUDE, noise=settings.SYNTHETIC_NOISE,
+                       motion=settings.SYNTHETIC_MOTION)
+    return open_camera(camera_id, settings.CAMERA_SOURCE, settings.CAMERA_FILE or None, **options)
+
+
+class PooledCamera:
+    """An open device, its capture thread and its reference count"""
+
+    def __init__(self, camera_id: int, camera: Any, grabber: FrameGrabber):
+        self.camera_id = camera_id
+        self.camera = camera
+        self.grabber = grabber
+        self.refs = 0
+        self.idle_since: Optional[float] = None
+        self.opened_at = time.time()
+
+
+class CameraHandle:
+    """A user's share of a pooled camera; release() when done"""
+
+    def __init__(self, pool: "CameraPool", entry: PooledCamera):
+        self.pool = pool
+        self.camera_id = entry.camera_id
+        self.camera = entry.camera
+        self.reader = FrameReader(entry.grabber)
+        self.released = False
+
+    @property
+    def valid(self) -> bool:
+        return bool(getattr(self.camera, "valid", False))
+
+    def read(self, timeout: Optional[float] = None):
+        """Wait for the next frame (frame, capture timestamp, sequence number)"""
+        return self.reader.read(timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return self.reader.get_stats()
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.pool.release(self.camera_id)
+
+
+class CameraPool:
+    """
+    Reference-counted devices shared by the stream and detection sessions.
+
+    The first acquire() of a device opens it (the slow part: VideoCapture
+    plus a probe read) and starts its capture thread. Later acquires share
+    it. When the last handle is released the device keeps capturing for
+    `idle_timeout` seconds so a restart or camera switch back is instant.
+    """
+
+    def __init__(self, idle_timeout: float = settings.CAMERA_IDLE_TIMEOUT,
+                 capture_fps: float = settings.TARGET_FPS):
+        self.idle_timeout = idle_timeout
+        self.capture_fps = capture_fps
+        self.entries: Dict[int, PooledCamera] = {}
+        self._lock = threading.Lock()
+        # One lock per device so a slow open does not block other devices
+        self._open_locks: Dict[int, threading.Lock] = {}
+        self.opens = 0
+        self.hits = 0
+
+    def acquire(self, camera_id: int) -> CameraHandle:
+        """Get a handle on a device, opening it if it is not in the pool (blocking)"""
+        with self._lock:
+            open_lock = self._open_locks.setdefault(camera_id, threading.Lock())
+        with open_lock:
+            with self._lock:
+                entry = self.entries.get(camera_id)
+                if entry is not None:
+                    entry.refs += 1
+                    entry.idle_since = None
+                    self.hits += 1
+                    return CameraHandle(self, entry)
+
+            start = time.perf_counter()
+            camera = open_source(camera_id)
+            grabber = FrameGrabber(camera, name=str(camera_id), idle_fps=self.capture_fps)
+            grabber.start()
+            entry = PooledCamera(camera_id, camera, grabber)
+            entry.refs = 1
+            logger.info(f"Opened camera {camera_id} in {(time.perf_counter() - start) * 1000:.0f} ms "
+                        f"(valid: {camera.valid})")
+            with self._lock:
+                self.entries[camera_id] = entry
+                self.opens += 1
+            return CameraHandle(self, entry)
+
+    def release(self, camera_id: int):
+        """Drop a reference; idle devices are closed after the idle timeout"""
+        with self._lock:
+            entry = self.entries.get(camera_id)
+            if entry is None or entry.refs <= 0:
+                return
+            entry.refs -= 1
+            if entry.refs > 0:
+                return
+            # An unavailable device is not worth keeping; retry on next use
+            if self.idle_timeout <= 0 or not entry.camera.valid:
+                del self.entries[camera_id]
+            else:
+                entry.idle_since = time.monotonic()
+                timer = threading.Timer(self.idle_timeout, self._expire, (camera_id, entry))
+                timer.daemon = True
+                timer.start()
+                return
+        self._close(entry)
+
+    def _expire(self, camera_id: int, entry: PooledCamera):
+        with self._lock:
+            if self.entries.get(camera_id) is not entry or entry.refs > 0:
+                return
+            if entry.idle_since is None or time.monotonic() - entry.idle_since < self.idle_timeout:
+                return
+            del self.entries[camera_id]
+        logger.info(f"Releasing idle camera {camera_id}")
+        self._close(entry)
+
+    @staticmethod
+    def _close(entry: PooledCamera):
+        entry.grabber.stop()
+        entry.camera.release()
+
+    def probe(self, camera_id: int) -> Tuple[bool, bool]:
+        """
+        Check whether a device can be opened, returning (available, in_use).
+
+        A device held by the pool is reported from its open handle rather
+        than opened a second time; otherwise a probe waits for any acquire
+        of the same device so the two never fight over it.
+        """
+        with self._lock:
+            open_lock = self._open_locks.setdefault(camera_id, threading.Lock())
+        with open_lock:
+            with self._lock:
+                entry = self.entries.get(camera_id)
+            if entry is not None:
+                return bool(entry.camera.valid), True
+            if settings.CAMERA_SOURCE == "synthetic":
+                return True, False
+            if settings.CAMERA_SOURCE == "file":
+                return os.path.exists(settings.CAMERA_FILE), False
+            cap = cv2.VideoCapture(camera_id)
+            try:
+                return bool(cap.isOpened()), False
+            finally:
+                cap.release()
+
+    def in_use(self) -> List[int]:
+        """Devices currently held open by the pool"""
+        with self._lock:
+            return list(self.entries)
+
+    def close_all(self):
+        """Close every device regardless of references (shutdown)"""
+        with self._lock:
+            entries = list(self.entries.values())
+            self.entries.clear()
+        for entry in entries:
+            self._close(entry)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "opens": self.opens,
+                "hits": self.hits,
+                "cameras": {
+                    camera_id: {"refs": e.refs, "idle": e.refs == 0, "valid": bool(e.camera.valid)}
+                    for camera_id, e in self.entries.items()
+                },
+            }
+
+
+# Global camera pool instance
+camera_pool = CameraPool()
@@ -0,0 +1,111 @@
+"""
+Camera registry - cached device enumeration refreshed in the background
+"""
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.core.camera_pool import camera_pool
+
+logger = logging.getLogger(__name__)
+
+
+class CameraState:
+    """Last known state of one device"""
+
+    __slots__ = ("camera_id", "available", "in_use", "checked_at")
+
+    def __init__(self, camera_id: int, available: bool = False, in_use: bool = False,
+                 checked_at: Optional[float] = None):
+        self.camera_id = camera_id
+        self.available = available
+        self.in_use = in_use
+        self.checked_at = checked_at
+
+
+class CameraRegistry:
+    """
+    Availability of CAMERA_DEVICES, answered from a cache.
+
+    Opening a VideoCapture to probe a device takes tens to hundreds of
+    milliseconds, so probing happens on a background task every
+    `interval` seconds, one device at a time on a dedicated thread.
+    Devices already open in the camera pool are reported from the pool
+    instead of being opened again.
+    """
+
+    def __init__(self, devices: List[int] = None, interval: float = settings.CAMERA_SCAN_INTERVAL):
+        self.devices = list(settings.CAMERA_DEVICES if devices is None else devices)
+        self.interval = interval
+        self.cameras: Dict[int, CameraState] = {d: CameraState(d) for d in self.devices}
+        self.scans = 0
+        self.last_scan: Optional[float] = None
+        self.scan_ms = 0.0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="camera-scan")
+        self._task: Optional[asyncio.Task] = None
+        self._scan: Optional[asyncio.Future] = None
+
+    def start(self):
+        """Start the background refresh (call from the event loop)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error enumerating cameras: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def refresh(self):
+        """Probe every device now; concurrent callers share one scan"""
+        if self._scan is None or self._scan.done():
+            loop = asyncio.get_running_loop()
+            self._scan = loop.run_in_executor(self._executor, self._probe_all)
+        await asyncio.shield(self._scan)
+
+    def _probe_all(self):
+        start = time.perf_counter()
+        for camera_id in self.devices:
+            available, in_use = camera_pool.probe(camera_id)
+            self.cameras[camera_id] = CameraState(camera_id, available, in_use, time.time())
+        self.scan_ms = (time.perf_counter() - start) * 1000
+        self.last_scan = time.time()
+        self.scans += 1
+        logger.debug(f"Enumerated {len(self.devices)} cameras in {self.scan_ms:.0f} ms")
+
+    async def get_cameras(self) -> List[CameraState]:
+        """Cached device states (waits for the first scan only)"""
+        if self.last_scan is None:
+            await self.refresh()
+        return [self.cameras[d] for d in self.devices]
+
+    async def get_available(self) -> List[int]:
+        return [c.camera_id for c in await self.get_cameras() if c.available]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "scans": self.scans,
+            "last_scan": self.last_scan,
+            "scan_ms": round(self.scan_ms, 1),
+            "interval": self.interval,
+        }
+
+
+# Global camera registry instance
+camera_registry = CameraRegistry()
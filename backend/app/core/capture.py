@@ -0,0 +1,138 @@
+"""
+Background camera capture with a single latest-frame slot
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class FrameGrabber:
+    """Read frames from a camera on a dedicated thread, keeping only the newest"""
+
+    def __init__(self, camera, name: str = "camera", idle_fps: float = 30.0):
+        self.camera = camera
+        self.name = name
+        self.idle_fps = idle_fps
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._cond = threading.Condition()
+
+        # Latest-frame slot
+        self._frame: Optional[np.ndarray] = None
+        self._frame_ts = 0.0
+        self._seq = 0
+
+        self.captured = 0
+
+    def start(self):
+        """Start the capture thread"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name=f"capture-{self.name}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        """Stop the capture thread and wake up any waiting reader"""
+        self._running = False
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def _run(self):
+        # Invalid cameras return a placeholder frame immediately; pace those
+        idle_delay = 0.0 if getattr(self.camera, "valid", True) else 1.0 / self.idle_fps
+        while self._running:
+            try:
+                frame = self.camera.get_frame()
+            except Exception as e:
+                logger.error(f"Capture error on {self.name}: {e}")
+                time.sleep(0.1)
+                continue
+            ts = time.time()
+            if frame is None or isinstance(frame, str):
+                time.sleep(0.01)
+                continue
+
+            with self._cond:
+                self._frame = frame
+                self._frame_ts = ts
+                self._seq += 1
+                self.captured += 1
+                self._cond.notify_all()
+
+            if idle_delay:
+                time.sleep(idle_delay)
+
+    def read(self, after: int, timeout: Optional[float] = None) -> Optional[Tuple[np.ndarray, float, int]]:
+        """
+        Wait for a frame with a sequence number greater than `after`.
+
+        Any number of readers can share the grabber, each passing the
+        sequence number of the last frame it got. Frames must be treated as
+        read-only.
+
+        Returns (frame, capture timestamp, sequence number), or None on
+        timeout or when the grabber is stopped.
+        """
+        with self._cond:
+            if not self._cond.wait_for(
+                lambda: self._seq > after or not self._running,
+                timeout=timeout,
+            ):
+                return None
+            if self._seq <= after:
+                return None
+            return self._frame, self._frame_ts, self._seq
+
+
+class FrameReader:
+    """One consumer's cursor on a shared FrameGrabber, with delivery counters"""
+
+    def __init__(self, grabber: FrameGrabber):
+        self.grabber = grabber
+        self._seq = 0
+        self.dropped = 0
+        self.delivered = 0
+        self.last_age = 0.0
+        self._age_total = 0.0
+
+    def read(self, timeout: Optional[float] = None) -> Optional[Tuple[np.ndarray, float, int]]:
+        """Wait for a frame newer than the last one this reader got"""
+        captured = self.grabber.read(self._seq, timeout)
+        if captured is None:
+            return None
+        frame, ts, seq = captured
+        if self._seq:
+            # Frames captured in between were never seen by this reader
+            self.dropped += seq - self._seq - 1
+        self._seq = seq
+        self.delivered += 1
+        self.last_age = time.time() - ts
+        self._age_total += self.last_age
+        return captured
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Capture counters"""
+        return {
+            "captured": self.grabber.captured,
+            "dropped": self.dropped,
+            "delivered": self.delivered,
+            "last_frame_age_ms": round(self.last_age * 1000.0, 2),
+            "avg_frame_age_ms": round(
+                self._age_total / self.delivered * 1000.0, 2
+            ) if self.delivered else 0.0,
+        }
@@ -0,0 +1,89 @@
+"""
+Glass-to-glass latency - per-viewer capture -> send -> receive -> render
+
+Frames carry their camera capture time (``capture_ts``). The server notes
+when it sent each frame to a viewer; a client that wants to be measured
+answers some frames with an ``ack`` holding its own receive, render and
+ack-send times (any clock, in ms). Client and server clocks are never
+compared: the one-way network delay is taken as half of what remains of
+the server's send -> ack round trip after the time the client held the
+frame.
+"""
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Optional
+
+import numpy as np
+
+STAGES = ("send", "receive", "render")
+
+
+def frame_key(capture_ts: float) -> float:
+    """Lookup key of a frame (microseconds survive any JSON round trip)"""
+    return round(float(capture_ts), 6)
+
+
+class LatencyTracker:
+    """Recent latencies of one viewer, split by how far the frame got"""
+
+    def __init__(self, window: int = 300, pending: int = 256):
+        # capture key -> server send time, for frames not acked yet
+        self.pending: "OrderedDict[float, float]" = OrderedDict()
+        self.max_pending = pending
+        self.samples: Dict[str, Deque[float]] = {stage: deque(maxlen=window) for stage in STAGES}
+        self.network: Deque[float] = deque(maxlen=window)
+        self.acks = 0
+        self.unmatched = 0
+
+    def sent(self, capture_ts: float, at: float) -> float:
+        """Record that a frame was sent at `at` (unix s); returns capture -> send (s)"""
+        pending = self.pending
+        pending[frame_key(capture_ts)] = at
+        if len(pending) > self.max_pending:
+            pending.popitem(last=False)
+        latency = at - capture_ts
+        self.samples["send"].append(latency)
+        return latency
+
+    def ack(self, capture_ts: float, received: float, rendered: Optional[float] = None,
+            sent: Optional[float] = None, at: float = 0.0) -> Optional[Dict[str, float]]:
+        """
+        Apply a client acknowledgement that arrived at `at` (unix s).
+
+        `received`, `rendered` and `sent` are client times in ms on any one
+        clock; `sent` (when the ack left) defaults to the last of the others.
+        Returns the frame's latencies in seconds, or None for an unknown frame.
+        """
+        send_time = self.pending.pop(frame_key(capture_ts), None)
+        if send_time is None:
+            self.unmatched += 1
+            return None
+        held = ((sent if sent is not None else (rendered if rendered is not None else received))
+                - received) / 1000.0
+        network = max(0.0, (at - send_time - max(0.0, held)) / 2.0)
+        latencies = {"send": send_time - capture_ts}
+        latencies["receive"] = latencies["send"] + network
+        if rendered is not None:
+            latencies["render"] = latencies["receive"] + max(0.0, (rendered - received) / 1000.0)
+        for stage in ("receive", "render"):
+            if stage in latencies:
+                self.samples[stage].append(latencies[stage])
+        self.network.append(network)
+        self.acks += 1
+        return latencies
+
+    def percentile(self, stage: str, q: float) -> Optional[float]:
+        """Percentile of a stage's recent latencies (s), None without samples"""
+        samples = self.samples[stage]
+        if not samples:
+            return None
+        return float(np.percentile(samples, q))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Latency percentiles in ms (None until measured)"""
+        stats: Dict[str, Any] = {"acks": self.acks}
+        for stage in STAGES:
+            for q in (50, 95):
+                value = self.percentile(stage, q)
+                stats[f"{stage}_p{q}_ms"] = None if value is None else round(value * 1000.0, 2)
+        stats["network_ms"] = round(float(np.median(self.network)) * 1000.0, 2) if self.network else None
+        return stats
@@ -0,0 +1,206 @@
+"""
+Metrics - counters, gauges and histograms in Prometheus text format
+
+With METRICS_ENABLED off the module-level `metrics` is None. Instrumented
+code checks for None before doing anything, so disabled collection costs a
+single comparison per site and no timing calls.
+"""
+import bisect
+import logging
+import math
+import os
+import sys
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.config import settings
+
+# Add lib to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../lib'))
+from timing import StageTimer
+
+logger = logging.getLogger(__name__)
+
+# Seconds; frame stages run from tens of microseconds to tens of milliseconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.02, 0.035, 0.05,
+                   0.075, 0.1, 0.25, 0.5, 1.0)
+
+# Seconds; capture to client latency, which a slow client stretches to seconds
+E2E_BUCKETS = (0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic counter, optionally split by labels"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, *labels: str):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def samples(self) -> List[Tuple[str, Labels, str, float]]:
+        with self._lock:
+            items = list(self.values.items())
+        return [(self.name, labels, "", value) for labels, value in items]
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram, optionally split by labels"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self.values: Dict[Labels, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self.values.get(labels)
+            if entry is None:
+                entry = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self) -> List[Tuple[str, Labels, str, float]]:
+        with self._lock:
+            items = [(labels, (list(e[0]), e[1], e[2])) for labels, e in self.values.items()]
+        out = []
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                out.append((self.name + "_bucket", labels, f'le="{_format_value(bound)}"', cumulative))
+            out.append((self.name + "_sum", labels, "", total))
+            out.append((self.name + "_count", labels, "", count))
+        return out
+
+
+class Gauge:
+    """
+    Value read at scrape time from a callback.
+
+    The callback returns a number, or {label values: number} for a gauge
+    with labels; nothing is computed between scrapes.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, collect: Callable[[], Any],
+                 labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+
+    def samples(self) -> List[Tuple[str, Labels, str, float]]:
+        try:
+            value = self.collect()
+        except Exception as e:
+            logger.error(f"Error collecting {self.name}: {e}")
+            return []
+        if isinstance(value, dict):
+            return [(self.name, tuple(str(v) for v in labels), "", float(v))
+                    for labels, v in value.items()]
+        return [(self.name, (), "", float(value))]
+
+
+class MetricsTimer(StageTimer):
+    """StageTimer that feeds each lap into the stage latency histogram"""
+
+    def __init__(self, histogram: Histogram):
+        super().__init__(window=1)
+        self.histogram = histogram
+
+    def record(self, stage: str, seconds: float) -> None:
+        self.histogram.observe(seconds, stage)
+
+
+class Metrics:
+    """The application's metric families"""
+
+    def __init__(self):
+        self.families: List[Any] = []
+        self.frame_seconds = self.add(Histogram(
+            "pulse_get_frame_seconds", "Time to capture, analyze and encode one frame"))
+        self.stage_seconds = self.add(Histogram(
+            "pulse_stage_seconds", "Frame pipeline stage durations", ["stage"]))
+        self.frames = self.add(Counter(
+            "pulse_frames_total", "Frames produced by the broadcast loop"))
+        self.frames_dropped = self.add(Counter(
+            "pulse_frames_dropped_total", "Frames lost, by where they were dropped", ["reason"]))
+        for reason in ("client_queue", "no_frame"):
+            self.frames_dropped.inc(0, reason)
+        self.send_seconds = self.add(Histogram(
+            "pulse_ws_send_seconds", "WebSocket frame send time", ["format"]))
+        self.sent_bytes = self.add(Counter(
+            "pulse_ws_sent_bytes_total", "WebSocket frame payload bytes sent", ["format"]))
+        self.latency = self.add(Histogram(
+            "pulse_latency_seconds", "Frame capture to send, client receive and render",
+            ["stage"], buckets=E2E_BUCKETS))
+        self.quality_changes = self.add(Counter(
+            "pulse_quality_changes_total", "Viewer quality tier steps", ["direction"]))
+        for direction in ("down", "up"):
+            self.quality_changes.inc(0, direction)
+
+    def add(self, family):
+        self.families.append(family)
+        return family
+
+    def gauge(self, name: str, help: str, collect: Callable[[], Any],
+              labelnames: Sequence[str] = ()) -> Gauge:
+        return self.add(Gauge(name, help, collect, labelnames))
+
+    def stage_timer(self) -> MetricsTimer:
+        """A timer for one pipeline; each pipeline needs its own"""
+        return MetricsTimer(self.stage_seconds)
+
+    def render(self) -> str:
+        """All families in the Prometheus text exposition format"""
+        lines = []
+        for family in self.families:
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for name, labels, extra, value in family.samples():
+                lines.append(f"{name}{_format_labels(family.labelnames, labels, extra)} "
+                             f"{_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Global metrics instance (None when collection is disabled)
+metrics: Optional[Metrics] = Metrics() if settings.METRICS_ENABLED else None
@@ -0,0 +1,112 @@
+"""
+Frame pacing - absolute-deadline clocks, rate decimation and rate/jitter meters
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class RateMeter:
+    """Achieved rate and interval jitter over the last `window` ticks"""
+
+    def __init__(self, window: int = 120):
+        self.intervals: deque = deque(maxlen=window)
+        self.last: Optional[float] = None
+        self.ticks = 0
+
+    def tick(self, now: Optional[float] = None):
+        """Record one event"""
+        now = time.monotonic() if now is None else now
+        if self.last is not None:
+            self.intervals.append(now - self.last)
+        self.last = now
+        self.ticks += 1
+
+    def reset(self):
+        self.intervals.clear()
+        self.last = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Rate (Hz) and jitter (standard deviation of the interval, ms)"""
+        n = len(self.intervals)
+        if n == 0:
+            return {"fps": 0.0, "jitter_ms": 0.0}
+        mean = sum(self.intervals) / n
+        var = sum((i - mean) ** 2 for i in self.intervals) / n
+        return {
+            "fps": round(1.0 / mean, 2) if mean > 0 else 0.0,
+            "jitter_ms": round(var ** 0.5 * 1000.0, 2),
+        }
+
+
+class PacingClock:
+    """
+    Tick at a fixed rate on absolute deadlines.
+
+    Deadlines advance by exactly one period, so sleep overshoot does not
+    accumulate into drift. When the caller falls behind by more than a period
+    the schedule restarts from now instead of bursting to catch up.
+    """
+
+    def __init__(self, fps: float, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep):
+        self.period = 1.0 / fps if fps and fps > 0 else 0.0
+        self.deadline: Optional[float] = None
+        # Time source and sleep, replaceable for tests
+        self.clock = clock
+        self.sleep = sleep
+
+    async def wait(self):
+        """Sleep until the next deadline (returns immediately when unpaced)"""
+        now = self.clock()
+        if self.period:
+            if self.deadline is None or now - self.deadline > self.period:
+                self.deadline = now
+            elif self.deadline > now:
+                await self.sleep(self.deadline - now)
+            self.deadline += self.period
+
+    def reset(self):
+        self.deadline = None
+
+
+class RateDecimator:
+    """
+    Pick a lower-rate subsequence of timestamped events (e.g. 10 Hz of a 30 Hz stream).
+
+    Uses the same absolute-deadline scheme as PacingClock, with half a frame
+    of tolerance so a 30 Hz source divides evenly into 15 or 10 Hz.
+    """
+
+    def __init__(self, fps: float, source_fps: float = 0.0):
+        self.period = 1.0 / fps if fps and fps > 0 else 0.0
+        self.slack = 0.5 / source_fps if source_fps and source_fps > 0 else 0.0
+        self.deadline: Optional[float] = None
+        self.meter = RateMeter()
+
+    def due(self, ts: float) -> bool:
+        """Whether an event at `ts` should be taken (without taking it)"""
+        return not self.period or self.deadline is None or ts >= self.deadline - self.slack
+
+    def take(self, ts: float) -> bool:
+        """Take the event at `ts` if it is due"""
+        if not self.due(ts):
+            return False
+        if self.period:
+            if self.deadline is None or ts - self.deadline > self.period:
+                self.deadline = ts
+            self.deadline += self.period
+        self.meter.tick(ts)
+        return True
+
+    def set_rate(self, fps: float):
+        """Change the output rate; the next event is due one new period after the last"""
+        period = 1.0 / fps if fps and fps > 0 else 0.0
+        if self.deadline is not None:
+            self.deadline += period - self.period
+        self.period = period
+
+    def reset(self):
+        self.deadline = None
+        self.meter.reset()
@@ -0,0 +1,233 @@
+"""
+Per-camera frame pipeline - capture, analysis and encoding for one camera
+"""
+import logging
+import time
+import cv2
+import numpy as np
+from typing import Optional, Dict, Any, Sequence
+import sys
+import os
+
+# Add lib to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../lib'))
+from processors import findFaceGetPulse
+from timing import StageTimer
+
+from app.config import settings
+from app.core.camera_pool import camera_pool
+from app.core.profiling import LoopProfiler
+from app.core.protocol import FramePacket
+from app.core.quality import TIERS
+
+logger = logging.getLogger(__name__)
+
+# Raw signal samples carried by each frame
+SIGNAL_WINDOW = 100
+# Upper bound on transmitted spectrum bins (decimated to about 100)
+MAX_FFT_BINS = 256
+
+
+class FramePipeline:
+    """A pulse processor fed from a pooled camera"""
+
+    def __init__(self, camera_id: int, generation: int = 0):
+        self.camera_id = camera_id
+        # Distinguishes the signal numbering of successive streams
+        self.generation = generation
+        self.camera = None
+        self.processor = findFaceGetPulse(
+            bpm_limits=[settings.BPM_MIN, settings.BPM_MAX],
+            data_spike_limit=settings.DATA_SPIKE_LIMIT,
+            face_detector_smoothness=settings.FACE_DETECTOR_SMOOTHNESS,
+            spectral_engine=settings.SPECTRAL_ENGINE,
+            detection_interval=settings.DETECTION_INTERVAL,
+            tracking_confidence=settings.TRACKING_CONFIDENCE,
+            roi_detection=settings.ROI_DETECTION,
+            roi_max_misses=settings.ROI_MAX_MISSES,
+            detector_backend=settings.FACE_DETECTOR_BACKEND,
+            detector_model=settings.FACE_DETECTOR_MODEL or None,
+            detector_config=settings.FACE_DETECTOR_CONFIG or None
+        )
+        self.processed = 0
+        # Raw signal sequence numbering restarts (new epoch) whenever the
+        # processor's buffer is reset
+        self.signal_epoch = 0
+        self._signal_resets = 0
+        # Per-stage timings, when enabled
+        self.timer: Optional[StageTimer] = None
+        # Attached only while an on-demand profile runs
+        self.profiler: Optional[LoopProfiler] = None
+
+    def start(self):
+        """Take the camera from the pool (instant when it is already open)"""
+        self.camera = camera_pool.acquire(self.camera_id)
+
+    def close(self):
+        """Hand the camera back to the pool"""
+        if self.camera:
+            self.camera.release()
+            self.camera = None
+
+    def set_timer(self, timer: Optional[StageTimer]):
+        """Record stage timings into `timer` (None disables timing)"""
+        self.timer = timer
+        self.processor.timer = timer
+
+    def start_profile(self, frames: Optional[int] = None) -> bool:
+        """Attach a profiler to the following frames; False if one is attached"""
+        if self.profiler is not None:
+            return False
+        profiler = LoopProfiler(frames)
+        profiler.start()
+        self.profiler = profiler
+        return True
+
+    def profile_status(self) -> Optional[Dict[str, Any]]:
+        """Progress of the attached profiler, None when there is none"""
+        profiler = self.profiler
+        return profiler.get_status() if profiler else None
+
+    def stop_profile(self) -> Optional[bytes]:
+        """Detach the profiler and return its report (zip)"""
+        profiler, self.profiler = self.profiler, None
+        return profiler.report() if profiler else None
+
+    def toggle_face_search(self) -> bool:
+        """Toggle face search mode, returning the new state"""
+        self.processor.find_faces_toggle()
+        return bool(self.processor.find_faces)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Capture and processing counters"""
+        stats = {"processed": self.processed}
+        if self.camera:
+            stats.update(self.camera.get_stats())
+        return stats
+
+    def process(self, timeout: float, tiers: Sequence[int] = (0,)) -> Optional[FramePacket]:
+        """Wait for the newest captured frame, process it and encode a JPEG
+        per quality tier in `tiers` (none: telemetry only)"""
+        profiler = self.profiler
+        if profiler is not None:
+            return profiler.run(self._process, timeout, tiers)
+        return self._process(timeout, tiers)
+
+    def _process(self, timeout: float, tiers: Sequence[int]) -> Optional[FramePacket]:
+        processor, camera, timer = self.processor, self.camera, self.timer
+        if camera is None:
+            return None
+        try:
+            if timer is not None:
+                timer.begin()
+            captured = camera.read(timeout=timeout)
+            if captured is None:
+                return None
+            if timer is not None:
+                timer.lap("capture")
+            frame, capture_ts, _ = captured
+            self.processed += 1
+
+            # Process frame
+            processor.frame_in = frame
+            processor.run(self.camera_id)
+            jpegs = {}
+            if tiers:
+                if settings.RENDER_OVERLAY:
+                    # The captured frame is shared with other pool users
+                    processor.frame_out = processor.frame_out.copy()
+                    processor.render(self.camera_id)
+                output_frame = processor.frame_out
+                if timer is not None:
+                    timer.lap("overlay")
+
+                # One encode per requested tier, shared by its viewers
+                for index in tiers:
+                    tier = TIERS[index]
+                    tier_frame = output_frame
+                    if tier_frame.shape[1] != tier.width or tier_frame.shape[0] != tier.height:
+                        tier_frame = cv2.resize(tier_frame, (tier.width, tier.height),
+                                                interpolation=cv2.INTER_AREA)
+                        if timer is not None:
+                            timer.lap("resize")
+
+                    _, buffer = cv2.imencode(
+                        '.jpg',
+                        tier_frame,
+                        [cv2.IMWRITE_JPEG_QUALITY, tier.jpeg_quality]
+                    )
+                    jpegs[index] = buffer.tobytes()
+                    if timer is not None:
+                        timer.lap("jpeg")
+
+            # Get BPM data
+            current_bpm = None
+            if hasattr(processor, 'bpm') and processor.bpm > 0:
+                current_bpm = round(float(processor.bpm), 1)
+
+            # Get FFT data if available
+            fft_freqs = fft_power = None
+            if hasattr(processor, 'freqs') and hasattr(processor, 'fft'):
+                if processor.freqs is not None and processor.fft is not None:
+                    # Limit data points for transmission
+                    step = max(1, len(processor.freqs) // 100)
+                    fft_freqs = np.array(processor.freqs[::step][:MAX_FFT_BINS], dtype=np.float64)
+                    fft_power = np.array(processor.fft[::step][:MAX_FFT_BINS], dtype=np.float64)
+
+            # Get raw signal data, numbered by the processor buffer's sequence
+            signal = processor.buffer
+            if signal.resets != self._signal_resets:
+                self.signal_epoch += 1
+                self._signal_resets = signal.resets
+            raw_signal = None
+            signal_seq = signal.count
+            if signal.count > 0:
+                raw_signal = np.array(signal.tail(SIGNAL_WINDOW)[1])
+                signal_seq -= len(raw_signal)
+
+            # Calculate signal quality
+            signal_quality = 0.0
+
+            # Base quality based on face detection
+            if hasattr(processor, 'face_present') and processor.face_present:
+                signal_quality += 0.4
+
+            # Quality based on data buffer fill level
+            if hasattr(processor, 'samples') and hasattr(processor, 'buffer_size') and len(processor.samples) > 0:
+                fill_ratio = min(1.0, len(processor.samples) / processor.buffer_size)
+                signal_quality += 0.3 * fill_ratio
+
+            # Quality based on BPM stability (if available)
+            if current_bpm is not None and current_bpm > 0:
+                signal_quality += 0.3
+
+            # Determine face detection status based on processor's current face presence
+            face_state = False
+            if hasattr(processor, 'face_present'):
+                face_state = bool(processor.face_present)
+            # Also check last detection timestamp as fallback
+            elif hasattr(processor, 'last_face_ts') and isinstance(processor.last_face_ts, (int, float)):
+                face_state = (time.time() - float(processor.last_face_ts)) < 1.0
+
+            # Serialization happens per wire format, once, when first sent
+            packet = FramePacket(
+                jpeg=None,
+                bpm=current_bpm,
+                signal_quality=min(1.0, signal_quality),
+                face_detected=face_state,
+                capture_ts=capture_ts,
+                timestamp=time.time(),
+                fft_freqs=fft_freqs,
+                fft_power=fft_power,
+                raw_signal=raw_signal,
+                signal_seq=signal_seq,
+                signal_epoch=(self.generation << 32) | self.signal_epoch,
+                jpegs=jpegs
+            )
+            if timer is not None:
+                timer.lap("packet")
+            return packet
+
+        except Exception as e:
+            logger.error(f"Error processing frame: {e}")
+            return None
@@ -0,0 +1,178 @@
+"""
+On-demand profiler for the frame processing loop
+
+A LoopProfiler is attached to a running FramePipeline and wraps each
+process() call until it is detached. Three views of the same frames are
+collected:
+
+- cProfile, enabled only inside the wrapped call and only on the loop thread
+- a sampler thread that records the loop thread's stack every few
+  milliseconds, for a collapsed-stack (flamegraph) file
+- tracemalloc, process-wide, for the top allocation sites
+
+While no profiler is attached the pipeline pays one None check per frame.
+"""
+import cProfile
+import io
+import json
+import logging
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import zipfile
+from collections import Counter
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Frames kept per tracemalloc traceback
+TRACE_DEPTH = 16
+
+
+class LoopProfiler:
+    """Profile the frames a pipeline processes while attached"""
+
+    def __init__(self, frames: Optional[int] = None, interval: float = 0.005,
+                 trace_memory: bool = True, top: int = 40):
+        # Stop collecting after this many frames (None: until detached)
+        self.frames = frames
+        self.interval = interval
+        self.trace_memory = trace_memory
+        self.top = top
+        self.profile = cProfile.Profile()
+        self.stacks: Counter = Counter()
+        self.profiled = 0
+        self.started = 0.0
+        self.stopped = 0.0
+        self._loop_thread: Optional[int] = None
+        self._running = False
+        # Held for the duration of each profiled frame
+        self._lock = threading.Lock()
+        self._started_tracemalloc = False
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._sampler: Optional[threading.Thread] = None
+
+    @property
+    def done(self) -> bool:
+        """The frame limit has been reached"""
+        return self.frames is not None and self.profiled >= self.frames
+
+    def start(self):
+        """Begin collecting; call before attaching to the pipeline"""
+        self.started = time.perf_counter()
+        self._running = True
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_DEPTH)
+            self._started_tracemalloc = True
+        self._sampler = threading.Thread(target=self._sample, name="loop-profiler", daemon=True)
+        self._sampler.start()
+
+    def stop(self):
+        """Stop collecting; call after detaching from the pipeline"""
+        if not self._running:
+            return
+        with self._lock:
+            # Waits for a frame still being profiled
+            self._running = False
+        self.stopped = time.perf_counter()
+        if self._sampler is not None:
+            self._sampler.join()
+        if tracemalloc.is_tracing() and self.trace_memory:
+            self._snapshot = tracemalloc.take_snapshot()
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+        logger.info(f"Profiled {self.profiled} frames in {self.stopped - self.started:.1f} s")
+
+    def run(self, func: Callable, *args: Any) -> Any:
+        """Call func(*args) under the profiler (loop thread)"""
+        with self._lock:
+            if self.done or not self._running:
+                return func(*args)
+            self._loop_thread = threading.get_ident()
+            self.profile.enable()
+            try:
+                return func(*args)
+            finally:
+                self.profile.disable()
+                self._loop_thread = None
+                self.profiled += 1
+
+    def _sample(self):
+        while self._running:
+            ident = self._loop_thread
+            if ident is not None:
+                frame = sys._current_frames().get(ident)
+                if frame is not None:
+                    self.stacks[_collapse(frame)] += 1
+            time.sleep(self.interval)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Progress of a running profile"""
+        return {"frames": self.profiled, "done": self.done,
+                "seconds": round(time.perf_counter() - self.started, 3) if self.started else 0.0}
+
+    def report(self) -> bytes:
+        """Zip with profile.pstats, profile.txt, stacks.folded, tracemalloc.txt and summary.json"""
+        self.stop()
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            stats = None
+            if self.profiled:
+                stats = pstats.Stats(self.profile)
+                # Same content as Stats.dump_stats; loadable with pstats/snakeviz
+                archive.writestr("profile.pstats", marshal.dumps(stats.stats))
+                text = io.StringIO()
+                stats.stream = text
+                stats.sort_stats("cumulative").print_stats(self.top)
+                archive.writestr("profile.txt", text.getvalue())
+            archive.writestr("stacks.folded", "".join(
+                f"{stack} {count}\n" for stack, count in self.stacks.most_common()))
+            archive.writestr("tracemalloc.txt", self._memory_report())
+            archive.writestr("summary.json", json.dumps({
+                "frames": self.profiled,
+                "seconds": round(self.stopped - self.started, 3),
+                "fps": round(self.profiled / (self.stopped - self.started), 2)
+                if self.stopped > self.started else 0.0,
+                "stack_samples": sum(self.stacks.values()),
+                "sample_interval_ms": self.interval * 1000.0,
+                "total_calls": stats.total_calls if stats else 0,
+                "pid": os.getpid(),
+            }, indent=2))
+        return buffer.getvalue()
+
+    def _memory_report(self) -> str:
+        if self._snapshot is None:
+            if self.trace_memory:
+                return "tracemalloc was not running\n"
+            return "tracemalloc disabled\n"
+        snapshot = self._snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ))
+        stats = snapshot.statistics("lineno")
+        total = sum(stat.size for stat in stats)
+        lines = [f"Allocated while profiling and still live: {total / 1024:.1f} KiB "
+                 f"in {len(stats)} sites", ""]
+        for index, stat in enumerate(stats[:self.top], 1):
+            frame = stat.traceback[0]
+            lines.append(f"#{index}: {frame.filename}:{frame.lineno}: "
+                         f"{stat.size / 1024:.1f} KiB in {stat.count} blocks")
+        return "\n".join(lines) + "\n"
+
+
+def _collapse(frame) -> str:
+    """Root-first "func (file:line);..." stack up to LoopProfiler.run"""
+    names = []
+    while frame is not None and frame.f_code is not _RUN_CODE:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+_RUN_CODE = LoopProfiler.run.__code__
@@ -0,0 +1,285 @@
+"""
+Frame message encoding for the /ws/pulse WebSocket
+
+Two wire formats are supported:
+
+- ``json`` (default): the original text message with a base64 JPEG and
+  float lists.
+- ``binary``: a single binary message made of a fixed little-endian header,
+  followed by float32 arrays (FFT frequencies, FFT power, raw signal) and
+  the raw JPEG bytes.
+
+Frames can be sent without their image (telemetry-only) to viewers that get
+video at a lower rate than the analysis loop; ``image`` is then null in JSON
+and ``jpeg_len`` is 0 in binary messages. A packet can carry the JPEG in
+several quality tiers (see ``app.core.quality``); each viewer gets the one
+it is on.
+
+Raw signal samples are numbered by a per-stream sequence. By default every
+message carries the last window of samples (a snapshot). Clients that track a
+``SignalCursor`` instead get only the samples appended since their cursor,
+and a snapshot again when the cursor no longer matches the stream (first
+message, resync, or the analysis buffer was reset). Each numbering has an
+epoch, sent with delta messages so that client acks can name the numbering
+they refer to.
+
+Binary header (``HEADER`` struct, 48 bytes)::
+
+    magic          4s   b"HRF1"
+    version        B    2
+    flags          B    bit 0: face detected, bit 1: bpm present,
+                        bit 2: raw signal is a snapshot
+    signal_epoch   H    epoch of the signal numbering (see ``epoch_tag``)
+    bpm            f    NaN when no estimate
+    signal_quality f
+    capture_ts     d    camera capture time (unix seconds)
+    timestamp      d    message creation time (unix seconds)
+    jpeg_len       I    bytes
+    fft_len        I    bins (freqs and power each have this many floats)
+    signal_len     I    samples
+    signal_seq     I    sequence number of the first raw signal sample
+
+The arrays come before the JPEG so every float32 array starts on a 4-byte
+boundary and can be read with a zero-copy typed-array view in the browser.
+"""
+import base64
+import json
+import struct
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+FORMAT_JSON = "json"
+FORMAT_BINARY = "binary"
+FORMATS = (FORMAT_JSON, FORMAT_BINARY)
+
+MAGIC = b"HRF1"
+VERSION = 2
+HEADER = struct.Struct("<4sBBHffddIIII")
+FLAG_FACE = 0x01
+FLAG_BPM = 0x02
+FLAG_SNAPSHOT = 0x04
+
+
+def epoch_tag(epoch: int) -> int:
+    """16-bit form of a signal epoch, as carried in the binary header"""
+    return (epoch ^ (epoch >> 32)) & 0xFFFF
+
+
+class SignalCursor:
+    """A client's position in the stream's raw signal sequence"""
+
+    __slots__ = ("epoch", "seq", "sent")
+
+    def __init__(self):
+        self.epoch: Optional[int] = None
+        self.seq: Optional[int] = None
+        # Sequence number after the last sample sent in this epoch
+        self.sent: Optional[int] = None
+
+    def reset(self):
+        """Request a full snapshot with the next message"""
+        self.epoch = None
+        self.seq = None
+        self.sent = None
+
+    def ack(self, seq: int, epoch: Optional[int] = None):
+        """
+        Move up to a sequence number the client confirmed.
+
+        Acks only move the cursor forward and never past the samples sent;
+        acks for another epoch (sent before the numbering restarted) are
+        ignored. ``epoch`` may be the full epoch or its ``epoch_tag``.
+        """
+        if self.epoch is None or self.seq is None:
+            return
+        if epoch is not None and epoch_tag(int(epoch)) != epoch_tag(self.epoch):
+            return
+        self.seq = max(self.seq, min(int(seq), self.sent))
+
+    def advance(self, packet: "FramePacket"):
+        """Record that a packet's samples were sent"""
+        self.epoch = packet.signal_epoch
+        self.seq = packet.signal_next
+        self.sent = packet.signal_next
+
+
+class FramePacket:
+    """One processed frame, serialized lazily and at most once per format"""
+
+    __slots__ = (
+        "jpegs", "bpm", "signal_quality", "face_detected", "capture_ts",
+        "timestamp", "fft_freqs", "fft_power", "raw_signal", "signal_seq",
+        "signal_epoch", "_encoded",
+    )
+
+    def __init__(
+        self,
+        jpeg: Optional[bytes],
+        bpm: Optional[float],
+        signal_quality: float,
+        face_detected: bool,
+        capture_ts: float,
+        timestamp: float,
+        fft_freqs: Optional[np.ndarray] = None,
+        fft_power: Optional[np.ndarray] = None,
+        raw_signal: Optional[np.ndarray] = None,
+        signal_seq: int = 0,
+        signal_epoch: int = 0,
+        jpegs: Optional[Dict[int, bytes]] = None,
+    ):
+        # JPEG variants by quality tier; `jpeg` is shorthand for tier 0
+        self.jpegs: Dict[int, bytes] = dict(jpegs or {})
+        if jpeg is not None:
+            self.jpegs[0] = jpeg
+        self.bpm = bpm
+        self.signal_quality = signal_quality
+        self.face_detected = face_detected
+        self.capture_ts = capture_ts
+        self.timestamp = timestamp
+        self.fft_freqs = fft_freqs
+        self.fft_power = fft_power
+        self.raw_signal = raw_signal
+        # Sequence number of raw_signal[0]; epoch changes when numbering restarts
+        self.signal_seq = signal_seq
+        self.signal_epoch = signal_epoch
+        self._encoded: Dict[Tuple[str, Optional[int], Optional[int]], Any] = {}
+
+    @property
+    def signal_next(self) -> int:
+        """Sequence number the next new sample will get"""
+        n = 0 if self.raw_signal is None else len(self.raw_signal)
+        return self.signal_seq + n
+
+    def delta_offset(self, cursor: Optional[SignalCursor]) -> Optional[int]:
+        """Index of the first raw_signal sample a cursor has not seen, None for a snapshot"""
+        if cursor is None or cursor.seq is None or cursor.epoch != self.signal_epoch:
+            return None
+        if not self.signal_seq <= cursor.seq <= self.signal_next:
+            return None
+        return cursor.seq - self.signal_seq
+
+    def to_dict(self, offset: Optional[int] = None, delta: bool = False,
+                tier: Optional[int] = 0) -> Dict[str, Any]:
+        """
+        JSON-compatible message dict.
+
+        Without ``delta`` this is the original frame message. With it, the
+        message also carries signal_seq/signal_next/signal_epoch/snapshot
+        and raw_signal starts at ``offset`` (None meaning a full snapshot).
+        The image is the JPEG of quality ``tier``; left out when ``tier`` is
+        None.
+        """
+        jpeg = None if tier is None else self.jpegs.get(tier)
+        fft_data = None
+        if self.fft_freqs is not None and self.fft_power is not None:
+            fft_data = {
+                "freqs": [float(f) for f in self.fft_freqs],
+                "power": [float(p) for p in self.fft_power],
+            }
+        raw_signal = None
+        if self.raw_signal is not None:
+            raw_signal = [float(s) for s in self.raw_signal[offset or 0:]]
+        message = {
+            "type": "frame",
+            "image": base64.b64encode(jpeg).decode("utf-8") if jpeg else None,
+            "bpm": self.bpm,
+            "fft_data": fft_data,
+            "raw_signal": raw_signal,
+            "timestamp": self.timestamp,
+            "capture_ts": self.capture_ts,
+            "face_detected": self.face_detected,
+            "signal_quality": self.signal_quality,
+        }
+        if delta:
+            message["signal_seq"] = self.signal_seq + (offset or 0)
+            message["signal_next"] = self.signal_next
+            message["signal_epoch"] = self.signal_epoch
+            message["snapshot"] = offset is None
+        return message
+
+    def to_binary(self, offset: Optional[int] = None, tier: Optional[int] = 0) -> bytes:
+        """Binary frame message, raw signal starting at ``offset`` (None for a snapshot)"""
+        jpeg = (None if tier is None else self.jpegs.get(tier)) or b""
+        freqs = _f32(self.fft_freqs)
+        power = _f32(self.fft_power)
+        signal = _f32(self.raw_signal)[offset or 0:]
+        if len(power) != len(freqs):
+            power = power[:len(freqs)]
+            freqs = freqs[:len(power)]
+        flags = ((FLAG_FACE if self.face_detected else 0)
+                 | (FLAG_BPM if self.bpm is not None else 0)
+                 | (FLAG_SNAPSHOT if offset is None else 0))
+        header = HEADER.pack(
+            MAGIC, VERSION, flags, epoch_tag(self.signal_epoch),
+            float("nan") if self.bpm is None else float(self.bpm),
+            float(self.signal_quality),
+            float(self.capture_ts),
+            float(self.timestamp),
+            len(jpeg), len(freqs), len(signal),
+            self.signal_seq + (offset or 0),
+        )
+        return b"".join((header, freqs.tobytes(), power.tobytes(), signal.tobytes(), jpeg))
+
+    def encode(self, fmt: str, cursor: Optional[SignalCursor] = None, tier: Optional[int] = 0):
+        """
+        Serialized message for a wire format (str for json, bytes for binary).
+
+        With a cursor, only samples the cursor has not seen are included and
+        the cursor is advanced. Clients in step share the same cached delta.
+        The image is the JPEG of quality ``tier``; left out when ``tier`` is
+        None or the packet has no JPEG for it.
+        """
+        offset = self.delta_offset(cursor)
+        if tier not in self.jpegs:
+            tier = None
+        key = (fmt if cursor is None else fmt + "+delta", offset, tier)
+        encoded = self._encoded.get(key)
+        if encoded is None:
+            if fmt == FORMAT_BINARY:
+                encoded = self.to_binary(offset, tier)
+            elif fmt == FORMAT_JSON:
+                encoded = json.dumps(self.to_dict(offset, delta=cursor is not None, tier=tier))
+            else:
+                raise ValueError(f"Unknown frame format: {fmt}")
+            self._encoded[key] = encoded
+        if cursor is not None:
+            cursor.advance(self)
+        return encoded
+
+
+def _f32(values: Optional[np.ndarray]) -> np.ndarray:
+    if values is None:
+        return np.empty(0, dtype="<f4")
+    return np.ascontiguousarray(values, dtype="<f4")
+
+
+def decode_binary(message: bytes) -> Dict[str, Any]:
+    """Parse a binary frame message (reference decoder for clients and tests)"""
+    (magic, version, flags, epoch, bpm, quality, capture_ts, timestamp,
+     jpeg_len, fft_len, signal_len, signal_seq) = HEADER.unpack_from(message, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a binary frame message")
+    offset = HEADER.size
+    freqs = np.frombuffer(message, dtype="<f4", count=fft_len, offset=offset)
+    offset += 4 * fft_len
+    power = np.frombuffer(message, dtype="<f4", count=fft_len, offset=offset)
+    offset += 4 * fft_len
+    signal = np.frombuffer(message, dtype="<f4", count=signal_len, offset=offset)
+    offset += 4 * signal_len
+    jpeg = message[offset:offset + jpeg_len]
+    return {
+        "version": version,
+        "face_detected": bool(flags & FLAG_FACE),
+        "bpm": float(bpm) if flags & FLAG_BPM else None,
+        "signal_quality": float(quality),
+        "capture_ts": capture_ts,
+        "timestamp": timestamp,
+        "fft_freqs": freqs,
+        "fft_power": power,
+        "raw_signal": signal,
+        "signal_seq": signal_seq,
+        "signal_epoch": epoch,
+        "snapshot": bool(flags & FLAG_SNAPSHOT),
+        "jpeg": jpeg,
+    }
@@ -13,7 +13,9 @@ import sys
 
 # Add lib to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../lib'))
-from device import Camera
+from ringbuffer import RingBuffer
+
+from app.core.camera_pool import CameraHandle, camera_pool
 
 logger = logging.getLogger(__name__)
 
@@ -26,23 +28,32 @@ class DetectionSession:
         self.camera_id = camera_id
         self.bpm_limits = bpm_limits
         self.start_time = datetime.now()
-        self.camera: Optional[Camera] = None
+        self.camera: Optional[CameraHandle] = None
         self.processor = None
-        self.timestamps: List[float] = []
-        self.raw_values: List[float] = []
+        # Bounded (timestamp, raw value) history of the session
+        self.signal = RingBuffer(settings.SESSION_BUFFER_SIZE)
         self.bpm_values: List[float] = []
         self.active = False
 
     def start(self):
         """Start the session"""
         try:
-            self.camera = Camera(camera=self.camera_id)
+            # Shared with the live stream; instant when the device is warm
+            self.camera = camera_pool.acquire(self.camera_id)
             # Import here to avoid circular dependency
             from processors import findFaceGetPulse
             self.processor = findFaceGetPulse(
                 bpm_limits=self.bpm_limits,
                 data_spike_limit=settings.DATA_SPIKE_LIMIT,
-                face_detector_smoothness=settings.FACE_DETECTOR_SMOOTHNESS
+                face_detector_smoothness=settings.FACE_DETECTOR_SMOOTHNESS,
+                spectral_engine=settings.SPECTRAL_ENGINE,
+                detection_interval=settings.DETECTION_INTERVAL,
+                tracking_confidence=settings.TRACKING_CONFIDENCE,
+                roi_detection=settings.ROI_DETECTION,
+                roi_max_misses=settings.ROI_MAX_MISSES,
+                detector_backend=settings.FACE_DETECTOR_BACKEND,
+                detector_model=settings.FACE_DETECTOR_MODEL or None,
+                detector_config=settings.FACE_DETECTOR_CONFIG or None
             )
             self.active = True
             logger.info(f"Session {self.session_id} started")
@@ -55,17 +66,26 @@ class DetectionSession:
         self.active = False
         if self.camera:
             self.camera.release()
+            self.camera = None
         logger.info(f"Session {self.session_id} stopped")
 
+    @property
+    def evicted(self) -> int:
+        """Samples dropped from the front of the bounded history"""
+        return self.signal.count - len(self.signal)
+
     def add_data_point(self, timestamp: float, value: float, bpm: Optional[float] = None):
         """Add a data point to the session"""
-        self.timestamps.append(timestamp)
-        self.raw_values.append(value)
+        if self.signal.count == self.signal.capacity:
+            logger.warning(f"Session {self.session_id} reached SESSION_BUFFER_SIZE "
+                           f"({self.signal.capacity} samples); older samples are dropped "
+                           f"from now on and will be missing from the export")
+        self.signal.append(timestamp, value)
         if bpm is not None:
             self.bpm_values.append(bpm)
 
-    def get_data(self) -> Optional[CurrentDataResponse]:
-        """Get current session data"""
+    def get_data(self, since: Optional[int] = None) -> Optional[CurrentDataResponse]:
+        """Get current session data, only samples from the `since` cursor on if given"""
         if not self.active or not self.processor:
             return None
 
@@ -79,12 +99,22 @@ class DetectionSession:
         if samples_count > settings.BUFFER_SIZE * 0.8:
             signal_quality += 0.5
 
+        # Cursors that are unknown, ahead of the stream or already overwritten
+        # get a snapshot of the last 100 samples instead of a delta
+        snapshot = since is None or not self.signal.first_seq <= since <= self.signal.count
+        if snapshot:
+            timestamps, raw_values = self.signal.tail(100)
+        else:
+            timestamps, raw_values = self.signal.since(since)
         return CurrentDataResponse(
             current_bpm=current_bpm,
             signal_quality=min(1.0, signal_quality),
             samples_count=samples_count,
-            timestamps=self.timestamps[-100:],  # Last 100 samples
-            raw_values=self.raw_values[-100:]
+            timestamps=timestamps.tolist(),
+            raw_values=raw_values.tolist(),
+            first_seq=self.signal.count - len(raw_values),
+            next_cursor=self.signal.count,
+            snapshot=snapshot
         )
 
 
@@ -100,14 +130,9 @@ class PulseDetectorManager:
         os.makedirs(settings.DATA_DIR, exist_ok=True)
 
     def is_camera_available(self, camera_id: int) -> bool:
-        """Check if camera is available"""
+        """Check if camera is available (opens the device; prefer camera_registry)"""
         try:
-            import cv2
-            cap = cv2.VideoCapture(camera_id)
-            if cap.isOpened():
-                cap.release()
-                return True
-            return False
+            return camera_pool.probe(camera_id)[0]
         except Exception as e:
             logger.error(f"Error checking camera {camera_id}: {e}")
             return False
@@ -179,10 +204,10 @@ class PulseDetectorManager:
             session.camera_id = camera_id
             session.start()
 
-    def get_current_data(self, session_id: str) -> Optional[CurrentDataResponse]:
+    def get_current_data(self, session_id: str, since: Optional[int] = None) -> Optional[CurrentDataResponse]:
         """Get current session data"""
         if session_id in self.sessions:
-            return self.sessions[session_id].get_data()
+            return self.sessions[session_id].get_data(since)
         return None
 
     def export_data(self, session_id: str, format: str = "csv") -> str:
@@ -198,9 +223,12 @@ class PulseDetectorManager:
         with open(filepath, 'w', newline='') as csvfile:
             writer = csv.writer(csvfile)
             writer.writerow(['Timestamp', 'Value'])
-            for ts, val in zip(session.timestamps, session.raw_values):
+            for ts, val in zip(session.signal.times, session.signal.values):
                 writer.writerow([ts, val])
 
+        if session.evicted:
+            logger.warning(f"Export of session {session_id} holds the last {len(session.signal)} "
+                           f"samples; {session.evicted} older samples exceeded SESSION_BUFFER_SIZE")
         logger.info(f"Exported data to {filepath}")
         return filepath
 
@@ -0,0 +1,179 @@
+"""
+Adaptive video quality - per-viewer congestion control over encoding tiers
+
+Every viewer gets video at one of a fixed ladder of tiers (JPEG quality,
+output size and a video rate cap); tier 0 is the configured FRAME_WIDTH x
+FRAME_HEIGHT at JPEG_QUALITY. The pipeline encodes each tier that a due
+viewer needs once per frame, so viewers on the same tier share one encode.
+Telemetry is never throttled, only the video.
+
+A viewer's ``QualityController`` looks at three signals over half-second
+windows:
+
+- drain time: the share of the window its writer spent blocked in send, i.e.
+  waiting for the socket buffer to drain;
+- queue drops: frames it lost because its queue was full;
+- acknowledged receive latency (only for clients that send acks).
+
+Any of them over its high mark steps the viewer one tier down, at most once
+per second so the previous step can take effect. Stepping back up needs all
+of them under their low marks for UP_HOLD seconds; a step up that has to be
+undone right away doubles that hold (up to MAX_UP_HOLD), so a link at the
+edge of a tier does not oscillate.
+"""
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from app.config import settings
+
+
+class QualityTier(NamedTuple):
+    """Encoding parameters of one rung of the quality ladder"""
+    width: int
+    height: int
+    jpeg_quality: int
+    # Video rate cap (0 = the viewer's requested rate)
+    max_fps: float
+
+
+# (size scale, JPEG quality scale, video rate cap) relative to tier 0
+TIER_STEPS = (
+    (1.0, 1.0, 0),
+    (1.0, 0.75, 0),
+    (0.75, 0.65, 0),
+    (0.5, 0.6, 15),
+    (0.5, 0.5, 10),
+    (0.25, 0.5, 5),
+)
+
+# Evaluation window and hysteresis (seconds)
+WINDOW = 0.5
+DOWN_HOLD = 1.0
+UP_HOLD = 5.0
+MAX_UP_HOLD = 60.0
+# Share of the window spent blocked in send
+BUSY_HIGH = 0.5
+BUSY_LOW = 0.2
+
+
+def build_tiers(width: int, height: int, jpeg_quality: int) -> Tuple[QualityTier, ...]:
+    """The tier ladder for a full-size frame and quality"""
+    tiers = []
+    for scale, quality, max_fps in TIER_STEPS:
+        # Even sizes keep chroma subsampling exact
+        tiers.append(QualityTier(
+            width=max(2, int(round(width * scale / 2)) * 2),
+            height=max(2, int(round(height * scale / 2)) * 2),
+            jpeg_quality=max(10, int(round(jpeg_quality * quality))),
+            max_fps=float(max_fps),
+        ))
+    return tuple(tiers)
+
+
+TIERS = build_tiers(settings.FRAME_WIDTH, settings.FRAME_HEIGHT, settings.JPEG_QUALITY)
+
+
+class QualityController:
+    """Pick a viewer's tier from its send drain time, drops and acked latency"""
+
+    def __init__(self, adaptive: bool = True, tiers: Tuple[QualityTier, ...] = TIERS,
+                 max_latency: float = settings.ADAPTIVE_MAX_LATENCY_MS / 1000.0):
+        self.adaptive = adaptive
+        self.tiers = tiers
+        self.tier = 0
+        self.latency_high = max_latency
+        self.latency_low = max_latency / 2.0
+        self.up_hold = UP_HOLD
+        self.changes = 0
+        # Current window
+        self._window_start: Optional[float] = None
+        self._busy = 0.0
+        self._drops = 0
+        self._latency: Optional[float] = None
+        # Hysteresis state
+        self._last_change = float("-inf")
+        self._last_up = float("-inf")
+        self._clear_since: Optional[float] = None
+
+    @property
+    def current(self) -> QualityTier:
+        return self.tiers[self.tier]
+
+    def video_fps(self, requested: float) -> float:
+        """Video rate for a viewer that asked for `requested` at the current tier"""
+        cap = self.current.max_fps
+        if not cap:
+            return requested
+        return min(requested, cap) if requested > 0 else cap
+
+    def sent(self, seconds: float):
+        """Time the writer spent sending one message"""
+        self._busy += seconds
+
+    def dropped(self):
+        """A frame was dropped from the viewer's full queue"""
+        self._drops += 1
+
+    def acked(self, latency: float):
+        """Capture -> receive latency of an acknowledged frame (s)"""
+        if self._latency is None or latency > self._latency:
+            self._latency = latency
+
+    def update(self, now: float) -> bool:
+        """Close the window if it is over and step the tier; True if it changed"""
+        if self._window_start is None:
+            self._window_start = now
+            return False
+        elapsed = now - self._window_start
+        if elapsed < WINDOW:
+            return False
+        busy, drops, latency = self._busy / elapsed, self._drops, self._latency
+        self._window_start, self._busy, self._drops, self._latency = now, 0.0, 0, None
+        if not self.adaptive:
+            return False
+
+        congested = (busy > BUSY_HIGH or drops > 0
+                     or (latency is not None and latency > self.latency_high))
+        if congested:
+            self._clear_since = None
+            if self.tier < len(self.tiers) - 1 and now - self._last_change >= DOWN_HOLD:
+                # The link could not take the tier we just probed
+                if now - self._last_up < self.up_hold:
+                    self.up_hold = min(self.up_hold * 2.0, MAX_UP_HOLD)
+                self._step(self.tier + 1, now)
+                return True
+            return False
+
+        clear = busy < BUSY_LOW and (latency is None or latency < self.latency_low)
+        if not clear:
+            self._clear_since = None
+            return False
+        if self._clear_since is None:
+            self._clear_since = now
+        if self.tier > 0 and now - self._clear_since >= self.up_hold:
+            self._step(self.tier - 1, now)
+            self._last_up = now
+            self._clear_since = now
+            return True
+        if self._last_change == self._last_up and now - self._last_up >= MAX_UP_HOLD:
+            # The last step up has held for long enough; probe at the normal
+            # pace again (not while still waiting out a failed probe)
+            self.up_hold = UP_HOLD
+        return False
+
+    def _step(self, tier: int, now: float):
+        self.tier = tier
+        self._last_change = now
+        self.changes += 1
+
+    def get_stats(self, requested_fps: float) -> Dict[str, Any]:
+        """Current tier and its encoding parameters"""
+        tier = self.current
+        return {
+            "adaptive": self.adaptive,
+            "tier": self.tier,
+            "width": tier.width,
+            "height": tier.height,
+            "jpeg_quality": tier.jpeg_quality,
+            "video_fps": self.video_fps(requested_fps),
+            "changes": self.changes,
+        }
@@ -0,0 +1,24 @@
+"""
+Trace spans - the process-wide ring of per-frame spans
+
+Filled by the frame pipeline (one track for the processing loop) and the
+WebSocket writers (one track per client), and exported as Chrome trace JSON
+by /api/v1/admin/trace. None when TRACE_BUFFER_SIZE is 0 or ADMIN_TOKEN is
+unset, so the hot path records nothing nobody can read.
+"""
+import os
+import sys
+from typing import Optional
+
+from app.config import settings
+
+# Add lib to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../lib'))
+from tracing import SpanRing, SpanTimer  # noqa: F401
+
+# Track of the capture/analysis/encode loop
+PIPELINE_TRACK = "pipeline"
+
+# Global span ring (None when tracing is disabled)
+span_ring: Optional[SpanRing] = (SpanRing(settings.TRACE_BUFFER_SIZE)
+                                 if settings.TRACE_BUFFER_SIZE > 0 and settings.ADMIN_TOKEN else None)
@@ -3,170 +3,180 @@ Video stream manager for WebSocket streaming
 """
 import logging
 import asyncio
-import base64
 import time
-import cv2
-import numpy as np
-from typing import Optional, Dict, Any
-import sys
-import os
-
-# Add lib to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../lib'))
-from device import Camera
-from processors import findFaceGetPulse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Sequence, Union
 
 from app.config import settings
+from app.core.metrics import metrics
 from app.core.pulse_detector import detector_manager
+from app.core.pipeline import FramePipeline
+from app.core.protocol import FramePacket
+from app.core.spans import PIPELINE_TRACK, SpanTimer, span_ring
+from app.core.workers import PipelineProcess
 
 logger = logging.getLogger(__name__)
 
+EXECUTION_MODES = ("thread", "process")
+
 
 class VideoStreamManager:
     """Manage video streaming for WebSocket"""
 
-    def __init__(self):
-        self.camera: Optional[Camera] = None
-        self.processor: Optional[findFaceGetPulse] = None
+    def __init__(self, execution_mode: str = settings.EXECUTION_MODE):
+        if execution_mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode: {execution_mode}")
+        self.execution_mode = execution_mode
+        # Runs in this process ("thread") or proxies a worker ("process")
+        self.pipeline: Optional[Union[FramePipeline, PipelineProcess]] = None
         self.active = False
         self.camera_id = settings.DEFAULT_CAMERA
         self.lock = asyncio.Lock()
+        # Single worker: the processor is stateful and must see frames in order
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pulse-analysis")
+        # Incremented per stream so signal cursors never carry over
+        self.generation = 0
 
     async def start_stream(self, camera_id: int = 0):
         """Start video stream"""
         async with self.lock:
             if self.active:
-                await self.stop_stream()
+                await self._stop()
 
             try:
+                loop = asyncio.get_running_loop()
                 self.camera_id = camera_id
-                self.camera = Camera(camera=camera_id)
-                self.processor = findFaceGetPulse(
-                    bpm_limits=[settings.BPM_MIN, settings.BPM_MAX],
-                    data_spike_limit=settings.DATA_SPIKE_LIMIT,
-                    face_detector_smoothness=settings.FACE_DETECTOR_SMOOTHNESS
+                self.generation += 1
+                # Opening a device (or spawning a worker) blocks; keep it off the loop
+                self.pipeline = await loop.run_in_executor(
+                    None, self._open, camera_id, self.generation
                 )
                 self.active = True
-                logger.info(f"Video stream started with camera {camera_id}")
+                logger.info(f"Video stream started with camera {camera_id} ({self.execution_mode} mode)")
             except Exception as e:
                 logger.error(f"Error starting video stream: {e}")
                 raise
 
+    def _open(self, camera_id: int, generation: int) -> Union[FramePipeline, PipelineProcess]:
+        if self.execution_mode == "process":
+            pipeline = PipelineProcess(camera_id, generation)
+        else:
+            pipeline = FramePipeline(camera_id, generation)
+            timer = metrics.stage_timer() if metrics is not None else None
+            if span_ring is not None:
+                timer = SpanTimer(span_ring, PIPELINE_TRACK, forward=timer, stream=generation)
+            if timer is not None:
+                pipeline.set_timer(timer)
+        pipeline.start()
+        return pipeline
+
     async def stop_stream(self):
         """Stop video stream"""
         async with self.lock:
-            self.active = False
-            if self.camera:
-                self.camera.release()
-                self.camera = None
-            self.processor = None
-            logger.info("Video stream stopped")
+            await self._stop()
+
+    async def _stop(self):
+        self.active = False
+        pipeline, self.pipeline = self.pipeline, None
+        if pipeline:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, pipeline.close)
+        logger.info("Video stream stopped")
 
     async def toggle_face_search(self):
         """Toggle face search mode"""
-        if self.processor:
-            self.processor.find_faces_toggle()
-            logger.info(f"Face search toggled: {self.processor.find_faces}")
-
-    async def get_frame(self) -> Optional[Dict[str, Any]]:
-        """Get processed frame data"""
-        if not self.active or not self.camera or not self.processor:
+        pipeline = self.pipeline
+        if pipeline:
+            loop = asyncio.get_running_loop()
+            find_faces = await loop.run_in_executor(None, pipeline.toggle_face_search)
+            logger.info(f"Face search toggled: {find_faces}")
+
+    async def profile(self, seconds: float, frames: Optional[int] = None) -> bytes:
+        """
+        Profile the running loop for `seconds` or until `frames` frames were
+        processed, whichever comes first, and return the report zip
+        """
+        pipeline = self.pipeline
+        if not self.active or not pipeline:
+            raise RuntimeError("Video stream is not active")
+        loop = asyncio.get_running_loop()
+        if not await loop.run_in_executor(None, pipeline.start_profile, frames):
+            raise RuntimeError("A profile is already running")
+        logger.info(f"Profiling the {self.execution_mode} pipeline for up to {seconds} s"
+                    + (f" or {frames} frames" if frames else ""))
+        try:
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline and self.pipeline is pipeline:
+                await asyncio.sleep(min(0.1, max(0.0, deadline - time.monotonic())))
+                if frames is not None:
+                    status = await loop.run_in_executor(None, pipeline.profile_status)
+                    if status is None or status["done"]:
+                        break
+        finally:
+            report = await loop.run_in_executor(None, pipeline.stop_profile)
+        if report is None:
+            raise RuntimeError("The stream stopped before the profile was collected")
+        return report
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Capture and processing counters"""
+        stats = {
+            "active": self.active,
+            "camera_id": self.camera_id,
+            "execution_mode": self.execution_mode,
+        }
+        if self.pipeline:
+            stats.update(self.pipeline.get_stats())
+        return stats
+
+    async def get_frame(self, timeout: float = 0.5, tiers: Sequence[int] = (0,)) -> Optional[FramePacket]:
+        """Get processed frame data with a JPEG per quality tier in `tiers`
+        (none when no viewer needs video)"""
+        if not self.active or not self.pipeline:
             return None
 
-        try:
-            # Get frame from camera
-            frame = self.camera.get_frame()
-            if frame is None or isinstance(frame, str):
-                return None
-
-            # Process frame
-            self.processor.frame_in = frame
-            self.processor.run(self.camera_id)
-            output_frame = self.processor.frame_out
-
-            # Resize if needed
-            if output_frame.shape[1] != settings.FRAME_WIDTH or output_frame.shape[0] != settings.FRAME_HEIGHT:
-                output_frame = cv2.resize(output_frame, (settings.FRAME_WIDTH, settings.FRAME_HEIGHT))
-
-            # Encode to JPEG
-            _, buffer = cv2.imencode(
-                '.jpg',
-                output_frame,
-                [cv2.IMWRITE_JPEG_QUALITY, settings.JPEG_QUALITY]
-            )
-
-            # Convert to base64
-            image_base64 = base64.b64encode(buffer).decode('utf-8')
-
-            # Get BPM data
-            current_bpm = None
-            if hasattr(self.processor, 'bpm') and self.processor.bpm > 0:
-                current_bpm = round(float(self.processor.bpm), 1)
-
-            # Get FFT data if available
-            fft_data = None
-            if hasattr(self.processor, 'freqs') and hasattr(self.processor, 'fft'):
-                if self.processor.freqs is not None and self.processor.fft is not None:
-                    # Limit data points for transmission
-                    step = max(1, len(self.processor.freqs) // 100)
-                    fft_data = {
-                        "freqs": [float(f) for f in self.processor.freqs[::step]],
-                        "power": [float(p) for p in self.processor.fft[::step]]
-                    }
-
-            # Get raw signal data
-            raw_signal = None
-            if hasattr(self.processor, 'samples') and len(self.processor.samples) > 0:
-                # Last 100 samples
-                raw_signal = [float(s) for s in self.processor.samples[-100:]]
-                
-                # Add data point to current detection session if available
-                if detector_manager.current_session_id:
-                    session_id = detector_manager.current_session_id
-                    if session_id in detector_manager.sessions:
-                        session = detector_manager.sessions[session_id]
-                        # Use the latest sample value
-                        latest_value = float(self.processor.samples[-1]) if self.processor.samples else 0.0
-                        session.add_data_point(time.time(), latest_value, current_bpm)
-
-            # Calculate signal quality
-            signal_quality = 0.0
-            
-            # Base quality based on face detection
-            if hasattr(self.processor, 'face_present') and self.processor.face_present:
-                signal_quality += 0.4
-            
-            # Quality based on data buffer fill level
-            if hasattr(self.processor, 'samples') and hasattr(self.processor, 'buffer_size') and len(self.processor.samples) > 0:
-                fill_ratio = min(1.0, len(self.processor.samples) / self.processor.buffer_size)
-                signal_quality += 0.3 * fill_ratio
-            
-            # Quality based on BPM stability (if available)
-            if current_bpm is not None and current_bpm > 0:
-                signal_quality += 0.3
-
-            # Create response
-            # Determine face detection status based on processor's current face presence
-            face_state = False
-            if hasattr(self.processor, 'face_present'):
-                face_state = bool(self.processor.face_present)
-            # Also check last detection timestamp as fallback
-            elif hasattr(self.processor, 'last_face_ts') and isinstance(self.processor.last_face_ts, (int, float)):
-                face_state = (time.time() - float(self.processor.last_face_ts)) < 1.0
-
-            frame_data = {
-                "type": "frame",
-                "image": image_base64,
-                "bpm": current_bpm,
-                "fft_data": fft_data,
-                "raw_signal": raw_signal,
-                "timestamp": time.time(),
-                "face_detected": face_state,
-                "signal_quality": min(1.0, signal_quality)
-            }
-
-            return frame_data
-
-        except Exception as e:
-            logger.error(f"Error processing frame: {e}")
+        # Capture happens on the grabber thread; waiting for the next frame,
+        # analysis and encoding run in the executor so the loop stays free
+        loop = asyncio.get_running_loop()
+        if metrics is None and span_ring is None:
+            return await loop.run_in_executor(self.executor, self._process_next, timeout, tiers)
+        start = time.perf_counter()
+        packet = await loop.run_in_executor(self.executor, self._process_next, timeout, tiers)
+        end = time.perf_counter()
+        if metrics is not None and packet is not None:
+            metrics.frame_seconds.observe(end - start)
+        if span_ring is not None:
+            if packet is None:
+                span_ring.add("no_frame", start, end, PIPELINE_TRACK, stream=self.generation)
+            else:
+                span_ring.add("frame", start, end, PIPELINE_TRACK, stream=self.generation,
+                              session=detector_manager.current_session_id,
+                              capture_ts=round(packet.capture_ts, 6), tiers=sorted(packet.jpegs))
+        return packet
+
+    def _process_next(self, timeout: float, tiers: Sequence[int] = (0,)) -> Optional[FramePacket]:
+        """Process the next frame and record it in the detection session (executor thread)"""
+        pipeline = self.pipeline
+        if not pipeline:
             return None
+        packet = pipeline.process(timeout, tiers)
+        if packet is None or packet.raw_signal is None or len(packet.raw_signal) == 0:
+            return packet
+
+        # Add data point to current detection session if available
+        if detector_manager.current_session_id:
+            session_id = detector_manager.current_session_id
+            if session_id in detector_manager.sessions:
+                session = detector_manager.sessions[session_id]
+                # Use the latest sample value
+                latest_value = float(packet.raw_signal[-1])
+                session.add_data_point(packet.capture_ts, latest_value, packet.bpm)
+        return packet
+
+
+# Global video stream manager instance
+stream_manager = VideoStreamManager()
+
+if metrics is not None:
+    metrics.gauge("pulse_capture_dropped", "Frames captured but never analysed in the current stream",
+                  lambda: stream_manager.get_stats().get("dropped", 0))
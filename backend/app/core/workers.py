@@ -0,0 +1,316 @@
+"""
+Process execution mode - run a camera's pipeline in a worker process
+
+The worker owns the camera, capture thread, pulse processor and JPEG encoder.
+Finished frames (with the JPEG of every requested quality tier packed back to
+back) are written into a ring of shared-memory slots; the API
+process only receives the slot index over a pipe and copies the result out,
+so neither frames nor encoded JPEGs are ever pickled.
+
+Each slot is guarded by a sequence lock: the writer makes the slot's sequence
+number odd while it writes and even again when done, and a reader accepts a
+copy only if the sequence number was even and unchanged around the copy.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from app.config import settings
+from app.core.camera_pool import camera_pool
+from app.core.pipeline import FramePipeline, MAX_FFT_BINS, SIGNAL_WINDOW
+from app.core.protocol import FramePacket
+from app.core.quality import TIERS
+
+logger = logging.getLogger(__name__)
+
+# int64 slot header: seq, fft_len, signal_len, signal_seq, signal_epoch
+HEADER_FIELDS = 5
+# float64 slot metadata: bpm, signal_quality, face_detected, capture_ts, timestamp
+META_FIELDS = 5
+
+
+def default_cv_threads() -> int:
+    """OpenCV threads per worker so that one worker per camera fills the CPUs"""
+    cameras = max(1, len(settings.CAMERA_DEVICES))
+    return max(1, (os.cpu_count() or 1) // cameras)
+
+
+class ResultRing:
+    """Fixed slots of frame results in shared memory"""
+
+    def __init__(self, slots: int, max_jpeg: int, name: Optional[str] = None):
+        self.slots = slots
+        self.max_jpeg = max_jpeg
+        self._layout = [
+            ("header", np.int64, HEADER_FIELDS),
+            # JPEG length per quality tier, -1 when not encoded
+            ("jpeg_lens", np.int64, len(TIERS)),
+            ("meta", np.float64, META_FIELDS),
+            ("freqs", np.float64, MAX_FFT_BINS),
+            ("power", np.float64, MAX_FFT_BINS),
+            ("signal", np.float64, SIGNAL_WINDOW),
+            ("jpeg", np.uint8, max_jpeg),
+        ]
+        self.slot_size = sum(np.dtype(t).itemsize * n for _, t, n in self._layout)
+        self.slot_size += -self.slot_size % 8
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=slots * self.slot_size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        self._views = [self._slot_views(i) for i in range(slots)]
+        self._next = 0
+
+    def _slot_views(self, index: int) -> Dict[str, np.ndarray]:
+        views = {}
+        offset = index * self.slot_size
+        for field, dtype, count in self._layout:
+            views[field] = np.ndarray((count,), dtype=dtype, buffer=self.shm.buf, offset=offset)
+            offset += np.dtype(dtype).itemsize * count
+        return views
+
+    def write(self, packet: FramePacket) -> Tuple[int, int]:
+        """Store a packet in the next slot, returning (slot, sequence number)"""
+        index = self._next
+        self._next = (index + 1) % self.slots
+        v = self._views[index]
+        header = v["header"]
+
+        header[0] += 1  # odd: write in progress
+        jpeg_lens = v["jpeg_lens"]
+        jpeg_lens[:] = -1
+        offset = 0
+        for tier, jpeg in sorted(packet.jpegs.items()):
+            if offset + len(jpeg) > self.max_jpeg:
+                logger.warning(f"JPEG of {len(jpeg)} bytes exceeds the shared slot; "
+                               f"tier {tier} not sent")
+                continue
+            v["jpeg"][offset:offset + len(jpeg)] = np.frombuffer(jpeg, dtype=np.uint8)
+            jpeg_lens[tier] = len(jpeg)
+            offset += len(jpeg)
+        header[1] = _put(v["freqs"], packet.fft_freqs)
+        _put(v["power"], packet.fft_power)
+        header[2] = _put(v["signal"], packet.raw_signal)
+        header[3] = packet.signal_seq
+        header[4] = packet.signal_epoch
+        v["meta"][:] = (
+            np.nan if packet.bpm is None else packet.bpm,
+            packet.signal_quality,
+            1.0 if packet.face_detected else 0.0,
+            packet.capture_ts,
+            packet.timestamp,
+        )
+        header[0] += 1  # even: consistent
+        return index, int(header[0])
+
+    def read(self, index: int, seq: int) -> Optional[FramePacket]:
+        """Copy a packet out of a slot, or None if it was overwritten meanwhile"""
+        v = self._views[index]
+        header = v["header"]
+        if int(header[0]) != seq or seq % 2:
+            return None
+        fft_len, signal_len, signal_seq, signal_epoch = (int(x) for x in header[1:])
+        bpm, quality, face, capture_ts, timestamp = (float(x) for x in v["meta"])
+        jpegs = {}
+        offset = 0
+        for tier, jpeg_len in enumerate(int(n) for n in v["jpeg_lens"]):
+            if jpeg_len >= 0:
+                jpegs[tier] = v["jpeg"][offset:offset + jpeg_len].tobytes()
+                offset += jpeg_len
+        packet = FramePacket(
+            jpeg=None,
+            bpm=None if np.isnan(bpm) else bpm,
+            signal_quality=quality,
+            face_detected=face > 0.5,
+            capture_ts=capture_ts,
+            timestamp=timestamp,
+            fft_freqs=None if fft_len < 0 else v["freqs"][:fft_len].copy(),
+            fft_power=None if fft_len < 0 else v["power"][:fft_len].copy(),
+            raw_signal=None if signal_len < 0 else v["signal"][:signal_len].copy(),
+            signal_seq=signal_seq,
+            signal_epoch=signal_epoch,
+            jpegs=jpegs,
+        )
+        if int(header[0]) != seq:
+            return None
+        return packet
+
+    def close(self):
+        self._views = []
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+
+def _put(target: np.ndarray, values: Optional[np.ndarray]) -> int:
+    """Copy values into the front of a slot array; -1 stands for None"""
+    if values is None:
+        return -1
+    n = min(len(values), len(target))
+    target[:n] = values[:n]
+    return n
+
+
+def _worker_main(camera_id: int, generation: int, shm_name: str, slots: int, max_jpeg: int,
+                 frame_conn, control_conn, cv_threads: int):
+    """Worker process entry point"""
+    cv2.setNumThreads(cv_threads)
+    ring = ResultRing(slots, max_jpeg, name=shm_name)
+    pipeline = FramePipeline(camera_id, generation)
+    pipeline.start()
+
+    def serve_control():
+        # Toggle and stats requests are answered while a frame is in progress;
+        # replies carry the request id so late ones can be told apart
+        while True:
+            try:
+                request_id, command = control_conn.recv()
+            except (EOFError, OSError):
+                return
+            reply = None
+            if command == "toggle":
+                reply = pipeline.toggle_face_search()
+            elif command == "stats":
+                reply = pipeline.get_stats()
+            elif isinstance(command, tuple) and command[0] == "profile_start":
+                reply = pipeline.start_profile(command[1])
+            elif command == "profile_status":
+                reply = pipeline.profile_status()
+            elif command == "profile_stop":
+                reply = pipeline.stop_profile()
+            control_conn.send((request_id, reply))
+
+    threading.Thread(target=serve_control, name="worker-control", daemon=True).start()
+    try:
+        while True:
+            try:
+                command = frame_conn.recv()
+            except (EOFError, OSError):
+                break
+            if command == "stop":
+                break
+            _, frame_id, timeout, tiers = command
+            packet = pipeline.process(timeout, tiers)
+            # The id lets the API process drop replies it stopped waiting for
+            frame_conn.send((frame_id, None if packet is None else ring.write(packet)))
+    finally:
+        pipeline.close()
+        camera_pool.close_all()
+        ring.close()
+
+
+class PipelineProcess:
+    """FramePipeline stand-in that runs the real pipeline in a worker process"""
+
+    def __init__(self, camera_id: int, generation: int = 0, cv_threads: Optional[int] = None,
+                 slots: int = 3):
+        self.camera_id = camera_id
+        self.generation = generation
+        self.cv_threads = cv_threads or settings.WORKER_CV_THREADS or default_cv_threads()
+        self.ring = ResultRing(slots, settings.FRAME_WIDTH * settings.FRAME_HEIGHT * 3)
+        ctx = multiprocessing.get_context("spawn")
+        self._frame_conn, worker_frame_conn = ctx.Pipe()
+        self._control_conn, worker_control_conn = ctx.Pipe()
+        self.worker = ctx.Process(
+            target=_worker_main,
+            args=(camera_id, generation, self.ring.name, slots, self.ring.max_jpeg,
+                  worker_frame_conn, worker_control_conn, self.cv_threads),
+            name=f"pulse-worker-{camera_id}",
+            daemon=True,
+        )
+        self._frame_lock = threading.Lock()
+        self._control_lock = threading.Lock()
+        # Ids of the last frame and control requests; replies to earlier
+        # requests (that timed out) are stale
+        self._frame_id = 0
+        self._request_id = 0
+
+    def start(self):
+        self.worker.start()
+        logger.info(f"Started worker process {self.worker.pid} for camera {self.camera_id} "
+                    f"({self.cv_threads} OpenCV threads)")
+
+    def close(self):
+        """Stop the worker and free the shared memory"""
+        try:
+            self._frame_conn.send("stop")
+        except (OSError, ValueError):
+            pass
+        self._frame_conn.close()
+        self._control_conn.close()
+        self.worker.join(5.0)
+        if self.worker.is_alive():
+            self.worker.terminate()
+            self.worker.join(1.0)
+        self.ring.close()
+        self.ring.unlink()
+
+    def _request(self, command, timeout: float):
+        """Send a control command and wait for its reply (None on timeout),
+        discarding late replies to earlier requests that timed out"""
+        with self._control_lock:
+            conn = self._control_conn
+            self._request_id += 1
+            conn.send((self._request_id, command))
+            deadline = time.monotonic() + timeout
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not conn.poll(remaining):
+                    logger.warning(f"Worker for camera {self.camera_id} did not answer "
+                                   f"{command!r} in time")
+                    return None
+                request_id, reply = conn.recv()
+                if request_id == self._request_id:
+                    return reply
+
+    def toggle_face_search(self) -> bool:
+        return bool(self._request("toggle", 2.0))
+
+    def start_profile(self, frames: Optional[int] = None) -> bool:
+        return bool(self._request(("profile_start", frames), 2.0))
+
+    def profile_status(self) -> Optional[Dict[str, Any]]:
+        return self._request("profile_status", 2.0)
+
+    def stop_profile(self) -> Optional[bytes]:
+        # Building the report takes a moment for long profiles
+        try:
+            return self._request("profile_stop", 30.0)
+        except (OSError, EOFError):
+            # The worker has already been stopped
+            return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self._request("stats", 2.0) or {}
+        stats["worker_pid"] = self.worker.pid
+        return stats
+
+    def process(self, timeout: float, tiers: Sequence[int] = (0,)) -> Optional[FramePacket]:
+        """Have the worker process the next frame and copy the result out"""
+        if not self.worker.is_alive():
+            return None
+        with self._frame_lock:
+            conn = self._frame_conn
+            self._frame_id += 1
+            conn.send(("frame", self._frame_id, timeout, tuple(tiers)))
+            # Allow for the frame wait plus analysis and encoding
+            deadline = time.monotonic() + timeout + 5.0
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not conn.poll(remaining):
+                    logger.warning(f"Worker for camera {self.camera_id} did not answer in time")
+                    return None
+                frame_id, reply = conn.recv()
+                if frame_id == self._frame_id:
+                    break
+        if reply is None:
+            return None
+        return self.ring.read(*reply)
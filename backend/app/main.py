@@ -4,12 +4,15 @@ FastAPI main application
 import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 
 from app.config import settings
-from app.api import endpoints, websocket
+from app.api import admin, endpoints, websocket
+from app.core.camera_pool import camera_pool
+from app.core.camera_registry import camera_registry
+from app.core.metrics import metrics
 
 # Configure logging
 logging.basicConfig(
@@ -44,17 +47,21 @@ async def startup_event():
     """Startup event handler"""
     logger.info(f"Starting {settings.APP_NAME} v{settings.APP_VERSION}")
     logger.info(f"CORS origins: {settings.CORS_ORIGINS}")
+    camera_registry.start()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Shutdown event handler"""
     logger.info("Shutting down application")
+    await camera_registry.stop()
+    camera_pool.close_all()
 
 
 # Include routers
 app.include_router(endpoints.router, prefix="/api/v1", tags=["api"])
 app.include_router(websocket.router, tags=["websocket"])
+app.include_router(admin.router, prefix="/api/v1/admin", tags=["admin"])
 
 FRONTEND_DIST = Path(__file__).resolve().parents[2] / "frontend" / "dist"
 if FRONTEND_DIST.exists():
@@ -70,6 +77,13 @@ async def health_check():
     return JSONResponse(content={"status": "healthy"})
 
 
+if metrics is not None:
+    @app.get("/api/metrics", tags=["health"], response_class=PlainTextResponse)
+    async def get_metrics():
+        """Prometheus metrics (not served when METRICS_ENABLED is off)"""
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/", tags=["root"])
 async def root():
     """Root endpoint"""
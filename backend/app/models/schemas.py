@@ -19,6 +19,8 @@ class CameraInfo(BaseModel):
     id: int = Field(..., description="Camera ID")
     name: str = Field(..., description="Camera name")
     available: bool = Field(..., description="Camera availability")
+    in_use: bool = Field(False, description="Camera is held open by a stream or session")
+    checked_at: Optional[float] = Field(None, description="Unix timestamp of the last enumeration")
 
 
 class CameraListResponse(BaseModel):
@@ -90,6 +92,67 @@ class CurrentDataResponse(BaseModel):
     samples_count: int = Field(..., description="Number of samples collected")
     timestamps: List[float] = Field(..., description="Sample timestamps")
     raw_values: List[float] = Field(..., description="Raw signal values")
+    first_seq: int = Field(0, description="Sequence number of the first returned sample")
+    next_cursor: int = Field(0, description="Pass as `since` to get only newer samples")
+    snapshot: bool = Field(True, description="Latest samples window rather than a delta")
+
+
+class LatencyStats(BaseModel):
+    """Capture to send/receive/render latency of a viewer (receive and render need client acks)"""
+    acks: int = Field(0, description="Frames acknowledged by the client")
+    send_p50_ms: Optional[float] = Field(None, description="Capture to sent, median (ms)")
+    send_p95_ms: Optional[float] = Field(None, description="Capture to sent, 95th percentile (ms)")
+    receive_p50_ms: Optional[float] = Field(None, description="Capture to client receive, median (ms)")
+    receive_p95_ms: Optional[float] = Field(None, description="Capture to client receive, 95th percentile (ms)")
+    render_p50_ms: Optional[float] = Field(None, description="Capture to client render, median (ms)")
+    render_p95_ms: Optional[float] = Field(None, description="Capture to client render, 95th percentile (ms)")
+    network_ms: Optional[float] = Field(None, description="Estimated one-way network delay, median (ms)")
+
+
+class QualityStats(BaseModel):
+    """A viewer's current video quality tier"""
+    adaptive: bool = Field(True, description="Tier follows the viewer's link")
+    tier: int = Field(0, description="Quality tier (0 = full size and JPEG_QUALITY)")
+    width: int = Field(..., description="Video width (px)")
+    height: int = Field(..., description="Video height (px)")
+    jpeg_quality: int = Field(..., description="JPEG quality")
+    video_fps: float = Field(..., description="Video rate at this tier")
+    changes: int = Field(0, description="Tier steps so far")
+
+
+class ViewerStats(BaseModel):
+    """Per-viewer delivery counters"""
+    id: int = Field(0, description="Viewer ID (the viewer label in /api/metrics)")
+    target_video_fps: float = Field(..., description="Requested video rate")
+    video_fps: float = Field(0.0, description="Achieved video rate")
+    video_jitter_ms: float = Field(0.0, description="Video frame interval jitter (ms)")
+    delivered: int = Field(0, description="Frames taken from the viewer queue")
+    dropped: int = Field(0, description="Frames dropped from the viewer queue")
+    latency: Optional[LatencyStats] = Field(None, description="Glass-to-glass latency")
+    quality: Optional[QualityStats] = Field(None, description="Adaptive video quality")
+
+
+class StreamStats(BaseModel):
+    """Video stream capture/processing counters"""
+    active: bool = Field(..., description="Stream active")
+    camera_id: int = Field(..., description="Camera ID")
+    execution_mode: str = Field("thread", description="Pipeline execution mode (thread or process)")
+    worker_pid: Optional[int] = Field(None, description="Worker process ID in process mode")
+    processed: int = Field(0, description="Frames processed")
+    captured: int = Field(0, description="Frames read from the camera")
+    dropped: int = Field(0, description="Frames replaced before being processed")
+    delivered: int = Field(0, description="Frames handed to processing")
+    last_frame_age_ms: float = Field(0.0, description="Capture-to-processing delay of the last frame (ms)")
+    avg_frame_age_ms: float = Field(0.0, description="Average capture-to-processing delay (ms)")
+    subscribers: int = Field(0, description="Connected stream viewers")
+    broadcast_frames: int = Field(0, description="Frames fanned out to viewers")
+    subscriber_drops: int = Field(0, description="Frames dropped from full viewer queues")
+    target_fps: float = Field(0.0, description="Configured analysis rate (TARGET_FPS)")
+    analysis_fps: float = Field(0.0, description="Achieved analysis rate")
+    analysis_jitter_ms: float = Field(0.0, description="Analysis interval jitter (ms)")
+    video_fps: float = Field(0.0, description="Achieved JPEG encode rate")
+    video_jitter_ms: float = Field(0.0, description="JPEG encode interval jitter (ms)")
+    viewers: List[ViewerStats] = Field(default_factory=list, description="Per-viewer delivery")
 
 
 class HealthResponse(BaseModel):
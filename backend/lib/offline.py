@@ -0,0 +1,168 @@
+"""
+Offline analysis of recorded video files.
+
+analyze_video decodes a file as fast as the CPU allows and feeds every frame
+to findFaceGetPulse with the frame's own timestamp (CAP_PROP_POS_MSEC), so the
+spectral estimate sees the recording's real sample times rather than however
+long decoding happened to take. The face is searched for until it has been
+found on `lock_after` consecutive frames and is then locked, as a user of
+get_pulse.py would do by pressing 'S'.
+"""
+import os
+import time
+from typing import Any, List, NamedTuple, Optional
+
+import cv2
+import numpy as np
+
+try:
+    from .processors import findFaceGetPulse
+except ImportError:
+    from processors import findFaceGetPulse
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".webm", ".m4v")
+
+
+class OfflineResult(NamedTuple):
+    """ Traces extracted from one video file """
+    path: str
+    frames: int
+    duration: float
+    elapsed: float
+    raw_times: np.ndarray
+    raw_values: np.ndarray
+    bpm_times: np.ndarray
+    bpm_values: np.ndarray
+
+    @property
+    def speed(self) -> float:
+        """Processing speed as a multiple of real time"""
+        return self.duration / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def frame_time(cap: "cv2.VideoCapture", index: int, fps: float) -> float:
+    """
+    Timestamp (s) of the frame just read.
+
+    Args:
+        cap: Capture the frame was read from
+        index: Zero-based index of the frame
+        fps: Nominal frame rate, used when the container has no timestamps
+
+    Returns:
+        Frame timestamp in seconds
+    """
+    msec = cap.get(cv2.CAP_PROP_POS_MSEC)
+    if msec > 0 or index == 0:
+        return msec / 1000.0
+    return index / fps if fps > 0 else 0.0
+
+
+def analyze_video(path: str, lock_after: int = 10, max_frames: Optional[int] = None,
+                  **processor_args: Any) -> OfflineResult:
+    """
+    Run pulse detection over a whole video file.
+
+    Args:
+        path: Video file
+        lock_after: Consecutive frames with a face before the face is locked
+        max_frames: Stop after this many frames
+        **processor_args: Passed to findFaceGetPulse
+
+    Returns:
+        Raw forehead trace and BPM time series
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"Cannot open video: {path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+    processor = findFaceGetPulse(**processor_args)
+    raw_times: List[float] = []
+    raw_values: List[float] = []
+    bpm_times: List[float] = []
+    bpm_values: List[float] = []
+    frames = 0
+    found = 0
+    last_ts = prev_ts = 0.0
+    start = time.perf_counter()
+    try:
+        while max_frames is None or frames < max_frames:
+            ok, frame = cap.read()
+            if not ok or frame is None:
+                break
+            ts = frame_time(cap, frames, fps)
+            # Some demuxers repeat a timestamp; keep the series increasing
+            if frames and ts <= prev_ts:
+                ts = prev_ts + (1.0 / fps if fps > 0 else 1e-3)
+            prev_ts = last_ts = ts
+            frames += 1
+
+            processor.frame_in = frame
+            result = processor.run(0, timestamp=ts)
+            if processor.find_faces:
+                found = found + 1 if result.face_present else 0
+                if found >= lock_after:
+                    processor.find_faces_toggle()
+                continue
+            if result.sample is not None:
+                raw_times.append(ts)
+                raw_values.append(result.sample)
+                if result.bpm > 0 and len(processor.buffer) > 10:
+                    bpm_times.append(ts)
+                    bpm_values.append(result.bpm)
+    finally:
+        cap.release()
+
+    return OfflineResult(path=path,
+                         frames=frames,
+                         duration=last_ts + (1.0 / fps if fps > 0 else 0.0),
+                         elapsed=time.perf_counter() - start,
+                         raw_times=np.array(raw_times),
+                         raw_values=np.array(raw_values),
+                         bpm_times=np.array(bpm_times),
+                         bpm_values=np.array(bpm_values))
+
+
+def write_csv(result: OfflineResult, out_dir: str) -> List[str]:
+    """
+    Write <name>_raw.csv (time, value) and <name>_bpm.csv (time, bpm).
+
+    Args:
+        result: Output of analyze_video
+        out_dir: Destination directory (created if needed)
+
+    Returns:
+        Paths of the written files
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(result.path))[0]
+    written = []
+    for suffix, header, times, values in (
+            ("raw", "time,value", result.raw_times, result.raw_values),
+            ("bpm", "time,bpm", result.bpm_times, result.bpm_values)):
+        fn = os.path.join(out_dir, f"{stem}_{suffix}.csv")
+        np.savetxt(fn, np.column_stack((times, values)).reshape(-1, 2),
+                   delimiter=",", header=header, comments="", fmt="%.6f")
+        written.append(fn)
+    return written
+
+
+def find_videos(paths: List[str]) -> List[str]:
+    """
+    Expand files and directories into a sorted list of video files.
+
+    Args:
+        paths: Video files and/or directories (searched recursively)
+
+    Returns:
+        Video file paths
+    """
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                found.extend(os.path.join(root, n) for n in names
+                             if n.lower().endswith(VIDEO_EXTENSIONS))
+        else:
+            found.append(path)
+    return sorted(found)
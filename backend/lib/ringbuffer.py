@@ -0,0 +1,154 @@
+"""
+Fixed-capacity, NumPy-backed circular storage for (timestamp, value) samples.
+
+Each sample is written twice, at slot ``i`` and at slot ``i + capacity`` of a
+buffer that is twice the requested capacity. The most recent ``capacity``
+samples are therefore always laid out contiguously and in chronological order
+somewhere inside the storage, so reading them back is a plain slice (a view)
+rather than a copy.
+"""
+import numpy as np
+from typing import Optional, Tuple
+
+
+class RingBuffer:
+    """
+    Circular buffer of timestamped float samples.
+
+    Views returned by ``times``, ``values`` and ``tail()`` share memory with the
+    buffer and stay valid until the next call to ``append()`` or ``clear()``.
+    Copy them if they need to outlive that.
+    """
+
+    def __init__(self, capacity: int, dtype: type = np.float64):
+        """
+        Initialize the buffer.
+
+        Args:
+            capacity: Maximum number of samples kept
+            dtype: NumPy dtype used for both timestamps and values
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = int(capacity)
+        self._times = np.zeros(2 * self.capacity, dtype=dtype)
+        self._values = np.zeros(2 * self.capacity, dtype=dtype)
+        # Total number of samples appended since the last clear()
+        self.count = 0
+        # Value pushed out of the window by the last append(), if any
+        self.evicted: Optional[float] = None
+        # Number of clear() calls; sequence numbers restart after each one
+        self.resets = 0
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.capacity
+
+    @property
+    def first_seq(self) -> int:
+        """Sequence number of the oldest retained sample."""
+        return self.count - len(self)
+
+    def _window(self) -> Tuple[int, int]:
+        if self.count < self.capacity:
+            return 0, self.count
+        start = self.count % self.capacity
+        return start, start + self.capacity
+
+    def append(self, timestamp: float, value: float) -> None:
+        """
+        Store a sample, overwriting the oldest one once the buffer is full.
+
+        Args:
+            timestamp: Sample time
+            value: Sample value
+        """
+        i = self.count % self.capacity
+        j = i + self.capacity
+        self.evicted = float(self._values[i]) if self.count >= self.capacity else None
+        self._times[i] = self._times[j] = timestamp
+        self._values[i] = self._values[j] = value
+        self.count += 1
+
+    def clear(self) -> None:
+        """Drop all samples (storage is kept and reused)."""
+        self.count = 0
+        self.evicted = None
+        self.resets += 1
+
+    @property
+    def times(self) -> np.ndarray:
+        """Ordered view of the stored timestamps, oldest first."""
+        start, stop = self._window()
+        return self._times[start:stop]
+
+    @property
+    def values(self) -> np.ndarray:
+        """Ordered view of the stored values, oldest first."""
+        start, stop = self._window()
+        return self._values[start:stop]
+
+    def tail(self, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the most recent samples.
+
+        Args:
+            n: Maximum number of samples to return
+
+        Returns:
+            Tuple of (timestamps, values) views, oldest first
+        """
+        start, stop = self._window()
+        start = max(start, stop - max(0, int(n)))
+        return self._times[start:stop], self._values[start:stop]
+
+    def since(self, seq: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the samples appended from a sequence number on.
+
+        The n-th sample appended since the last clear() has sequence number
+        n - 1, so ``count`` is the cursor to pass on the next call.
+
+        Args:
+            seq: Sequence number of the first wanted sample. Samples that
+                 have already been overwritten are silently skipped; compare
+                 with ``first_seq`` to detect that.
+
+        Returns:
+            Tuple of (timestamps, values) views, oldest first
+        """
+        return self.tail(self.count - max(int(seq), self.first_seq))
+
+    def last(self) -> Tuple[float, float]:
+        """
+        Get the newest sample.
+
+        Returns:
+            Tuple of (timestamp, value)
+
+        Raises:
+            IndexError: If the buffer is empty
+        """
+        if self.count == 0:
+            raise IndexError("last() on empty RingBuffer")
+        i = (self.count - 1) % self.capacity
+        return float(self._times[i]), float(self._values[i])
+
+    def oldest(self) -> Tuple[float, float]:
+        """
+        Get the oldest retained sample, i.e. the one the next append() will
+        overwrite once the buffer is full.
+
+        Returns:
+            Tuple of (timestamp, value)
+
+        Raises:
+            IndexError: If the buffer is empty
+        """
+        if self.count == 0:
+            raise IndexError("oldest() on empty RingBuffer")
+        start, _ = self._window()
+        return float(self._times[start]), float(self._values[start])
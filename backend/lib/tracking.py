@@ -0,0 +1,126 @@
+"""
+Cheap inter-frame face tracking used between Haar cascade detections.
+
+The cascade is by far the most expensive per-frame step of findFaceGetPulse.
+DetectionScheduler decides when a full detection is actually needed (every
+N frames, or as soon as the tracker loses confidence) and TemplateTracker
+follows the face rectangle in between by normalized cross-correlation of a
+downscaled template inside a small search window.
+"""
+import cv2
+import numpy as np
+from typing import Optional, Sequence, Tuple
+
+
+class TemplateTracker:
+    """
+    Follow a rectangle across frames with cv2.matchTemplate.
+    """
+
+    def __init__(self, template_size: int = 48, search_margin: float = 0.5):
+        """
+        Initialize the tracker.
+
+        Args:
+            template_size: Width (px) the face template is downscaled to
+            search_margin: Search window padding, as a fraction of the rect size
+        """
+        self.template_size = int(template_size)
+        self.search_margin = float(search_margin)
+        self.template: Optional[np.ndarray] = None
+        self.rect: Optional[np.ndarray] = None
+        self.scale = 1.0
+
+    def reset(self) -> None:
+        self.template = None
+        self.rect = None
+
+    def init(self, gray: np.ndarray, rect: Sequence[int]) -> None:
+        """
+        Start tracking a rectangle.
+
+        Args:
+            gray: Grayscale frame the rectangle was detected in
+            rect: Face rectangle (x, y, w, h)
+        """
+        x, y, w, h = [int(v) for v in rect]
+        patch = gray[y:y + h, x:x + w]
+        if patch.size == 0:
+            self.reset()
+            return
+        self.scale = min(1.0, self.template_size / float(max(w, h)))
+        self.template = cv2.resize(patch, None, fx=self.scale, fy=self.scale,
+                                   interpolation=cv2.INTER_AREA)
+        self.rect = np.array([x, y, w, h])
+
+    def update(self, gray: np.ndarray) -> Tuple[Optional[np.ndarray], float]:
+        """
+        Locate the tracked rectangle in a new frame.
+
+        Args:
+            gray: Grayscale frame
+
+        Returns:
+            Tuple of (rect, confidence). Confidence is the normalized
+            correlation score in [-1, 1]; 0.0 with rect None if not tracking.
+        """
+        if self.template is None or self.rect is None:
+            return None, 0.0
+        x, y, w, h = self.rect
+        img_h, img_w = gray.shape[:2]
+        m = int(self.search_margin * max(w, h))
+        x0, y0 = max(0, x - m), max(0, y - m)
+        x1, y1 = min(img_w, x + w + m), min(img_h, y + h + m)
+        search = cv2.resize(gray[y0:y1, x0:x1], None, fx=self.scale, fy=self.scale,
+                            interpolation=cv2.INTER_AREA)
+        th, tw = self.template.shape[:2]
+        if search.shape[0] < th or search.shape[1] < tw:
+            return self.rect, 0.0
+        result = cv2.matchTemplate(search, self.template, cv2.TM_CCOEFF_NORMED)
+        _, confidence, _, (mx, my) = cv2.minMaxLoc(result)
+        self.rect = np.array([x0 + int(round(mx / self.scale)),
+                              y0 + int(round(my / self.scale)), w, h])
+        return self.rect, float(confidence)
+
+
+class DetectionScheduler:
+    """
+    Decide on which frames the face detector has to run.
+    """
+
+    def __init__(self, interval: int = 1, min_confidence: float = 0.6):
+        """
+        Initialize the scheduler.
+
+        Args:
+            interval: Run the detector at least every `interval` frames
+                      (1 means every frame, i.e. no tracking)
+            min_confidence: Tracker confidence below which the detector runs
+                            on the next frame regardless of the interval
+        """
+        self.interval = max(1, int(interval))
+        self.min_confidence = float(min_confidence)
+        self.frames_since_detection = 0
+        self.confidence = 0.0
+
+    def reset(self) -> None:
+        """Force a detection on the next frame."""
+        self.frames_since_detection = 0
+        self.confidence = 0.0
+
+    def due(self) -> bool:
+        """Whether the next frame should run the full detector."""
+        return (self.interval == 1
+                or self.frames_since_detection == 0
+                or self.frames_since_detection >= self.interval
+                or self.confidence < self.min_confidence)
+
+    def detected(self, found: bool) -> None:
+        """Record the outcome of a detector run."""
+        self.frames_since_detection = 1 if found else 0
+        self.confidence = 1.0 if found else 0.0
+
+    def tracked(self, confidence: float) -> None:
+        """Record the outcome of a tracker update."""
+        self.frames_since_detection += 1
+        self.confidence = float(confidence)
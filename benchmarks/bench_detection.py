@@ -0,0 +1,68 @@
+"""
+Per-frame face detection cost: full-frame cascade scan vs. ROI search.
+
+Renders a simple drawn face (which the bundled frontal-face cascade picks up)
+into frames of several resolutions and times CascadeFaceDetector in
+full-frame mode and in ROI mode, where only a padded window around the last
+face is scanned on a downscaled pyramid level.
+
+Usage:
+    python benchmarks/bench_detection.py [--frames N]
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+from lib.detectors import CascadeFaceDetector  # noqa: E402
+from lib.device import draw_face  # noqa: E402
+
+RESOLUTIONS = [(640, 480), (1920, 1080)]
+
+
+def make_frames(width: int, height: int, count: int):
+    rng = np.random.default_rng(0)
+    size = int(height * 0.42)
+    frames = []
+    for i in range(count):
+        img = np.full((height, width, 3), (90, 100, 90), np.uint8)
+        # Slow horizontal drift, as a seated subject would move
+        draw_face(img, width // 2 + int(20 * np.sin(i / 10.0)), height // 2, size)
+        img = cv2.GaussianBlur(img, (5, 5), 0)
+        img = np.clip(img + rng.normal(0, 4, img.shape), 0, 255).astype(np.uint8)
+        frames.append(cv2.equalizeHist(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)))
+    return frames
+
+
+def time_detector(detector: CascadeFaceDetector, frames) -> tuple:
+    hits = 0
+    # Warm up and establish the first face position
+    detector.detect(frames[0])
+    start = time.perf_counter()
+    for gray in frames:
+        hits += len(detector.detect(gray)) > 0
+    return (time.perf_counter() - start) / len(frames), hits / len(frames)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frames", type=int, default=60)
+    args = parser.parse_args()
+
+    cascade = cv2.CascadeClassifier(os.path.join(ROOT, "haarcascade_frontalface_alt.xml"))
+    for width, height in RESOLUTIONS:
+        frames = make_frames(width, height, args.frames)
+        full, full_hits = time_detector(CascadeFaceDetector(cascade, roi_search=False), frames)
+        roi, roi_hits = time_detector(CascadeFaceDetector(cascade, roi_search=True), frames)
+        print(f"{width}x{height}: full {full * 1e3:7.2f} ms/frame (hit {full_hits:.0%}), "
+              f"roi {roi * 1e3:6.2f} ms/frame (hit {roi_hits:.0%}), "
+              f"{full / roi:5.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
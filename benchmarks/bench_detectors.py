@@ -0,0 +1,132 @@
+"""
+Face detector backends compared: latency per frame and detection recall.
+
+Runs each backend of lib.detectors over the same frames. By default the frames
+are a synthetic clip of a drawn face that drifts and tilts its head by up to
+30 degrees, with known face positions. A detection counts as a hit when its
+centre lies within half a face width of the true centre and its width is
+within a factor of two. With --clip the frames come from a video file instead.
+There is no ground truth then, so recall is the share of frames with a face,
+on the assumption that the clip shows one face throughout.
+
+Backends whose model files are missing are skipped. YuNet and the SSD model
+are not bundled with the repository. Download them from the OpenCV Zoo
+(face_detection_yunet_2023mar.onnx) and the OpenCV face_detector samples
+(deploy.prototxt, res10_300x300_ssd_iter_140000.caffemodel).
+
+Usage:
+    python benchmarks/bench_detectors.py [--frames N] [--clip video.mp4]
+        [--yunet-model PATH] [--dnn-model PATH --dnn-config PATH]
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+from lib.detectors import DEFAULT_MODELS, create_face_detector  # noqa: E402
+from lib.device import draw_face  # noqa: E402
+
+RESOLUTIONS = [(640, 480), (1280, 720)]
+
+
+def make_clip(width: int, height: int, count: int):
+    """Synthetic frames with a drifting, tilting face: [(bgr, (cx, cy, size))]"""
+    rng = np.random.default_rng(0)
+    size = int(height * 0.42)
+    clip = []
+    for i in range(count):
+        img = np.full((height, width, 3), (90, 100, 90), np.uint8)
+        cx, cy = width // 2 + int(20 * np.sin(i / 10.0)), height // 2
+        draw_face(img, cx, cy, size)
+        angle = 30.0 * np.sin(i / 15.0)
+        rot = cv2.getRotationMatrix2D((cx, cy), angle, 1.0)
+        img = cv2.warpAffine(img, rot, (width, height), borderMode=cv2.BORDER_REPLICATE)
+        img = cv2.GaussianBlur(img, (5, 5), 0)
+        img = np.clip(img + rng.normal(0, 4, img.shape), 0, 255).astype(np.uint8)
+        clip.append((img, (cx, cy, size)))
+    return clip
+
+
+def read_clip(path: str, count: int):
+    """Frames of a video file, without ground truth"""
+    cap = cv2.VideoCapture(path)
+    clip = []
+    while len(clip) < count:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        clip.append((frame, None))
+    cap.release()
+    if not clip:
+        raise SystemExit(f"Could not read frames from {path}")
+    return clip
+
+
+def is_hit(detected, truth) -> bool:
+    if truth is None:
+        return len(detected) > 0
+    cx, cy, size = truth
+    for x, y, w, h in detected:
+        if (abs(x + w / 2 - cx) < size / 2 and abs(y + h / 2 - cy) < size / 2
+                and size / 2 <= w <= size * 2):
+            return True
+    return False
+
+
+def run_backend(detector, clip) -> tuple:
+    grays = [cv2.equalizeHist(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)) for frame, _ in clip]
+    # Warm up: load the model and establish the first face position
+    detector.detect(grays[0], clip[0][0])
+    hits = 0
+    start = time.perf_counter()
+    for gray, (frame, truth) in zip(grays, clip):
+        hits += is_hit(detector.detect(gray, frame), truth)
+    return (time.perf_counter() - start) / len(clip), hits / len(clip)
+
+
+def backends(args):
+    """(label, factory) for every backend whose model files exist"""
+    cascade = os.path.join(ROOT, DEFAULT_MODELS["cascade"][0])
+    yield "cascade", lambda: create_face_detector("cascade", cascade, roi_search=False)
+    yield "cascade+roi", lambda: create_face_detector("cascade", cascade, roi_search=True)
+    for name, model, config in (("yunet", args.yunet_model, None),
+                                ("dnn", args.dnn_model, args.dnn_config)):
+        default_model, default_config = DEFAULT_MODELS[name]
+        model = model or os.path.join(ROOT, default_model)
+        config = config or (os.path.join(ROOT, default_config) if default_config else None)
+        missing = [p for p in (model, config) if p and not os.path.exists(p)]
+        if missing:
+            print(f"{name}: skipped (model not found: {', '.join(missing)})")
+            continue
+        yield name, lambda n=name, m=model, c=config: create_face_detector(n, m, c)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frames", type=int, default=90)
+    parser.add_argument("--clip", help="video file to use instead of the synthetic clip")
+    parser.add_argument("--yunet-model")
+    parser.add_argument("--dnn-model")
+    parser.add_argument("--dnn-config")
+    args = parser.parse_args()
+
+    if args.clip:
+        clips = [read_clip(args.clip, args.frames)]
+    else:
+        clips = [make_clip(width, height, args.frames) for width, height in RESOLUTIONS]
+    factories = list(backends(args))
+    for clip in clips:
+        height, width = clip[0][0].shape[:2]
+        print(f"{width}x{height}, {len(clip)} frames")
+        for label, factory in factories:
+            per_frame, recall = run_backend(factory(), clip)
+            print(f"  {label:12s} {per_frame * 1e3:7.2f} ms/frame  recall {recall:4.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+End-to-end frame pipeline benchmark with per-stage timings.
+
+Drives the pipeline with SyntheticCamera frames at several resolutions, in
+two ways:
+
+- processor: capture, findFaceGetPulse.run (gray, detect, roi_mean,
+  spectral), overlay, JPEG encode, base64 and JSON, called directly
+- get_frame: VideoStreamManager.get_frame in thread mode on the synthetic
+  camera source, with the pipeline's own stage timer attached
+
+The face is locked after a short search, as a user would do, so every stage
+runs. Results go to a JSON file (--out). With --compare, a previous result
+file is the baseline and the exit status is 1 when a stage got slower by more
+than --threshold.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--frames N] [--out FILE]
+        [--compare BASELINE] [--threshold 0.2] [--source-fps N]
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import platform
+import sys
+import time
+
+import cv2
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+os.chdir(os.path.join(ROOT, "backend"))
+from app.config import settings  # noqa: E402
+from app.core.camera_pool import camera_pool  # noqa: E402
+from app.core.protocol import FramePacket  # noqa: E402
+from app.core.video_stream import VideoStreamManager  # noqa: E402
+from lib.device import SyntheticCamera  # noqa: E402
+from lib.processors import findFaceGetPulse  # noqa: E402
+from lib.timing import StageTimer  # noqa: E402
+
+RESOLUTIONS = [(320, 240), (640, 480), (1280, 720)]
+# Frames searched for the face before it is locked
+SEARCH_FRAMES = 15
+
+
+def latency_stats(seconds) -> dict:
+    ms = np.array(seconds) * 1000.0
+    return {
+        "mean_ms": round(float(ms.mean()), 4),
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p95_ms": round(float(np.percentile(ms, 95)), 4),
+    }
+
+
+def bench_processor(width: int, height: int, frames: int) -> dict:
+    camera = SyntheticCamera(width=width, height=height, seed=0, realtime=False)
+    processor = findFaceGetPulse(bpm_limits=[settings.BPM_MIN, settings.BPM_MAX],
+                                 data_spike_limit=settings.DATA_SPIKE_LIMIT,
+                                 detection_interval=settings.DETECTION_INTERVAL,
+                                 roi_detection=settings.ROI_DETECTION)
+    for i in range(SEARCH_FRAMES):
+        processor.frame_in = camera.get_frame()
+        processor.run(0, timestamp=i / camera.fps)
+    processor.find_faces_toggle()
+
+    timer = StageTimer(window=frames)
+    processor.timer = timer
+    totals = []
+    for i in range(frames):
+        timer.begin()
+        start = timer.last
+        ts = camera.time
+        frame = camera.get_frame()
+        timer.lap("capture")
+        processor.frame_in = frame
+        processor.run(0, timestamp=ts)
+        processor.frame_out = processor.frame_out.copy()
+        processor.render(0)
+        timer.lap("overlay")
+        _, buffer = cv2.imencode(".jpg", processor.frame_out,
+                                 [cv2.IMWRITE_JPEG_QUALITY, settings.JPEG_QUALITY])
+        jpeg = buffer.tobytes()
+        timer.lap("jpeg")
+        image = base64.b64encode(jpeg).decode("utf-8")
+        timer.lap("base64")
+        packet = FramePacket(jpeg=jpeg, bpm=processor.bpm, signal_quality=1.0,
+                             face_detected=processor.face_present, capture_ts=ts,
+                             timestamp=time.time(), fft_freqs=processor.freqs,
+                             fft_power=processor.fft,
+                             raw_signal=processor.buffer.tail(100)[1])
+        message = packet.to_dict(tier=None)
+        message["image"] = image
+        json.dumps(message)
+        timer.lap("json")
+        totals.append(timer.last - start)
+    frame_ms = latency_stats(totals)
+    return {"stages": timer.get_stats(), "frame": frame_ms,
+            "fps": round(1000.0 / frame_ms["mean_ms"], 1),
+            "jpeg_bytes": len(jpeg), "bpm": round(float(processor.bpm), 1)}
+
+
+async def bench_get_frame(width: int, height: int, frames: int) -> dict:
+    settings.SYNTHETIC_WIDTH, settings.SYNTHETIC_HEIGHT = width, height
+    manager = VideoStreamManager(execution_mode="thread")
+    await manager.start_stream(0)
+    try:
+        for _ in range(SEARCH_FRAMES):
+            await manager.get_frame(timeout=1.0)
+        await manager.toggle_face_search()
+        timer = StageTimer(window=frames)
+        manager.pipeline.set_timer(timer)
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(frames):
+            t0 = time.perf_counter()
+            packet = await manager.get_frame(timeout=1.0)
+            latencies.append(time.perf_counter() - t0)
+            if packet is None:
+                raise RuntimeError("get_frame returned no frame")
+        elapsed = time.perf_counter() - start
+    finally:
+        await manager.stop_stream()
+        camera_pool.close_all()
+    return {"stages": timer.get_stats(), "latency": latency_stats(latencies),
+            "fps": round(frames / elapsed, 1)}
+
+
+def flatten(results: dict) -> dict:
+    """{(section, resolution, stage): mean_ms}"""
+    flat = {}
+    for section in ("processor", "get_frame"):
+        for resolution, result in results.get(section, {}).items():
+            for stage, stats in result["stages"].items():
+                flat[f"{section} {resolution} {stage}"] = stats["mean_ms"]
+    return flat
+
+
+def compare(results: dict, baseline_path: str, threshold: float) -> bool:
+    """Print per-stage changes against a baseline; True when nothing regressed"""
+    with open(baseline_path) as f:
+        baseline = flatten(json.load(f))
+    ok = True
+    for key, mean in flatten(results).items():
+        if key not in baseline:
+            continue
+        before = baseline[key]
+        change = (mean - before) / before if before > 0 else 0.0
+        # Ignore sub-0.1 ms stages, whose relative noise is large
+        regressed = change > threshold and mean - before > 0.1
+        ok = ok and not regressed
+        flag = "  REGRESSION" if regressed else ""
+        print(f"  {key:40s} {before:8.3f} -> {mean:8.3f} ms ({change:+6.1%}){flag}")
+    return ok
+
+
+def print_stages(label: str, result: dict) -> None:
+    stages = ", ".join(f"{k} {v['mean_ms']:.2f}" for k, v in result["stages"].items())
+    print(f"  {label:10s} {result['fps']:6.1f} fps | {stages} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frames", type=int, default=150)
+    parser.add_argument("--out", default="bench_pipeline.json")
+    parser.add_argument("--compare", help="baseline result file")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative slowdown of a stage that counts as a regression")
+    parser.add_argument("--source-fps", type=float, default=60.0,
+                        help="synthetic camera rate for the get_frame run")
+    args = parser.parse_args()
+    out = os.path.join(ROOT, args.out) if not os.path.isabs(args.out) else args.out
+
+    settings.CAMERA_SOURCE = "synthetic"
+    settings.SYNTHETIC_FPS = args.source_fps
+    results = {
+        "meta": {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "opencv": cv2.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "frames": args.frames,
+            "source_fps": args.source_fps,
+        },
+        "processor": {},
+        "get_frame": {},
+    }
+    for width, height in RESOLUTIONS:
+        resolution = f"{width}x{height}"
+        print(resolution)
+        results["processor"][resolution] = bench_processor(width, height, args.frames)
+        print_stages("processor", results["processor"][resolution])
+        results["get_frame"][resolution] = asyncio.run(bench_get_frame(width, height, args.frames))
+        print_stages("get_frame", results["get_frame"][resolution])
+
+    with open(out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Wrote {out}")
+    if args.compare:
+        print(f"Against {args.compare}:")
+        if not compare(results, args.compare, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
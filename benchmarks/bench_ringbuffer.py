@@ -0,0 +1,61 @@
+"""
+Micro-benchmark: list-based sample buffer vs. lib.ringbuffer.RingBuffer.
+
+Replays the per-frame buffer work done by findFaceGetPulse.run: append a
+(timestamp, value) pair, keep the newest ``buffer_size`` samples and obtain
+ordered NumPy arrays for the spectral analysis.
+
+Usage:
+    python benchmarks/bench_ringbuffer.py [--frames N] [--buffer-size N]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from lib.ringbuffer import RingBuffer  # noqa: E402
+
+
+def run_lists(frames: int, buffer_size: int) -> float:
+    data_buffer, times = [], []
+    start = time.perf_counter()
+    for i in range(frames):
+        times.append(i / 30.0)
+        data_buffer.append(128.0 + np.sin(i))
+        if len(data_buffer) > buffer_size:
+            data_buffer = data_buffer[-buffer_size:]
+            times = times[-buffer_size:]
+        processed = np.array(data_buffer)
+        t = np.array(times)
+        processed.sum() + t[-1]
+    return time.perf_counter() - start
+
+
+def run_ring(frames: int, buffer_size: int) -> float:
+    buffer = RingBuffer(buffer_size)
+    start = time.perf_counter()
+    for i in range(frames):
+        buffer.append(i / 30.0, 128.0 + np.sin(i))
+        processed = buffer.values
+        t = buffer.times
+        processed.sum() + t[-1]
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frames", type=int, default=100000)
+    parser.add_argument("--buffer-size", type=int, default=250)
+    args = parser.parse_args()
+
+    for name, fn in (("list", run_lists), ("ring", run_ring)):
+        elapsed = fn(args.frames, args.buffer_size)
+        print(f"{name:>5}: {elapsed * 1e6 / args.frames:8.2f} us/frame "
+              f"({args.frames} frames, buffer {args.buffer_size})")
+
+
+if __name__ == "__main__":
+    main()
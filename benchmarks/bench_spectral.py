@@ -0,0 +1,54 @@
+"""
+Per-frame cost of the BPM-band spectral engines in lib.spectral.
+
+Feeds a steady 30 fps synthetic pulse trace through each engine, one sample per
+frame as findFaceGetPulse.run does, and reports the mean analysis time once the
+buffer is full.
+
+Usage:
+    python benchmarks/bench_spectral.py [--frames N] [--buffer-size N]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from lib.ringbuffer import RingBuffer  # noqa: E402
+from lib.spectral import SPECTRAL_ENGINES  # noqa: E402
+
+
+def run_engine(name: str, frames: int, buffer_size: int, fps: float = 30.0) -> float:
+    engine = SPECTRAL_ENGINES[name]([50, 180])
+    buffer = RingBuffer(buffer_size)
+    rng = np.random.default_rng(0)
+    elapsed = 0.0
+    timed = 0
+    for i in range(frames + buffer_size):
+        t = i / fps
+        buffer.append(t, 128.0 + np.sin(2 * np.pi * 1.2 * t) + rng.normal(0, 0.3))
+        if not buffer.full:
+            continue
+        measured_fps = len(buffer) / (buffer.times[-1] - buffer.times[0])
+        start = time.perf_counter()
+        engine.analyze(buffer, measured_fps)
+        elapsed += time.perf_counter() - start
+        timed += 1
+    return elapsed / timed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frames", type=int, default=20000)
+    parser.add_argument("--buffer-size", type=int, default=250)
+    args = parser.parse_args()
+
+    for name in SPECTRAL_ENGINES:
+        per_frame = run_engine(name, args.frames, args.buffer_size)
+        print(f"{name:>8}: {per_frame * 1e6:8.2f} us/frame (buffer {args.buffer_size})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+"""
+WebSocket load test: simulated /ws/pulse viewers against one backend.
+
+Starts the FastAPI app under uvicorn with the synthetic camera source (or
+targets a running server with --url) and, for each client count, opens that
+many /ws/pulse clients. Every client sends "start", pings at --ping-interval
+and reads frames either as fast as it can or, for the slow clients, at
+--slow-fps and/or through a link of --slow-kbps (the client sleeps for the
+time each message would take to arrive). Clients acknowledge a frame every
+--ack-interval seconds, as the frontend does, so the server can measure their
+latency. After a warm-up the face is locked
+and frames are measured for --duration seconds. Clients leave the server's
+adaptive video quality on unless --no-adaptive is given.
+
+Per client count the report has delivered fps and video fps and the mean
+JPEG size (normal and slow clients), end-to-end latency percentiles (client
+receive time minus camera capture time, in both formats), ping round trips,
+the server's frame drops and, when the harness started the server, its CPU
+use and memory. Results and the settings that produced them go to a
+JSON file (--out).
+
+Usage:
+    python benchmarks/bench_websocket.py [--clients 1,2,4,8] [--duration 10]
+        [--slow 0.25 --slow-fps 5 --slow-kbps 2000] [--ack-interval 0.25] [--no-adaptive]
+        [--format binary|json] [--mode thread|process]
+        [--url ws://host:port] [--out FILE]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Dict, List, Optional
+
+import numpy as np
+import websockets
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BACKEND = os.path.join(ROOT, "backend")
+sys.path.insert(0, BACKEND)
+from app.core.protocol import decode_binary  # noqa: E402
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+class ClientStats:
+    """What one simulated viewer saw while recording"""
+
+    def __init__(self, index: int, slow: bool):
+        self.index = index
+        self.slow = slow
+        self.recording = False
+        self.frames = 0
+        self.video_frames = 0
+        self.video_bytes = 0
+        self.latencies: List[float] = []
+        self.pings: List[float] = []
+        self.errors = 0
+
+
+class ServerProcess:
+    """uvicorn running the backend with a synthetic camera"""
+
+    def __init__(self, port: int, env: Dict[str, str]):
+        self.port = port
+        self.env = env
+        self.proc: Optional[subprocess.Popen] = None
+
+    def start(self, timeout: float = 30.0):
+        env = dict(os.environ, **self.env)
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+             "--port", str(self.port), "--log-level", "warning"],
+            cwd=BACKEND, env=env)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError(f"Server exited with code {self.proc.returncode}")
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{self.port}/api/health", timeout=1)
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise RuntimeError("Server did not come up")
+
+    def stop(self):
+        if self.proc and self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(10)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+
+    def usage(self) -> Optional[Dict[str, float]]:
+        """CPU seconds and resident MB of the server and its worker processes"""
+        if self.proc is None:
+            return None
+        if psutil is not None:
+            try:
+                procs = [psutil.Process(self.proc.pid)]
+                procs += procs[0].children(recursive=True)
+                cpu = sum(sum(p.cpu_times()[:2]) for p in procs)
+                rss = sum(p.memory_info().rss for p in procs)
+                return {"cpu_s": cpu, "rss_mb": rss / 2 ** 20}
+            except psutil.Error:
+                return None
+        return _proc_usage(self.proc.pid)
+
+
+def _proc_usage(pid: int) -> Optional[Dict[str, float]]:
+    """Linux /proc fallback when psutil is not installed"""
+    cpu = rss = 0.0
+    pids = [pid]
+    try:
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children") as f:
+                pids += [int(p) for p in f.read().split()]
+        for p in pids:
+            with open(f"/proc/{p}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            cpu += (int(fields[11]) + int(fields[12])) / CLK_TCK
+            with open(f"/proc/{p}/statm") as f:
+                rss += int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+    return {"cpu_s": cpu, "rss_mb": rss / 2 ** 20}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def get_json(url: str) -> Dict:
+    with urllib.request.urlopen(url, timeout=5) as r:
+        return json.loads(r.read())
+
+
+async def run_client(url: str, stats: ClientStats, frame_format: str, read_fps: float,
+                     kbps: float, ping_interval: float, ack_interval: float, stop: asyncio.Event,
+                     lock: Optional[asyncio.Event], adaptive: bool = True):
+    # A small receive queue lets a slow reader push back on the server
+    query = f"format={frame_format}" + ("" if adaptive else "&adaptive=false")
+    async with websockets.connect(f"{url}/ws/pulse?{query}",
+                                  max_size=None, max_queue=4) as ws:
+        await ws.send(json.dumps({"type": "start", "camera_id": 0}))
+        ping_sent = [0.0]
+
+        async def pinger():
+            while True:
+                await asyncio.sleep(ping_interval)
+                ping_sent[0] = time.perf_counter()
+                await ws.send(json.dumps({"type": "ping"}))
+
+        async def locker():
+            await lock.wait()
+            await ws.send(json.dumps({"type": "toggle_search"}))
+
+        tasks = [asyncio.create_task(pinger())]
+        if lock is not None:
+            tasks.append(asyncio.create_task(locker()))
+        next_read = time.monotonic()
+        last_ack = 0.0
+        try:
+            while not stop.is_set():
+                try:
+                    message = await asyncio.wait_for(ws.recv(), 1.0)
+                except asyncio.TimeoutError:
+                    continue
+                received = time.time()
+                received_ms = time.perf_counter() * 1000.0
+                if isinstance(message, bytes):
+                    frame = decode_binary(message)
+                    capture_ts = frame["capture_ts"]
+                    latency = received - capture_ts
+                    jpeg_bytes = len(frame["jpeg"])
+                else:
+                    data = json.loads(message)
+                    if data.get("type") == "pong":
+                        if stats.recording and ping_sent[0]:
+                            stats.pings.append(time.perf_counter() - ping_sent[0])
+                        continue
+                    if data.get("type") != "frame":
+                        continue
+                    capture_ts = data.get("capture_ts")
+                    # Older servers only sent the post-processing timestamp
+                    origin = capture_ts if capture_ts is not None else data["timestamp"]
+                    latency = received - origin
+                    jpeg_bytes = len(data.get("image") or "") * 3 // 4
+                if stats.recording:
+                    stats.frames += 1
+                    stats.video_frames += jpeg_bytes > 0
+                    stats.video_bytes += jpeg_bytes
+                    stats.latencies.append(latency)
+                if ack_interval > 0 and capture_ts is not None and received - last_ack >= ack_interval:
+                    last_ack = received
+                    await ws.send(json.dumps({"type": "ack", "capture_ts": capture_ts,
+                                              "received": received_ms,
+                                              "sent": time.perf_counter() * 1000.0}))
+                if read_fps > 0 or kbps > 0:
+                    delay = 1.0 / read_fps if read_fps > 0 else 0.0
+                    if kbps > 0:
+                        delay = max(delay, len(message) * 8 / (kbps * 1000.0))
+                    next_read = max(next_read + delay, time.monotonic())
+                    await asyncio.sleep(next_read - time.monotonic())
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+def summarize(clients: List[ClientStats], duration: float) -> Dict:
+    if not clients:
+        return {}
+    latencies = np.array([x for c in clients for x in c.latencies]) * 1000.0
+    pings = np.array([x for c in clients for x in c.pings]) * 1000.0
+    fps = np.array([c.frames / duration for c in clients])
+    result = {
+        "clients": len(clients),
+        "fps_mean": round(float(fps.mean()), 2),
+        "fps_min": round(float(fps.min()), 2),
+        "video_fps_mean": round(float(np.mean([c.video_frames / duration for c in clients])), 2),
+        "video_kb_mean": round(sum(c.video_bytes for c in clients)
+                               / max(1, sum(c.video_frames for c in clients)) / 1024.0, 1),
+        "errors": sum(c.errors for c in clients),
+    }
+    if len(latencies):
+        for p in (50, 95, 99):
+            result[f"latency_p{p}_ms"] = round(float(np.percentile(latencies, p)), 2)
+        result["latency_max_ms"] = round(float(latencies.max()), 2)
+    if len(pings):
+        result["ping_p50_ms"] = round(float(np.percentile(pings, 50)), 2)
+        result["ping_p95_ms"] = round(float(np.percentile(pings, 95)), 2)
+    return result
+
+
+async def run_step(url: str, http: str, count: int, args, server: Optional[ServerProcess]) -> Dict:
+    slow_count = int(round(count * args.slow))
+    stats = [ClientStats(i, i >= count - slow_count) for i in range(count)]
+    stop, lock = asyncio.Event(), asyncio.Event()
+    tasks = [asyncio.create_task(run_client(
+        url, s, args.format, args.slow_fps if s.slow else args.read_fps,
+        args.slow_kbps if s.slow else 0.0, args.ping_interval, args.ack_interval, stop,
+        lock if s.index == 0 else None, args.adaptive)) for s in stats]
+
+    await asyncio.sleep(args.warmup)
+    lock.set()
+    await asyncio.sleep(1.0)
+    before = server.usage() if server else None
+    server_before = get_json(f"{http}/api/v1/stream/stats")
+    for s in stats:
+        s.recording = True
+    start = time.perf_counter()
+    rss = []
+    while time.perf_counter() - start < args.duration:
+        await asyncio.sleep(0.5)
+        usage = server.usage() if server else None
+        if usage:
+            rss.append(usage["rss_mb"])
+    elapsed = time.perf_counter() - start
+    for s in stats:
+        s.recording = False
+    after = server.usage() if server else None
+    server_after = get_json(f"{http}/api/v1/stream/stats")
+
+    stop.set()
+    for task, s in zip(tasks, stats):
+        try:
+            await task
+        except Exception as e:
+            s.errors += 1
+            print(f"  client {s.index}: {e}")
+    result = {
+        "clients": count,
+        "slow_clients": slow_count,
+        "normal": summarize([s for s in stats if not s.slow], elapsed),
+        "slow": summarize([s for s in stats if s.slow], elapsed),
+        "server_analysis_fps": server_after.get("analysis_fps"),
+        "server_frames": server_after.get("broadcast_frames", 0) - server_before.get("broadcast_frames", 0),
+        "server_drops": sum(v.get("dropped", 0) for v in server_after.get("viewers", [])),
+    }
+    if before and after:
+        result["server_cpu_pct"] = round(100.0 * (after["cpu_s"] - before["cpu_s"]) / elapsed, 1)
+        result["server_rss_mb"] = round(max(rss or [after["rss_mb"]]), 1)
+    # Let the stream stop before the next step
+    await asyncio.sleep(1.5)
+    return result
+
+
+def print_step(result: Dict) -> None:
+    normal = result["normal"]
+    line = (f"{result['clients']:4d} clients: {normal['fps_mean']:6.2f} fps/client, "
+            f"latency p50 {normal.get('latency_p50_ms', 0):7.2f} p95 {normal.get('latency_p95_ms', 0):7.2f} "
+            f"p99 {normal.get('latency_p99_ms', 0):7.2f} ms")
+    if result["slow"]:
+        slow = result["slow"]
+        line += (f" | slow x{result['slow_clients']}: {slow['fps_mean']:5.2f} fps, "
+                 f"video {slow['video_fps_mean']:5.2f} fps {slow['video_kb_mean']:5.1f} kB, "
+                 f"p95 {slow.get('latency_p95_ms', 0):7.2f} ms")
+    if "server_cpu_pct" in result:
+        line += f" | cpu {result['server_cpu_pct']:5.1f}% rss {result['server_rss_mb']:6.1f} MB"
+    line += f" | drops {result['server_drops']}"
+    print(line)
+
+
+async def run(args, url: str, server: Optional[ServerProcess]) -> List[Dict]:
+    http = url.replace("ws://", "http://").replace("wss://", "https://")
+    results = []
+    for count in args.clients:
+        result = await run_step(url, http, count, args, server)
+        print_step(result)
+        results.append(result)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", default="1,2,4,8",
+                        type=lambda v: [int(x) for x in v.split(",") if x.strip()],
+                        help="comma-separated client counts, one step each")
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds per step")
+    parser.add_argument("--warmup", type=float, default=3.0,
+                        help="seconds before the face is locked")
+    parser.add_argument("--format", default="binary", choices=["binary", "json"])
+    parser.add_argument("--read-fps", type=float, default=0.0,
+                        help="read rate of normal clients (0: as fast as possible)")
+    parser.add_argument("--slow", type=float, default=0.0,
+                        help="fraction of clients that read at --slow-fps")
+    parser.add_argument("--slow-fps", type=float, default=5.0,
+                        help="read rate of slow clients (0: limited by --slow-kbps only)")
+    parser.add_argument("--slow-kbps", type=float, default=0.0,
+                        help="emulated link rate of slow clients in kbit/s (0: unlimited)")
+    parser.add_argument("--no-adaptive", dest="adaptive", action="store_false",
+                        help="ask the server for fixed video quality")
+    parser.add_argument("--ping-interval", type=float, default=1.0)
+    parser.add_argument("--ack-interval", type=float, default=0.25,
+                        help="seconds between frame acknowledgements (0: never ack)")
+    parser.add_argument("--mode", default="thread", choices=["thread", "process"],
+                        help="EXECUTION_MODE of the started server")
+    parser.add_argument("--fps", type=int, default=30, help="TARGET_FPS of the started server")
+    parser.add_argument("--url", help="test a running server (ws://host:port) instead")
+    parser.add_argument("--out", default="bench_websocket.json")
+    args = parser.parse_args()
+    out = os.path.join(ROOT, args.out) if not os.path.isabs(args.out) else args.out
+
+    server_env = {
+        "CAMERA_SOURCE": "synthetic",
+        "EXECUTION_MODE": args.mode,
+        "TARGET_FPS": str(args.fps),
+        "SYNTHETIC_FPS": str(args.fps),
+        "LOG_LEVEL": "warning",
+    }
+    server = None
+    url = args.url
+    if url is None:
+        server = ServerProcess(free_port(), server_env)
+        server.start()
+        url = f"ws://127.0.0.1:{server.port}"
+    try:
+        steps = asyncio.run(run(args, url, server))
+    finally:
+        if server:
+            server.stop()
+
+    results = {
+        "meta": {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "websockets": websockets.__version__,
+            "url": args.url,
+            "server_env": server_env if server else None,
+            "args": {k: v for k, v in vars(args).items() if k not in ("url", "out")},
+        },
+        "steps": steps,
+    }
+    with open(out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Wrote {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+WebSocket frame message cost: base64-in-JSON vs. the binary format.
+
+Builds frame packets like VideoStreamManager does (640x480 JPEG, decimated
+spectrum, last 100 signal samples) and reports, per format, the message size,
+the resulting bandwidth at the target frame rate, the server CPU time to
+serialize one frame and the client-side time to parse it back.
+
+Usage:
+    python benchmarks/bench_ws_protocol.py [--frames N] [--fps N] [--quality N]
+"""
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+from app.core.protocol import FORMAT_BINARY, FORMAT_JSON, FramePacket, decode_binary  # noqa: E402
+from lib.device import draw_face  # noqa: E402
+
+
+def make_packets(count: int, quality: int):
+    rng = np.random.default_rng(0)
+    freqs = np.linspace(50, 180, 100)
+    packets = []
+    for i in range(count):
+        img = np.full((480, 640, 3), (90, 100, 90), np.uint8)
+        draw_face(img, 320 + int(20 * np.sin(i / 10.0)), 240, 200)
+        img = np.clip(img + rng.normal(0, 4, img.shape), 0, 255).astype(np.uint8)
+        _, jpeg = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        packets.append(FramePacket(
+            jpeg=jpeg.tobytes(),
+            bpm=72.4,
+            signal_quality=0.9,
+            face_detected=True,
+            capture_ts=time.time(),
+            timestamp=time.time(),
+            fft_freqs=freqs,
+            fft_power=rng.random(100),
+            raw_signal=128.0 + rng.normal(0, 1, 100),
+        ))
+    return packets
+
+
+def parse_json(message: str) -> None:
+    data = json.loads(message)
+    base64.b64decode(data["image"])
+
+
+def time_format(packets, fmt: str) -> tuple:
+    # Fresh packets every run so the per-format cache never short-circuits
+    start = time.perf_counter()
+    messages = [p.encode(fmt) for p in packets]
+    encode = (time.perf_counter() - start) / len(packets)
+
+    parse = parse_json if fmt == FORMAT_JSON else decode_binary
+    start = time.perf_counter()
+    for message in messages:
+        parse(message)
+    decode = (time.perf_counter() - start) / len(packets)
+
+    size = sum(len(m) for m in messages) / len(messages)
+    return size, encode, decode
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--quality", type=int, default=80)
+    args = parser.parse_args()
+
+    results = {}
+    for fmt in (FORMAT_JSON, FORMAT_BINARY):
+        results[fmt] = time_format(make_packets(args.frames, args.quality), fmt)
+        size, encode, decode = results[fmt]
+        print(f"{fmt:>6}: {size / 1024:7.1f} KiB/frame, "
+              f"{size * args.fps / 1024 / 1024:6.2f} MiB/s at {args.fps:g} fps, "
+              f"encode {encode * 1e6:7.1f} us/frame, decode {decode * 1e6:7.1f} us/frame")
+    json_size, json_encode, _ = results[FORMAT_JSON]
+    bin_size, bin_encode, _ = results[FORMAT_BINARY]
+    print(f"binary: {1 - bin_size / json_size:.0%} fewer bytes, "
+          f"{json_encode / bin_encode:.1f}x less server encode time")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,5 +5,12 @@ import os
 # This allows tests in the 'tests/' directory to import modules from 'lib/'
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__)))
 sys.path.insert(0, project_root)
+# Backend tests import the FastAPI app package (`app.*`); appended so that
+# `lib` keeps resolving to the project's lib/
+sys.path.append(os.path.join(project_root, "backend"))
+
+# A manual import check, not a test; importing it would make `lib` resolve
+# to backend/lib for the rest of the session
+collect_ignore = [os.path.join("backend", "test_syntax.py")]
 
 # You can also define project-wide fixtures here if needed in the future
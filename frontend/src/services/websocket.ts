@@ -4,6 +4,8 @@
 import type { FrameData, WebSocketMessage } from '@/types';
 
 const WS_BASE_URL = import.meta.env.VITE_WS_URL || 'ws://localhost:8000';
+// Minimum interval between latency acknowledgements (ms)
+const ACK_INTERVAL = 250;
 
 type MessageHandler = (data: FrameData) => void;
 type ErrorHandler = (error: string) => void;
@@ -18,6 +20,7 @@ class WebSocketService {
   private errorHandlers: Set<ErrorHandler> = new Set();
   private statusHandlers: Set<StatusHandler> = new Set();
   private isManualClose = false;
+  private lastAck = 0;
 
   connect(): Promise<void> {
     return new Promise((resolve, reject) => {
@@ -37,8 +40,9 @@ class WebSocketService {
 
         this.ws.onmessage = (event) => {
           try {
+            const received = performance.now();
             const message: WebSocketMessage = JSON.parse(event.data);
-            this.handleMessage(message);
+            this.handleMessage(message, received);
           } catch (error) {
             console.error('Error parsing WebSocket message:', error);
           }
@@ -117,12 +121,13 @@ class WebSocketService {
     });
   }
 
-  private handleMessage(message: WebSocketMessage) {
+  private handleMessage(message: WebSocketMessage, received: number) {
     switch (message.type) {
       case 'frame':
         this.messageHandlers.forEach((handler) => {
           handler(message as unknown as FrameData);
         });
+        this.acknowledge(message as unknown as FrameData, received);
         break;
       case 'error':
         this.notifyError(message.message || 'Unknown error');
@@ -133,11 +138,40 @@ class WebSocketService {
       case 'pong':
         // Handle ping response
         break;
+      case 'quality':
+        // The server stepped the video quality for this link; images carry
+        // their own size, so the view scales them as before
+        break;
       default:
         console.log('Unknown message type:', message.type);
     }
   }
 
+  /**
+   * Report receive and render times of a frame so the server can measure
+   * capture-to-screen latency (at most every ACK_INTERVAL ms)
+   */
+  private acknowledge(frame: FrameData, received: number) {
+    if (frame.capture_ts === undefined || received - this.lastAck < ACK_INTERVAL) {
+      return;
+    }
+    this.lastAck = received;
+    // The frame is on screen by the next animation frame after the handlers ran
+    requestAnimationFrame(() => {
+      if (!this.isConnected()) {
+        return;
+      }
+      const rendered = performance.now();
+      this.send({
+        type: 'ack',
+        capture_ts: frame.capture_ts,
+        received,
+        rendered,
+        sent: performance.now(),
+      });
+    });
+  }
+
   private notifyError(error: string) {
     this.errorHandlers.forEach((handler) => {
       handler(error);
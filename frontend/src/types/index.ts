@@ -27,6 +27,7 @@ export interface FrameData {
   fft_data: FFTData | null;
   raw_signal: number[] | null;
   timestamp: number;
+  capture_ts?: number;
   face_detected: boolean;
   signal_quality: number;
 }
@@ -52,6 +53,7 @@ export interface WebSocketMessage {
   type: string;
   data?: any;
   message?: string;
+  [key: string]: any;
 }
 
 export interface PulseState {
@@ -1,6 +1,7 @@
-from lib.device import Camera
+from lib.device import Camera, open_camera
 from lib.processors import findFaceGetPulse # Updated import
 from lib.interface import plotXY, imshow, waitKey, destroyWindow
+from lib.tracing import SpanRing, SpanTimer
 from cv2 import moveWindow
 import argparse
 import numpy as np
@@ -8,6 +9,7 @@ import datetime
 # Serial port code removed
 import socket
 import sys
+import time
 from typing import Dict, List, Tuple, Optional, Any, Callable, Union
 
 class getPulseApp:
@@ -40,9 +42,13 @@ class getPulseApp:
                                      socket.SOCK_DGRAM)  # UDP
 
         # Initialize cameras
-        self.cameras: List[Camera] = []
+        self.cameras: List[Any] = []
         self.selected_cam = 0
-        for i in range(3):
+        if args.source != "device":
+            # Generated frames or a looping video file instead of a webcam
+            options = {"bpm": args.bpm} if args.source == "synthetic" else {}
+            self.cameras.append(open_camera(0, args.source, args.file, **options))
+        for i in range(3 if args.source == "device" else 0):
             camera = Camera(camera=i)  # first camera by default
             if camera.valid or not len(self.cameras):
                 self.cameras.append(camera)
@@ -60,6 +66,16 @@ class getPulseApp:
                                          data_spike_limit=2500.,
                                          face_detector_smoothness=10.)
 
+        # Per-frame stage spans for --trace, written as Chrome trace JSON on exit
+        self.trace_path = args.trace
+        self.spans: Optional[SpanRing] = None
+        self.timer: Optional[SpanTimer] = None
+        self.frame_count = 0
+        if args.trace:
+            self.spans = SpanRing(args.trace_spans)
+            self.timer = SpanTimer(self.spans, "main loop")
+            self.processor.timer = self.timer
+
         # Init parameters for the cardiac data plot
         self.bpm_plot = False
         self.plot_title = "Data display - raw signal (top) and PSD (bottom)"
@@ -94,6 +110,14 @@ class getPulseApp:
         np.savetxt(f"{fn}.csv", data, delimiter=',')
         print("Writing csv")
 
+    def save_trace(self) -> None:
+        """
+        Writes the recorded spans to the --trace file.
+        """
+        if self.spans is not None:
+            count = self.spans.dump(self.trace_path)
+            print(f"Wrote {count} trace spans to {self.trace_path}")
+
     def toggle_search(self) -> None:
         """
         Toggles a motion lock on the processor's face detection component.
@@ -148,7 +172,7 @@ class getPulseApp:
         if self.pressed == 27:  # exit program on 'esc'
             print("Exiting")
             for cam in self.cameras:
-                cam.cam.release()
+                cam.release()
             # Serial port code removed
             sys.exit()
 
@@ -160,16 +184,24 @@ class getPulseApp:
         """
         Single iteration of the application's main loop.
         """
+        timer = self.timer
+        if timer is not None:
+            timer.begin()
+            frame_start = timer.last
         # Get current image frame from the camera
         frame = self.cameras[self.selected_cam].get_frame()
         self.h, self.w, _c = frame.shape
+        if timer is not None:
+            timer.lap("capture")
 
         # Set current image frame to the processor's input
         self.processor.frame_in = frame
         # Process the image frame to perform all needed analysis
         self.processor.run(self.selected_cam)
-        # Collect the output frame for display
-        output_frame = self.processor.frame_out
+        # Draw the status overlay and collect the output frame for display
+        output_frame = self.processor.render(self.selected_cam)
+        if timer is not None:
+            timer.lap("overlay")
 
         # Show the processed/annotated output frame
         imshow("Processed", output_frame)
@@ -179,6 +211,8 @@ class getPulseApp:
         # Create and/or update the raw data display if needed
         if self.bpm_plot:
             self.make_bpm_plot()
+        if timer is not None:
+            timer.lap("display")
 
         # Serial port code removed
 
@@ -188,14 +222,34 @@ class getPulseApp:
 
         # Handle any key presses
         self.key_handler()
+        if timer is not None:
+            timer.lap("keys")
+            self.frame_count += 1
+            self.spans.add("frame", frame_start, time.perf_counter(), "main loop",
+                           frame=self.frame_count, camera=self.selected_cam)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Webcam pulse detector.')
     # Serial port arguments removed
     parser.add_argument('--udp', default=None,
                        help='udp address:port destination for bpm data')
+    parser.add_argument('--source', default='device',
+                       choices=['device', 'synthetic', 'file'],
+                       help='frame source: webcams, a generated face or a video file')
+    parser.add_argument('--file', default=None,
+                       help='video file for --source file (played in a loop)')
+    parser.add_argument('--bpm', type=float, default=72.0,
+                       help='pulse rate of the generated face for --source synthetic')
+    parser.add_argument('--trace', default=None,
+                       help='record per-frame stage spans and write them to this '
+                            'file as Chrome trace JSON on exit')
+    parser.add_argument('--trace-spans', type=int, default=20000,
+                       help='most recent spans kept for --trace')
 
     args = parser.parse_args()
     App = getPulseApp(args)
-    while True:
-        App.main_loop()
+    try:
+        while True:
+            App.main_loop()
+    finally:
+        App.save_trace()
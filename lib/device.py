@@ -1,7 +1,7 @@
 import cv2
 import time
 import numpy as np
-from typing import Tuple, Optional, Any, Union
+from typing import Any, Callable, Optional, Tuple, Union
 
 # TODO: fix ipcam
 # In Python 3, urllib2 is replaced by urllib.request
@@ -104,3 +104,202 @@ class Camera:
                 self.cam.release()
         except Exception:
             pass
+
+
+def draw_face(img: np.ndarray, cx: int, cy: int, size: int,
+              skin: Tuple[int, int, int] = (150, 170, 205)) -> None:
+    """
+    Draw a cartoon face of width `size` centred on (cx, cy).
+
+    The frontal-face Haar cascade detects it once the image is slightly
+    blurred, which makes it usable as a stand-in subject.
+
+    Args:
+        img: BGR image drawn into
+        cx, cy: Face centre
+        size: Face width in pixels
+        skin: BGR skin colour
+    """
+    s = size
+    cv2.ellipse(img, (cx, cy), (int(s * 0.5), int(s * 0.65)), 0, 0, 360, skin, -1)
+    for side in (-1, 1):
+        cv2.ellipse(img, (cx + int(side * s * 0.2), cy - int(s * 0.12)),
+                    (int(s * 0.1), int(s * 0.05)), 0, 0, 360, (40, 40, 50), -1)
+        cv2.line(img, (cx + int(side * s * 0.1), cy - int(s * 0.24)),
+                 (cx + int(side * s * 0.3), cy - int(s * 0.24)), (60, 60, 70), max(1, int(s * 0.03)))
+    cv2.ellipse(img, (cx, cy + int(s * 0.1)), (int(s * 0.05), int(s * 0.12)), 0, 0, 360, (120, 140, 180), -1)
+    cv2.ellipse(img, (cx, cy + int(s * 0.32)), (int(s * 0.16), int(s * 0.05)), 0, 0, 360, (70, 70, 130), -1)
+
+
+class _FramePacer:
+    """Sleep until absolute frame deadlines so a source delivers `fps` frames per second"""
+
+    def __init__(self, fps: float):
+        self.period = 1.0 / fps if fps and fps > 0 else 0.0
+        self.deadline: Optional[float] = None
+
+    def wait(self) -> None:
+        if not self.period:
+            return
+        now = time.monotonic()
+        if self.deadline is None or now - self.deadline > self.period:
+            self.deadline = now
+        elif self.deadline > now:
+            time.sleep(self.deadline - now)
+        self.deadline += self.period
+
+
+class SyntheticCamera:
+    """
+    Camera stand-in that renders a face with a programmable pulse.
+
+    The skin brightness follows `waveform(t)` (in [-1, 1], default a sine at
+    `bpm`) scaled by `amplitude`, on top of Gaussian sensor noise and a slow
+    drifting head motion. Frame content depends only on the frame index and
+    `seed`, so runs are reproducible; `realtime` paces get_frame() at `fps`
+    like a physical camera.
+    """
+
+    def __init__(self, camera: int = 0, width: int = 640, height: int = 480,
+                 fps: float = 30.0, bpm: float = 72.0, amplitude: float = 3.0,
+                 noise: float = 2.0, motion: float = 20.0,
+                 waveform: Optional[Callable[[float], float]] = None,
+                 seed: Optional[int] = None, realtime: bool = True):
+        """
+        Initialize the generator.
+
+        Args:
+            camera: Camera index (seeds the noise when `seed` is not given)
+            width, height: Frame size
+            fps: Frame rate (sets the time step between frames)
+            bpm: Pulse rate of the default waveform
+            amplitude: Pulse amplitude in grey levels
+            noise: Standard deviation of the sensor noise in grey levels
+            motion: Horizontal head sway amplitude in pixels
+            waveform: Pulse shape as a function of time (s), overriding `bpm`
+            seed: Noise seed
+            realtime: Pace get_frame() at `fps`
+        """
+        self.width, self.height = int(width), int(height)
+        self.fps = float(fps)
+        self.bpm = float(bpm)
+        self.amplitude = float(amplitude)
+        self.motion = float(motion)
+        self.waveform = waveform or (lambda t: float(np.sin(2 * np.pi * self.bpm / 60.0 * t)))
+        self.pacer = _FramePacer(self.fps if realtime else 0.0)
+        self.index = 0
+        self.valid = True
+        self.shape = (self.height, self.width, 3)
+        # A few noise fields reused in turn; generating one per frame costs more than the rest
+        rng = np.random.default_rng(camera if seed is None else seed)
+        self._noise = [rng.normal(0, noise, self.shape).astype(np.float32) for _ in range(8)] if noise > 0 else None
+        self._background = np.full(self.shape, (90, 100, 90), np.uint8)
+
+    @property
+    def time(self) -> float:
+        """Timestamp (s) of the next frame"""
+        return self.index / self.fps if self.fps > 0 else 0.0
+
+    def get_frame(self) -> np.ndarray:
+        """
+        Render the next frame.
+
+        Returns:
+            np.ndarray: BGR frame
+        """
+        self.pacer.wait()
+        t = self.time
+        frame = self._background.copy()
+        cx = self.width // 2 + int(self.motion * np.sin(2 * np.pi * 0.1 * t))
+        draw_face(frame, cx, self.height // 2, int(self.height * 0.42))
+        frame = cv2.GaussianBlur(frame, (5, 5), 0)
+        out = frame.astype(np.float32)
+        out += self.amplitude * self.waveform(t)
+        if self._noise is not None:
+            out += self._noise[self.index % len(self._noise)]
+        frame = np.clip(out, 0, 255).astype(np.uint8)
+        self.index += 1
+        return frame
+
+    def release(self) -> None:
+        self.valid = False
+
+
+class VideoFileCamera:
+    """
+    Camera stand-in that plays a video file, looping at the end.
+    """
+
+    def __init__(self, path: str, loop: bool = True, realtime: bool = True):
+        """
+        Open the file.
+
+        Args:
+            path: Video file
+            loop: Start over at the end of the file
+            realtime: Pace get_frame() at the file's frame rate
+        """
+        self.path = path
+        self.loop = loop
+        self.cam = cv2.VideoCapture(path)
+        self.fps = self.cam.get(cv2.CAP_PROP_FPS) or 30.0
+        self.pacer = _FramePacer(self.fps if realtime else 0.0)
+        self.valid = False
+        self.shape = None
+        if self.cam.isOpened():
+            ret, frame = self.cam.read()
+            if ret and frame is not None:
+                self.shape = frame.shape
+                self.valid = True
+                self.cam.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    def get_frame(self) -> np.ndarray:
+        """
+        Get the next frame of the file.
+
+        Returns:
+            np.ndarray: The frame, or an error message frame when the file cannot be read
+        """
+        self.pacer.wait()
+        if self.valid:
+            ret, frame = self.cam.read()
+            if (not ret or frame is None) and self.loop:
+                self.cam.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ret, frame = self.cam.read()
+            if ret and frame is not None:
+                return frame
+        frame = np.ones((480, 640, 3), dtype=np.uint8)
+        cv2.putText(frame, "(Error: Video file not readable)",
+                    (65, 220), cv2.FONT_HERSHEY_PLAIN, 2, (0, 255, 255))
+        return frame
+
+    def release(self) -> None:
+        self.cam.release()
+
+
+CAMERA_SOURCES = ("device", "synthetic", "file")
+
+
+def open_camera(camera: int = 0, source: str = "device", path: Optional[str] = None,
+                **options: Any) -> Union[Camera, SyntheticCamera, VideoFileCamera]:
+    """
+    Open a frame source by name.
+
+    Args:
+        camera: Camera index
+        source: One of CAMERA_SOURCES ("device", "synthetic" or "file")
+        path: Video file for the "file" source
+        **options: SyntheticCamera / VideoFileCamera keyword arguments
+
+    Returns:
+        Object with get_frame(), release() and a `valid` flag
+    """
+    if source == "device":
+        return Camera(camera=camera)
+    if source == "synthetic":
+        return SyntheticCamera(camera=camera, **options)
+    if source == "file":
+        if not path:
+            raise ValueError("The file camera source needs a video path")
+        return VideoFileCamera(path, **options)
+    raise ValueError(f"Unknown camera source: {source!r} (expected one of {list(CAMERA_SOURCES)})")
@@ -4,7 +4,20 @@ import cv2
 import pylab
 import os
 import sys
-from typing import List, Tuple, Optional, Union, Any
+from typing import List, NamedTuple, Tuple, Optional, Union, Any
+
+try:
+    from .ringbuffer import RingBuffer
+    from .spectral import create_spectral_engine
+    from .tracking import DetectionScheduler, TemplateTracker
+    from .detectors import DEFAULT_MODELS, create_face_detector
+    from .timing import StageTimer
+except ImportError:
+    from ringbuffer import RingBuffer
+    from spectral import create_spectral_engine
+    from tracking import DetectionScheduler, TemplateTracker
+    from detectors import DEFAULT_MODELS, create_face_detector
+    from timing import StageTimer
 
 
 def resource_path(relative_path: str) -> str:
@@ -18,10 +31,41 @@ def resource_path(relative_path: str) -> str:
     return os.path.join(base_path, relative_path)
 
 
+def draw_text_with_outline(img, text, pos, font, scale, text_color, outline_color, text_thickness=1, outline_thickness=3, line_type=cv2.LINE_AA):
+    """ Draw text with a contrasting outline """
+    x, y = pos
+    # Draw outline by drawing text multiple times with offset
+    cv2.putText(img, text, (x - 1, y - 1), font, scale, outline_color, outline_thickness, line_type)
+    cv2.putText(img, text, (x + 1, y - 1), font, scale, outline_color, outline_thickness, line_type)
+    cv2.putText(img, text, (x - 1, y + 1), font, scale, outline_color, outline_thickness, line_type)
+    cv2.putText(img, text, (x + 1, y + 1), font, scale, outline_color, outline_thickness, line_type)
+    # Draw the main text on top
+    cv2.putText(img, text, (x, y), font, scale, text_color, text_thickness, line_type)
+
+
+class PulseResult(NamedTuple):
+    """ Per-frame analysis output of findFaceGetPulse.run """
+    face_rect: List[int]
+    forehead_rect: List[int]
+    face_present: bool
+    sample: Optional[float]
+    bpm: float
+    freqs: np.ndarray
+    power: np.ndarray
+
+
 class findFaceGetPulse:
 
     def __init__(self, bpm_limits: List[int] = None, data_spike_limit: float = 250,
-                 face_detector_smoothness: float = 10):
+                 face_detector_smoothness: float = 10,
+                 spectral_engine: str = "fft",
+                 detection_interval: int = 1,
+                 tracking_confidence: float = 0.6,
+                 roi_detection: bool = False,
+                 roi_max_misses: int = 3,
+                 detector_backend: str = "cascade",
+                 detector_model: Optional[str] = None,
+                 detector_config: Optional[str] = None):
         if bpm_limits is None:
             bpm_limits = []
         
@@ -36,22 +80,32 @@ class findFaceGetPulse:
         self.fps = 0
         self.buffer_size = 250
         #self.window = np.hamming(self.buffer_size)
-        self.data_buffer: List[float] = []
-        self.times: List[float] = []
+        # Preallocated sample store; data_buffer/times are views into it
+        self.buffer = RingBuffer(self.buffer_size)
         self.ttimes: List[float] = []
-        self.samples: List[float] = []
+        self.samples: np.ndarray = np.array([])
         self.freqs: np.ndarray = np.array([])
         self.fft: np.ndarray = np.array([])
         self.slices: List[List[Any]] = [[0]]
         self.t0 = time.time()
         self.bpms: List[float] = []
         self.bpm = 0
-        dpath = resource_path("haarcascade_frontalface_alt.xml")
-        if not os.path.exists(dpath):
+        # "cascade", "yunet" or "dnn"; models default to files next to the app
+        default_model, default_config = DEFAULT_MODELS.get(detector_backend, (None, None))
+        dpath = detector_model or resource_path(default_model or "")
+        if detector_config is None and default_config:
+            detector_config = resource_path(default_config)
+        if detector_backend == "cascade" and not os.path.exists(dpath):
             print("Cascade file not present!")
-        self.face_cascade = cv2.CascadeClassifier(dpath)
+        # Loaded on first detection and shared by processors on the same thread
+        self.face_detector = create_face_detector(detector_backend, dpath, detector_config,
+                                                  roi_search=roi_detection,
+                                                  max_misses=roi_max_misses)
 
         self.face_rect = [1, 1, 2, 2]
+        self.forehead_rect = [1, 1, 2, 2]
+        self.result: Optional[PulseResult] = None
+        self.blend: Optional[float] = None
         self.last_center = np.array([0, 0])
         self.last_wh = np.array([0, 0])
         self.output_dim = 13
@@ -65,6 +119,25 @@ class findFaceGetPulse:
         self.last_face_ts = 0.0
         # BPM smoothing
         self.bpm_ema = None
+        # Band-limited spectrum estimator ("fft" or "sliding")
+        self.spectral_engine = create_spectral_engine(spectral_engine, self.bpm_limits)
+        # Run the cascade every N frames and track the face in between
+        self.scheduler = DetectionScheduler(detection_interval, tracking_confidence)
+        self.tracker = TemplateTracker()
+        # Optional per-stage timings (see lib/timing.py); None costs nothing
+        self.timer: Optional[StageTimer] = None
+
+    @property
+    def face_cascade(self) -> Optional["cv2.CascadeClassifier"]:
+        return getattr(self.face_detector, "cascade", None)
+
+    @property
+    def data_buffer(self) -> np.ndarray:
+        return self.buffer.values
+
+    @property
+    def times(self) -> np.ndarray:
+        return self.buffer.times
 
     def find_faces_toggle(self) -> bool:
         self.find_faces = not self.find_faces
@@ -73,6 +146,32 @@ class findFaceGetPulse:
     def get_faces(self) -> None:
         return
 
+    def detect_faces(self) -> List[Any]:
+        """
+        Face rectangles for the current frame.
+
+        Runs the face detector when the scheduler asks for it and otherwise
+        reuses the tracker's estimate, as long as its confidence holds.
+        """
+        if not self.scheduler.due():
+            rect, confidence = self.tracker.update(self.gray)
+            self.scheduler.tracked(confidence)
+            if rect is not None and confidence >= self.scheduler.min_confidence:
+                return [rect]
+
+        if self.tracker.rect is not None and self.face_detector.last_rect is not None:
+            # The tracker knows where the face moved since the last detection
+            self.face_detector.last_rect = self.tracker.rect
+        detected = self.face_detector.detect(self.gray, self.frame_in)
+        self.scheduler.detected(len(detected) > 0)
+        if self.scheduler.interval > 1:
+            if detected:
+                detected.sort(key=lambda a: a[-1] * a[-2])
+                self.tracker.init(self.gray, detected[-1])
+            else:
+                self.tracker.reset()
+        return detected
+
     def shift(self, detected: List[int]) -> float:
         x, y, w, h = detected
         center = np.array([x + 0.5 * w, y + 0.5 * h])
@@ -118,7 +217,7 @@ class findFaceGetPulse:
         subframe = self.frame_in[y:y + h, x:x + w, :]
         if subframe.size == 0:
             # Fallback to previous value if available; else 0.0
-            return float(self.data_buffer[-1]) if len(self.data_buffer) > 0 else 0.0
+            return self.buffer.last()[1] if self.buffer.count > 0 else 0.0
         v1 = np.mean(subframe[:, :, 0])
         v2 = np.mean(subframe[:, :, 1])
         v3 = np.mean(subframe[:, :, 2])
@@ -154,47 +253,39 @@ class findFaceGetPulse:
         pylab.savefig("data_fft.png")
         quit()
 
-    def run(self, cam: int) -> None:
-        self.times.append(time.time() - self.t0)
+    def run(self, cam: int, timestamp: Optional[float] = None) -> PulseResult:
+        """
+        Analyse the current input frame.
+
+        Face search/tracking, forehead sampling and spectral estimation only;
+        nothing is drawn. Call render() afterwards for an annotated frame_out.
+
+        Args:
+            cam: Index of the camera the frame came from
+            timestamp: Capture time of the frame in seconds (e.g. a video
+                       file's position); defaults to the wall clock
+
+        Returns:
+            Analysis result for this frame
+
+        With a timer attached, call timer.begin() before run(); the gray,
+        detect, roi_mean and spectral stages are recorded as laps.
+        """
+        timer = self.timer
+        now = time.time() - self.t0 if timestamp is None else float(timestamp)
         self.frame_out = self.frame_in
+        self.blend = None
         self.gray = cv2.equalizeHist(cv2.cvtColor(self.frame_in,
                                                   cv2.COLOR_BGR2GRAY))
-
-        # Helper function to draw text with outline
-        def draw_text_with_outline(img, text, pos, font, scale, text_color, outline_color, text_thickness=1, outline_thickness=3, line_type=cv2.LINE_AA):
-            x, y = pos
-            # Draw outline by drawing text multiple times with offset
-            cv2.putText(img, text, (x - 1, y - 1), font, scale, outline_color, outline_thickness, line_type)
-            cv2.putText(img, text, (x + 1, y - 1), font, scale, outline_color, outline_thickness, line_type)
-            cv2.putText(img, text, (x - 1, y + 1), font, scale, outline_color, outline_thickness, line_type)
-            cv2.putText(img, text, (x + 1, y + 1), font, scale, outline_color, outline_thickness, line_type)
-            # Draw the main text on top
-            cv2.putText(img, text, (x, y), font, scale, text_color, text_thickness, line_type)
-
-        text_color = (255, 255, 255) # White
-        outline_color = (0, 0, 0) # Black
-        font = cv2.FONT_HERSHEY_SIMPLEX # Changed font for better scaling
-        font_scale_controls = 0.6 # Increased scale
-        font_scale_status = 0.8 # Larger scale for status
-        text_thickness = 1
-        outline_thickness = 2 # Outline thickness
+        if timer is not None:
+            timer.lap("gray")
 
         if self.find_faces:
-            draw_text_with_outline(
-                self.frame_out, f"Press 'C' to change camera (current: {cam})",
-                (10, 30), font, font_scale_controls, text_color, outline_color, text_thickness, outline_thickness)
-            draw_text_with_outline(
-                self.frame_out, "Press 'S' to lock face and begin",
-                       (10, 55), font, font_scale_controls, text_color, outline_color, text_thickness, outline_thickness)
-            draw_text_with_outline(self.frame_out, "Press 'Esc' to quit",
-                       (10, 80), font, font_scale_controls, text_color, outline_color, text_thickness, outline_thickness)
-            self.data_buffer, self.times, self.trained = [], [], False
-            detected = list(self.face_cascade.detectMultiScale(self.gray,
-                                                               scaleFactor=1.3,
-                                                               minNeighbors=4,
-                                                               minSize=(
-                                                                   50, 50),
-                                                               flags=cv2.CASCADE_SCALE_IMAGE))
+            self.buffer.clear()
+            self.trained = False
+            detected = self.detect_faces()
+            if timer is not None:
+                timer.lap("detect")
 
             if len(detected) > 0:
                 detected.sort(key=lambda a: a[-1] * a[-2])
@@ -213,68 +304,40 @@ class findFaceGetPulse:
             else:
                 # No face detected in this frame
                 self.face_present = False
-            forehead1 = self.get_subface_coord(0.5, 0.18, 0.25, 0.15)
-            self.draw_rect(self.face_rect, col=(255, 0, 0)) # Keep face rect blue
-            x, y, w, h = self.face_rect
-            self.draw_rect(forehead1) # Keep forehead rect green (default)
-            x, y, w, h = forehead1
-            return
+            self.forehead_rect = self.get_subface_coord(0.5, 0.18, 0.25, 0.15)
+            return self._result(None)
         if set(self.face_rect) == set([1, 1, 2, 2]):
-            return
-
-        # Draw controls text when face is locked
-        draw_text_with_outline(
-            self.frame_out, f"Press 'C' to change camera (current: {cam})",
-            (10, 30), font, font_scale_controls, text_color, outline_color, text_thickness, outline_thickness)
-        draw_text_with_outline(
-            self.frame_out, "Press 'S' to restart",
-                   (10, 55), font, font_scale_controls, text_color, outline_color, text_thickness, outline_thickness)
-        draw_text_with_outline(self.frame_out, "Press 'D' to toggle data plot",
-                   (10, 80), font, font_scale_controls, text_color, outline_color, text_thickness, outline_thickness)
-        draw_text_with_outline(self.frame_out, "Press 'Esc' to quit",
-                   (10, 105), font, font_scale_controls, text_color, outline_color, text_thickness, outline_thickness)
+            return self._result(None)
 
         forehead1 = self.get_subface_coord(0.5, 0.18, 0.25, 0.15)
-        self.draw_rect(forehead1)
+        self.forehead_rect = forehead1
 
         vals = self.get_subface_means(forehead1)
+        if timer is not None:
+            timer.lap("roi_mean")
         # Clamp spikes based on configured limit
-        if len(self.data_buffer) > 0 and abs(vals - float(self.data_buffer[-1])) > self.data_spike_limit:
-            vals = float(self.data_buffer[-1])
+        if self.buffer.count > 0:
+            last = self.buffer.last()[1]
+            if abs(vals - last) > self.data_spike_limit:
+                vals = last
 
-        self.data_buffer.append(vals)
-        L = len(self.data_buffer)
-        if L > self.buffer_size:
-            self.data_buffer = self.data_buffer[-self.buffer_size:]
-            self.times = self.times[-self.buffer_size:]
-            L = self.buffer_size
+        self.buffer.append(now, vals)
+        L = len(self.buffer)
 
-        processed = np.array(self.data_buffer)
+        times = self.buffer.times
+        processed = self.buffer.values
         self.samples = processed
         if L > 10:
             self.output_dim = processed.shape[0]
-            denom = (self.times[-1] - self.times[0])
+            denom = (times[-1] - times[0])
             self.fps = float(L) / denom if denom > 1e-6 else (self.fps if self.fps > 0 else 0.0)
-            even_times = np.linspace(self.times[0], self.times[-1], L)
-            interpolated = np.interp(even_times, self.times, processed)
-            interpolated = np.hamming(L) * interpolated
-            interpolated = interpolated - np.mean(interpolated)
-            raw = np.fft.rfft(interpolated)
-            phase = np.angle(raw)
-            self.fft = np.abs(raw)
-            self.freqs = float(self.fps) / L * np.arange(L // 2 + 1)
-
-            freqs = 60. * self.freqs
-            # Use configured BPM limits instead of hardcoded values
-            lo, hi = self.bpm_limits
-            idx = np.where((freqs > lo) & (freqs < hi))
-
-            pruned = self.fft[idx]
-            phase = phase[idx]
-
-            pfreq = freqs[idx]
-            self.freqs = pfreq
-            self.fft = pruned
+            spectrum = self.spectral_engine.analyze(self.buffer, self.fps)
+            if timer is not None:
+                timer.lap("spectral")
+            self.freqs = spectrum.freqs
+            self.fft = spectrum.power
+            phase = spectrum.phase
+            pruned = self.fft
 
             # Check if pruned array is empty before finding argmax
             if pruned.size > 0:
@@ -296,30 +359,100 @@ class findFaceGetPulse:
                 # self.bpm = 0 # Option: Reset bpm if no peak found
                 t = 0.5 # Default blending if no peak found
                 
-            alpha = t
-            beta = 1 - t
-
             self.idx += 1
+            # Overlay blending factor for render(), follows the pulse phase
+            self.blend = t
+
+        return self._result(float(vals))
+
+    def _result(self, sample: Optional[float]) -> PulseResult:
+        self.result = PulseResult(face_rect=[int(v) for v in self.face_rect],
+                                  forehead_rect=list(self.forehead_rect),
+                                  face_present=bool(self.face_present),
+                                  sample=sample,
+                                  bpm=float(self.bpm),
+                                  freqs=self.freqs,
+                                  power=self.fft)
+        return self.result
+
+    def render(self, cam: int) -> np.ndarray:
+        """
+        Draw the status overlay for the last run() onto frame_out.
+
+        This stage is optional: headless consumers skip it and only use the
+        PulseResult returned by run().
+
+        Args:
+            cam: Index of the camera the frame came from
+
+        Returns:
+            The annotated output frame
+        """
+        text_color = (255, 255, 255) # White
+        outline_color = (0, 0, 0) # Black
+        font = cv2.FONT_HERSHEY_SIMPLEX # Changed font for better scaling
+        font_scale_controls = 0.6 # Increased scale
+        font_scale_status = 0.8 # Larger scale for status
+        text_thickness = 1
+        outline_thickness = 2 # Outline thickness
 
-            x, y, w, h = self.get_subface_coord(0.5, 0.18, 0.25, 0.15)
-            r = alpha * self.frame_in[y:y + h, x:x + w, 0]
-            g = alpha * \
-                self.frame_in[y:y + h, x:x + w, 1] + \
-                beta * self.gray[y:y + h, x:x + w]
-            b = alpha * self.frame_in[y:y + h, x:x + w, 2]
-            self.frame_out[y:y + h, x:x + w] = cv2.merge([r,
-                                                          g,
-                                                          b])
-            x1, y1, w1, h1 = self.face_rect
-            self.slices = [np.copy(self.frame_out[y1:y1 + h1, x1:x1 + w1, 1])]
-            col = (100, 255, 100)
-            gap = (self.buffer_size - L) / self.fps if self.fps > 0 else 0.0
-            # self.bpms.append(bpm)
-            # self.ttimes.append(time.time())
-            if gap:
-                text = f"(estimate: {self.bpm:.1f} bpm, wait {gap:.0f} s)"
-            else:
-                text = f"{self.bpm:.1f} BPM" # Changed text slightly
-            # Draw BPM estimate with outline
-            draw_text_with_outline(self.frame_out, text,
-                       (int(x - w / 2), int(y)), font, font_scale_status, text_color, outline_color, text_thickness, outline_thickness)
+        if self.find_faces:
+            draw_text_with_outline(
+                self.frame_out, f"Press 'C' to change camera (current: {cam})",
+                (10, 30), font, font_scale_controls, text_color, outline_color, text_thickness, outline_thickness)
+            draw_text_with_outline(
+                self.frame_out, "Press 'S' to lock face and begin",
+                       (10, 55), font, font_scale_controls, text_color, outline_color, text_thickness, outline_thickness)
+            draw_text_with_outline(self.frame_out, "Press 'Esc' to quit",
+                       (10, 80), font, font_scale_controls, text_color, outline_color, text_thickness, outline_thickness)
+            self.draw_rect(self.face_rect, col=(255, 0, 0)) # Keep face rect blue
+            self.draw_rect(self.forehead_rect) # Keep forehead rect green (default)
+            return self.frame_out
+
+        if self.result is None or self.result.sample is None:
+            # Nothing was sampled this frame
+            return self.frame_out
+
+        # Draw controls text when face is locked
+        draw_text_with_outline(
+            self.frame_out, f"Press 'C' to change camera (current: {cam})",
+            (10, 30), font, font_scale_controls, text_color, outline_color, text_thickness, outline_thickness)
+        draw_text_with_outline(
+            self.frame_out, "Press 'S' to restart",
+                   (10, 55), font, font_scale_controls, text_color, outline_color, text_thickness, outline_thickness)
+        draw_text_with_outline(self.frame_out, "Press 'D' to toggle data plot",
+                   (10, 80), font, font_scale_controls, text_color, outline_color, text_thickness, outline_thickness)
+        draw_text_with_outline(self.frame_out, "Press 'Esc' to quit",
+                   (10, 105), font, font_scale_controls, text_color, outline_color, text_thickness, outline_thickness)
+
+        self.draw_rect(self.forehead_rect)
+        if self.blend is None:
+            return self.frame_out
+
+        alpha = self.blend
+        beta = 1 - self.blend
+
+        x, y, w, h = self.forehead_rect
+        r = alpha * self.frame_in[y:y + h, x:x + w, 0]
+        g = alpha * \
+            self.frame_in[y:y + h, x:x + w, 1] + \
+            beta * self.gray[y:y + h, x:x + w]
+        b = alpha * self.frame_in[y:y + h, x:x + w, 2]
+        self.frame_out[y:y + h, x:x + w] = cv2.merge([r,
+                                                      g,
+                                                      b])
+        x1, y1, w1, h1 = self.face_rect
+        self.slices = [np.copy(self.frame_out[y1:y1 + h1, x1:x1 + w1, 1])]
+        col = (100, 255, 100)
+        L = len(self.buffer)
+        gap = (self.buffer_size - L) / self.fps if self.fps > 0 else 0.0
+        # self.bpms.append(bpm)
+        # self.ttimes.append(time.time())
+        if gap:
+            text = f"(estimate: {self.bpm:.1f} bpm, wait {gap:.0f} s)"
+        else:
+            text = f"{self.bpm:.1f} BPM" # Changed text slightly
+        # Draw BPM estimate with outline
+        draw_text_with_outline(self.frame_out, text,
+                   (int(x - w / 2), int(y)), font, font_scale_status, text_color, outline_color, text_thickness, outline_thickness)
+        return self.frame_out
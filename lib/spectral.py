@@ -0,0 +1,228 @@
+"""
+Spectral estimators for the heart-rate band.
+
+findFaceGetPulse only ever looks at the spectrum between its two bpm limits,
+so the engines here return just those bins (frequencies in bpm, magnitude and
+phase) for the samples currently held in a RingBuffer.
+
+- FFTSpectralEngine resamples the buffer onto an even time grid, applies a
+  Hamming window and takes a full rfft, exactly like the original processor,
+  but caches the window and time grid per buffer length and only keeps the
+  band bins.
+- SlidingDFTEngine keeps the band bins up to date with a sliding DFT, so each
+  new sample costs O(K) for K band bins instead of an O(N log N) FFT. It
+  assumes the camera delivers frames at a steady rate and falls back to the
+  FFT engine while the buffer is still filling.
+"""
+import numpy as np
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    from .ringbuffer import RingBuffer
+except ImportError:
+    from ringbuffer import RingBuffer
+
+
+class Spectrum(NamedTuple):
+    freqs: np.ndarray
+    power: np.ndarray
+    phase: np.ndarray
+
+
+EMPTY_SPECTRUM = Spectrum(np.array([]), np.array([]), np.array([]))
+
+
+def band_bins(L: int, fps: float, lo: float, hi: float) -> Tuple[int, int]:
+    """
+    Get the rfft bin range whose frequencies fall strictly inside (lo, hi).
+
+    Bin k sits at 60 * fps / L * k bpm, so the range follows directly from the
+    limits and no per-frame frequency mask is needed.
+
+    Args:
+        L: Number of samples in the transform
+        fps: Sampling rate in Hz
+        lo: Lower limit in bpm
+        hi: Upper limit in bpm
+
+    Returns:
+        Half-open (start, stop) bin range, empty if no bin is in the band
+    """
+    if fps <= 0 or L < 1:
+        return 0, 0
+    bin_bpm = 60. * float(fps) / L
+    start = max(0, int(np.floor(lo / bin_bpm)) + 1)
+    stop = min(L // 2 + 1, int(np.ceil(hi / bin_bpm)))
+    if stop <= start:
+        return 0, 0
+    return start, stop
+
+
+class FFTSpectralEngine:
+    """Full rfft over the evenly resampled, Hamming-windowed buffer."""
+
+    name = "fft"
+
+    def __init__(self, bpm_limits: List[int]):
+        self.bpm_limits = bpm_limits
+        self._windows: Dict[int, np.ndarray] = {}
+        self._grids: Dict[int, np.ndarray] = {}
+
+    def reset(self) -> None:
+        return
+
+    def _window(self, L: int) -> np.ndarray:
+        window = self._windows.get(L)
+        if window is None:
+            window = self._windows[L] = np.hamming(L)
+        return window
+
+    def _grid(self, L: int) -> np.ndarray:
+        grid = self._grids.get(L)
+        if grid is None:
+            grid = self._grids[L] = np.linspace(0., 1., L)
+        return grid
+
+    def analyze(self, buffer: RingBuffer, fps: float) -> Spectrum:
+        """
+        Estimate the band spectrum of the buffered signal.
+
+        Args:
+            buffer: Sample store, oldest sample first
+            fps: Measured sampling rate in Hz
+
+        Returns:
+            Band-limited spectrum (freqs in bpm)
+        """
+        times = buffer.times
+        values = buffer.values
+        L = len(values)
+        lo, hi = self.bpm_limits
+        start, stop = band_bins(L, float(fps), lo, hi)
+        if stop <= start:
+            return EMPTY_SPECTRUM
+
+        even_times = times[0] + (times[-1] - times[0]) * self._grid(L)
+        interpolated = np.interp(even_times, times, values)
+        interpolated = self._window(L) * interpolated
+        interpolated = interpolated - np.mean(interpolated)
+        raw = np.fft.rfft(interpolated)[start:stop]
+
+        freqs = 60. * (float(fps) / L * np.arange(start, stop))
+        return Spectrum(freqs, np.abs(raw), np.angle(raw))
+
+
+class SlidingDFTEngine:
+    """
+    Sliding DFT over the band bins of a full buffer.
+
+    For the window x[n-N+1..n] each tracked bin is updated with
+
+        X_k <- (X_k - x[n-N] + x[n]) * exp(2j*pi*k/N)
+
+    and the Hamming window is applied in the frequency domain as
+    0.54*X_k - 0.23*(X_{k-1} + X_{k+1}). The bins are recomputed directly
+    whenever the band moves (fps drift), the buffer was reset or a sample was
+    missed, and every N samples to bound floating point drift.
+    """
+
+    name = "sliding"
+    # Extra bins tracked on each side so small fps changes do not force a reprime
+    margin = 2
+
+    def __init__(self, bpm_limits: List[int]):
+        self.bpm_limits = bpm_limits
+        self.fallback = FFTSpectralEngine(bpm_limits)
+        self.reset()
+
+    def reset(self) -> None:
+        self._X: Optional[np.ndarray] = None
+        self._k0 = 0
+        self._k1 = 0
+        self._N = 0
+        self._count = -1
+        self._since_prime = 0
+        self._twiddle: Optional[np.ndarray] = None
+
+    def _prime(self, values: np.ndarray, k0: int, k1: int) -> None:
+        N = len(values)
+        ks = np.arange(k0, k1)
+        basis = np.exp(-2j * np.pi * np.outer(ks, np.arange(N)) / N)
+        self._X = basis @ values
+        self._twiddle = np.exp(2j * np.pi * ks / N)
+        self._k0, self._k1, self._N = k0, k1, N
+        self._since_prime = 0
+
+    def analyze(self, buffer: RingBuffer, fps: float) -> Spectrum:
+        """
+        Estimate the band spectrum of the buffered signal.
+
+        Args:
+            buffer: Sample store, oldest sample first
+            fps: Measured sampling rate in Hz
+
+        Returns:
+            Band-limited spectrum (freqs in bpm)
+        """
+        if not buffer.full:
+            self._count = -1
+            return self.fallback.analyze(buffer, fps)
+
+        N = buffer.capacity
+        lo, hi = self.bpm_limits
+        start, stop = band_bins(N, float(fps), lo, hi)
+        if stop <= start:
+            return EMPTY_SPECTRUM
+
+        # Bins needed for the frequency-domain window
+        need0, need1 = max(0, start - 1), min(N // 2 + 1, stop + 1)
+        in_sync = (self._X is not None and self._N == N
+                   and buffer.count == self._count + 1
+                   and buffer.evicted is not None
+                   and self._since_prime < N
+                   and self._k0 <= need0 and need1 <= self._k1)
+        if in_sync:
+            x_new = buffer.last()[1]
+            self._X = (self._X + (x_new - buffer.evicted)) * self._twiddle
+            self._since_prime += 1
+        else:
+            self._prime(buffer.values,
+                        max(0, need0 - self.margin),
+                        min(N // 2 + 1, need1 + self.margin))
+        self._count = buffer.count
+
+        X = self._X[need0 - self._k0:need1 - self._k0]
+        # Zero-pad where the band touches DC or Nyquist
+        if need0 == start:
+            X = np.concatenate(([0j], X))
+        if need1 == stop:
+            X = np.concatenate((X, [0j]))
+        windowed = 0.54 * X[1:-1] - 0.23 * (X[:-2] + X[2:])
+
+        freqs = 60. * (float(fps) / N * np.arange(start, stop))
+        return Spectrum(freqs, np.abs(windowed), np.angle(windowed))
+
+
+SPECTRAL_ENGINES = {
+    FFTSpectralEngine.name: FFTSpectralEngine,
+    SlidingDFTEngine.name: SlidingDFTEngine,
+}
+
+
+def create_spectral_engine(name: str, bpm_limits: List[int]):
+    """
+    Build a spectral engine by name.
+
+    Args:
+        name: One of SPECTRAL_ENGINES ("fft" or "sliding")
+        bpm_limits: [low, high] band in bpm
+
+    Returns:
+        Spectral engine instance
+    """
+    try:
+        engine_cls = SPECTRAL_ENGINES[name]
+    except KeyError:
+        raise ValueError(f"Unknown spectral engine: {name!r} "
+                         f"(expected one of {sorted(SPECTRAL_ENGINES)})")
+    return engine_cls(bpm_limits)
@@ -0,0 +1,92 @@
+"""
+Per-stage timing hooks for the frame pipeline.
+
+A StageTimer is attached to findFaceGetPulse (and the backend's frame
+pipeline) only when timings are wanted; the instrumented code checks for
+None before each lap, so an unattached timer costs nothing.
+
+    timer.begin()
+    ... grayscale ...
+    timer.lap("gray")
+    ... detection ...
+    timer.lap("detect")
+
+Every lap goes through record(), which subclasses can override to feed
+other collectors.
+"""
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+import numpy as np
+
+
+class StageTimer:
+    """
+    Durations of named pipeline stages, keeping the last `window` of each.
+    """
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self.samples: Dict[str, Deque[float]] = {}
+        self.counts: Dict[str, int] = {}
+        self.totals: Dict[str, float] = {}
+        self.last: Optional[float] = None
+
+    def begin(self) -> None:
+        """Start timing a frame."""
+        self.last = time.perf_counter()
+
+    def lap(self, stage: str) -> None:
+        """
+        Attribute the time since the previous lap (or begin) to a stage.
+
+        Args:
+            stage: Stage name
+        """
+        now = time.perf_counter()
+        if self.last is not None:
+            self.record(stage, now - self.last)
+        self.last = now
+
+    def record(self, stage: str, seconds: float) -> None:
+        """
+        Store one stage duration.
+
+        Args:
+            stage: Stage name
+            seconds: Duration
+        """
+        samples = self.samples.get(stage)
+        if samples is None:
+            samples = self.samples[stage] = deque(maxlen=self.window)
+            self.counts[stage] = 0
+            self.totals[stage] = 0.0
+        samples.append(seconds)
+        self.counts[stage] += 1
+        self.totals[stage] += seconds
+
+    def reset(self) -> None:
+        self.samples.clear()
+        self.counts.clear()
+        self.totals.clear()
+        self.last = None
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Summary per stage, in order of first appearance.
+
+        Returns:
+            {stage: {count, mean_ms, p50_ms, p95_ms, max_ms}} over the window
+        """
+        stats = {}
+        for stage, samples in self.samples.items():
+            ms = np.array(samples) * 1000.0
+            stats[stage] = {
+                "count": self.counts[stage],
+                "mean_ms": round(float(ms.mean()), 4),
+                "p50_ms": round(float(np.percentile(ms, 50)), 4),
+                "p95_ms": round(float(np.percentile(ms, 95)), 4),
+                "max_ms": round(float(ms.max()), 4),
+            }
+        return stats
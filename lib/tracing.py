@@ -0,0 +1,179 @@
+"""
+Per-frame trace spans in a bounded ring, exportable as Chrome trace JSON.
+
+Averages hide the occasional slow frame; spans keep the start and end of
+every stage of the most recent frames so a stall can be inspected in
+chrome://tracing, Perfetto or speedscope.
+
+    ring = SpanRing(10000)
+    with ring.span("capture", track="pipeline", frame=n):
+        frame = camera.get_frame()
+    ...
+    ring.dump("trace.json")
+
+Spans are grouped into tracks (one row per track in the viewer), e.g. the
+processing loop and one per client. A SpanTimer turns the laps of a
+StageTimer into spans, so code already instrumented for timings is traced
+without changes.
+"""
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, NamedTuple, Optional
+
+try:
+    from .timing import StageTimer
+except ImportError:
+    from timing import StageTimer
+
+
+class Span(NamedTuple):
+    """ One timed interval, perf_counter seconds """
+    name: str
+    start: float
+    end: float
+    track: str
+    tags: Dict[str, Any]
+
+
+class SpanRing:
+    """
+    The last `capacity` spans; the oldest are overwritten.
+    """
+
+    def __init__(self, capacity: int = 10000):
+        self.capacity = capacity
+        self.spans: Deque[Span] = deque(maxlen=capacity)
+        # Spans ever added, including overwritten ones
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    def add(self, name: str, start: float, end: float, track: str = "main", **tags: Any) -> None:
+        """
+        Store a finished span.
+
+        Args:
+            name: Stage name
+            start: Start time (time.perf_counter())
+            end: End time (time.perf_counter())
+            track: Row the span is shown in
+            **tags: Extra fields shown with the span (session, client, ...)
+        """
+        with self._lock:
+            self.spans.append(Span(name, start, end, track, tags))
+            self.count += 1
+
+    @contextmanager
+    def span(self, name: str, track: str = "main", **tags: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Time a block as a span; tags can still be added to the yielded dict.
+        """
+        start = time.perf_counter()
+        try:
+            yield tags
+        finally:
+            self.add(name, start, time.perf_counter(), track, **tags)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.spans.clear()
+
+    def snapshot(self, seconds: Optional[float] = None) -> List[Span]:
+        """
+        Spans in insertion order.
+
+        Args:
+            seconds: Only spans that ended in the last `seconds`
+
+        Returns:
+            List of spans
+        """
+        with self._lock:
+            spans = list(self.spans)
+        if seconds is not None:
+            since = time.perf_counter() - seconds
+            spans = [s for s in spans if s.end >= since]
+        return spans
+
+    def to_chrome_trace(self, seconds: Optional[float] = None,
+                        process_name: str = "pulse") -> Dict[str, Any]:
+        """
+        Chrome trace-event JSON object (complete "X" events, microseconds).
+
+        Args:
+            seconds: Only spans that ended in the last `seconds`
+            process_name: Name shown for the process row
+
+        Returns:
+            {"traceEvents": [...], "displayTimeUnit": "ms"}
+        """
+        spans = sorted(self.snapshot(seconds), key=lambda s: s.start)
+        tracks: Dict[str, int] = {}
+        events: List[Dict[str, Any]] = [
+            {"name": "process_name", "ph": "M", "pid": 1, "tid": 0,
+             "args": {"name": process_name}},
+        ]
+        for span in spans:
+            tid = tracks.get(span.track)
+            if tid is None:
+                tid = tracks[span.track] = len(tracks) + 1
+                events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid,
+                               "args": {"name": span.track}})
+                events.append({"name": "thread_sort_index", "ph": "M", "pid": 1, "tid": tid,
+                               "args": {"sort_index": tid}})
+            events.append({
+                "name": span.name, "cat": span.track, "ph": "X", "pid": 1, "tid": tid,
+                "ts": round(span.start * 1e6, 1),
+                "dur": round((span.end - span.start) * 1e6, 1),
+                "args": span.tags,
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def dump(self, path: str, seconds: Optional[float] = None) -> int:
+        """
+        Write the Chrome trace JSON to a file.
+
+        Args:
+            path: Output file
+            seconds: Only spans that ended in the last `seconds`
+
+        Returns:
+            Number of spans written
+        """
+        trace = self.to_chrome_trace(seconds)
+        with open(path, "w") as f:
+            json.dump(trace, f, default=str)
+        return sum(1 for e in trace["traceEvents"] if e["ph"] == "X")
+
+
+class SpanTimer(StageTimer):
+    """
+    StageTimer whose laps become spans in a ring.
+    """
+
+    def __init__(self, ring: SpanRing, track: str = "pipeline",
+                 forward: Optional[StageTimer] = None, **tags: Any):
+        """
+        Args:
+            ring: Where the spans go
+            track: Row of the spans
+            forward: Another timer that also receives every lap
+            **tags: Tags of every span; can be changed between frames
+        """
+        super().__init__(window=1)
+        self.ring = ring
+        self.track = track
+        self.forward = forward
+        self.tags = tags
+
+    def record(self, stage: str, seconds: float) -> None:
+        # Called from lap(), where self.last is still the start of the stage
+        start = self.last if self.last is not None else time.perf_counter() - seconds
+        self.ring.add(stage, start, start + seconds, self.track, **self.tags)
+        if self.forward is not None:
+            self.forward.record(stage, seconds)
@@ -0,0 +1,61 @@
+from lib.offline import analyze_video, find_videos, write_csv
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import os
+import sys
+import cv2
+from typing import Any, Dict, Tuple
+
+
+def _init_worker() -> None:
+    # One OpenCV thread per worker; the pool already uses every core
+    cv2.setNumThreads(1)
+
+
+def process_file(path: str, out_dir: str, processor_args: Dict[str, Any]) -> Tuple[str, str]:
+    """
+    Analyse one video and write its traces (runs in a worker process).
+    """
+    try:
+        result = analyze_video(path, **processor_args)
+    except Exception as e:
+        return path, f"failed: {e}"
+    write_csv(result, out_dir)
+    mean_bpm = f"{result.bpm_values.mean():.1f}" if len(result.bpm_values) else "-"
+    return path, (f"{result.frames} frames, {result.duration:.1f} s in {result.elapsed:.1f} s "
+                  f"({result.speed:.1f}x real time), mean bpm {mean_bpm}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Offline pulse detection for recorded videos.')
+    parser.add_argument('inputs', nargs='+',
+                        help='video files and/or directories to search')
+    parser.add_argument('--out', default='pulse_traces',
+                        help='output directory for <name>_raw.csv and <name>_bpm.csv')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='parallel worker processes (default: all cores)')
+    parser.add_argument('--detection-interval', type=int, default=5,
+                        help='run the face detector every N frames while searching')
+    parser.add_argument('--lock-after', type=int, default=10,
+                        help='frames with a face before the forehead is locked')
+    args = parser.parse_args()
+
+    videos = find_videos(args.inputs)
+    if not videos:
+        print("No video files found")
+        sys.exit(1)
+    processor_args = {
+        "bpm_limits": [50, 160],
+        "data_spike_limit": 2500.,
+        "face_detector_smoothness": 10.,
+        "detection_interval": args.detection_interval,
+        "lock_after": args.lock_after,
+    }
+    workers = max(1, min(args.workers, len(videos)))
+    print(f"Processing {len(videos)} videos with {workers} workers")
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(process_file, path, args.out, processor_args) for path in videos]
+        for future in as_completed(futures):
+            path, summary = future.result()
+            print(f"{path}: {summary}")
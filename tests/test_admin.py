@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+
+BACKEND = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def test_admin_endpoints_refused_without_configured_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "")
+    assert client.get("/api/v1/admin/trace").status_code == 403
+    assert client.get("/api/v1/admin/trace", headers={"X-Admin-Token": ""}).status_code == 403
+    assert client.post("/api/v1/admin/profile").status_code == 403
+
+
+def test_admin_endpoints_check_the_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "s3cret")
+    assert client.get("/api/v1/admin/trace").status_code == 403
+    assert client.get("/api/v1/admin/trace", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    response = client.get("/api/v1/admin/trace", headers={"X-Admin-Token": "s3cret"})
+    assert response.status_code in (200, 404)  # 404 when tracing is disabled
+
+
+@pytest.mark.parametrize("env, enabled", [
+    ({}, False),
+    ({"TRACE_BUFFER_SIZE": "100"}, False),
+    ({"TRACE_BUFFER_SIZE": "100", "ADMIN_TOKEN": "s3cret"}, True),
+])
+def test_spans_recorded_only_when_readable(env, enabled):
+    script = f"from app.core.spans import span_ring\nassert (span_ring is not None) == {enabled}\n"
+    base = {k: v for k, v in os.environ.items() if k not in ("TRACE_BUFFER_SIZE", "ADMIN_TOKEN")}
+    env = dict(base, **env)
+    result = subprocess.run([sys.executable, "-c", script], cwd=BACKEND, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,53 @@
+import os
+
+import numpy as np
+import pytest
+
+import app.core.pipeline  # noqa: F401  (puts backend/lib on sys.path)
+import processors as backend_processors
+
+
+@pytest.fixture
+def processor():
+    assert os.path.realpath(backend_processors.__file__).endswith(
+        os.path.join("backend", "lib", "processors.py"))
+    processor = backend_processors.findFaceGetPulse(roi_max_misses=3)
+    processor.find_faces_toggle()  # lock on a known face
+    processor.face_rect = [100, 60, 120, 120]
+    return processor
+
+
+def feed(processor, frames, face):
+    frame = np.full((240, 320, 3), 120, dtype=np.uint8)
+    processor.detect_faces = lambda: [np.array(processor.face_rect)] if face else []
+    for _ in range(frames):
+        processor.frame_in = frame
+        result = processor.run(0)
+    return result
+
+
+def test_locked_detection_miss_keeps_the_signal(processor):
+    feed(processor, 5, face=True)
+    assert len(processor.buffer) == 5
+
+    result = feed(processor, 2, face=False)
+    assert not processor.face_present
+    # Samples keep coming from the locked forehead rect
+    assert result.sample is not None
+    assert len(processor.buffer) == 7
+
+    feed(processor, 1, face=True)
+    assert processor.face_present and processor.lost_checks == 0
+    assert len(processor.buffer) == 8
+
+
+def test_face_lost_after_max_misses_resets_the_signal(processor):
+    feed(processor, 5, face=True)
+    processor.bpm = 72.0
+
+    feed(processor, 2, face=False)
+    assert len(processor.buffer) == 7 and processor.bpm == 72.0
+    result = feed(processor, 1, face=False)
+    assert result.sample is None
+    assert len(processor.buffer) == 0
+    assert processor.bpm == 0.0
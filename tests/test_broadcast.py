@@ -0,0 +1,92 @@
+import asyncio
+
+from app.core.broadcast import FrameBroadcaster, Subscriber
+from app.core.protocol import FramePacket
+
+
+def packet(n):
+    return FramePacket(b"jpeg", None, 0.0, False, float(n), float(n))
+
+
+class FakeManager:
+    """Stands in for VideoStreamManager: numbered packets, one per get_frame()"""
+
+    def __init__(self):
+        self.active = False
+        self.camera_id = None
+        self.frames = 0
+        self.stops = 0
+
+    async def start_stream(self, camera_id):
+        self.active = True
+        self.camera_id = camera_id
+
+    async def stop_stream(self):
+        self.active = False
+        self.stops += 1
+
+    async def get_frame(self, tiers=()):
+        self.frames += 1
+        return FramePacket(None, None, 0.0, False, float(self.frames), float(self.frames),
+                           jpegs={tier: b"jpeg" for tier in tiers})
+
+
+def test_full_queue_drops_oldest():
+    subscriber = Subscriber(maxsize=2)
+    for n in range(1, 6):
+        subscriber.put((packet(n), 0))
+
+    async def drain():
+        return [(await subscriber.get())[0].capture_ts for _ in range(2)]
+
+    assert asyncio.run(drain()) == [4.0, 5.0]
+    assert subscriber.dropped == 3
+    assert subscriber.delivered == 2
+
+
+def test_slow_viewer_does_not_block_fast_one():
+    async def scenario():
+        manager = FakeManager()
+        broadcaster = FrameBroadcaster(manager, queue_size=2, fps=200)
+        slow = await broadcaster.subscribe(0)
+        fast = await broadcaster.subscribe(0)
+        seen = [(await fast.get())[0].capture_ts for _ in range(20)]
+        await broadcaster.unsubscribe(fast)
+        await broadcaster.unsubscribe(slow)
+        return slow, fast, seen
+
+    slow, fast, seen = asyncio.run(scenario())
+    # The fast viewer got every frame in order while the idle one overflowed
+    assert seen == [float(n) for n in range(int(seen[0]), int(seen[0]) + 20)]
+    assert fast.dropped == 0
+    assert slow.dropped >= 15
+    assert slow.delivered == 0
+
+
+def test_unsubscribe_cleans_up():
+    async def scenario():
+        manager = FakeManager()
+        broadcaster = FrameBroadcaster(manager, queue_size=2, fps=200)
+        first = await broadcaster.subscribe(0)
+        second = await broadcaster.subscribe(0)
+        task = broadcaster._task
+
+        await broadcaster.unsubscribe(first)
+        assert broadcaster.subscribers == {second}
+        assert manager.active and not task.done()
+        # A closed viewer's pending reads end instead of hanging
+        assert await asyncio.wait_for(first.get(), 1.0) is None
+
+        waiter = asyncio.create_task(second.get())
+        await broadcaster.unsubscribe(second)
+        while (await asyncio.wait_for(waiter, 1.0)) is not None:
+            waiter = asyncio.create_task(second.get())
+        assert broadcaster.subscribers == set()
+        assert broadcaster._task is None and task.done()
+        assert manager.stops == 1 and not manager.active
+
+        # Unsubscribing twice is harmless
+        await broadcaster.unsubscribe(second)
+        assert manager.stops == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,98 @@
+import time
+
+import numpy as np
+import pytest
+
+import app.core.camera_pool as camera_pool_module
+from app.core.camera_pool import CameraPool
+
+
+class FakeCamera:
+    valid = True
+
+    def __init__(self, camera_id):
+        self.camera_id = camera_id
+        self.released = False
+
+    def get_frame(self):
+        time.sleep(0.005)
+        return np.zeros((4, 4, 3), dtype=np.uint8)
+
+    def release(self):
+        self.released = True
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    """Cameras opened by the pool, in order"""
+    cameras = []
+
+    def open_source(camera_id):
+        cameras.append(FakeCamera(camera_id))
+        return cameras[-1]
+
+    def no_device(camera_id):
+        raise AssertionError("probe opened a device")
+
+    monkeypatch.setattr(camera_pool_module, "open_source", open_source)
+    monkeypatch.setattr(camera_pool_module.cv2, "VideoCapture", no_device)
+    return cameras
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+def test_handles_share_one_open_device(opened):
+    pool = CameraPool(idle_timeout=0)
+    first = pool.acquire(0)
+    second = pool.acquire(0)
+    try:
+        assert len(opened) == 1
+        assert pool.get_stats()["cameras"][0]["refs"] == 2
+        assert (pool.opens, pool.hits) == (1, 1)
+        assert first.read(timeout=1.0) is not None
+
+        first.release()
+        first.release()  # a second release of the same handle is ignored
+        assert pool.get_stats()["cameras"][0]["refs"] == 1
+        assert not opened[0].released
+    finally:
+        second.release()
+    # No idle timeout: the last release closes the device
+    assert opened[0].released and pool.in_use() == []
+
+
+def test_idle_device_closes_after_timeout(opened):
+    pool = CameraPool(idle_timeout=0.1)
+    pool.acquire(0).release()
+    assert pool.in_use() == [0] and pool.get_stats()["cameras"][0]["idle"]
+
+    assert wait_until(lambda: opened[0].released)
+    assert pool.in_use() == []
+
+
+def test_reacquire_before_expiry_reuses_device(opened):
+    pool = CameraPool(idle_timeout=0.1)
+    pool.acquire(0).release()
+    handle = pool.acquire(0)
+    time.sleep(0.25)  # the idle timer has fired by now
+
+    assert len(opened) == 1 and not opened[0].released
+    assert pool.in_use() == [0] and pool.hits == 1
+    handle.release()
+    assert wait_until(lambda: opened[0].released)
+
+
+def test_probe_does_not_reopen_a_held_device(opened):
+    pool = CameraPool(idle_timeout=0)
+    handle = pool.acquire(0)
+    try:
+        assert pool.probe(0) == (True, True)
+        assert len(opened) == 1
+    finally:
+        handle.release()
+    pool.close_all()
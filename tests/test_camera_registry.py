@@ -0,0 +1,57 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import app.core.camera_registry as camera_registry_module
+from app.core.camera_registry import CameraRegistry
+
+
+class FakePool:
+    """Slow probes: device 0 is available, device 1 is not"""
+
+    def __init__(self):
+        self.probes = []
+        self.lock = threading.Lock()
+
+    def probe(self, camera_id):
+        with self.lock:
+            self.probes.append(camera_id)
+        time.sleep(0.05)
+        return camera_id == 0, False
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = FakePool()
+    monkeypatch.setattr(camera_registry_module, "camera_pool", pool)
+    return pool
+
+
+def test_concurrent_refreshes_share_one_scan(pool):
+    registry = CameraRegistry(devices=[0, 1])
+
+    async def refresh_all():
+        await asyncio.gather(*(registry.refresh() for _ in range(5)))
+
+    asyncio.run(refresh_all())
+    assert registry.scans == 1
+    assert pool.probes == [0, 1]
+
+
+def test_cameras_are_answered_from_the_cache(pool):
+    registry = CameraRegistry(devices=[0, 1])
+
+    async def query():
+        first = await registry.get_cameras()
+        second = await registry.get_cameras()
+        return first, second, await registry.get_available()
+
+    first, second, available = asyncio.run(query())
+    # Only the first query waited for a scan
+    assert registry.scans == 1 and pool.probes == [0, 1]
+    assert [(c.camera_id, c.available, c.in_use) for c in first] == [(0, True, False),
+                                                                     (1, False, False)]
+    assert second == first
+    assert available == [0]
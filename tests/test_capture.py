@@ -0,0 +1,84 @@
+import threading
+import time
+
+import numpy as np
+
+from app.core.capture import FrameGrabber, FrameReader
+
+
+class FakeCamera:
+    """Hands out numbered frames, one per release()"""
+
+    valid = True
+
+    def __init__(self):
+        self.gate = threading.Semaphore(0)
+        self.n = 0
+
+    def release(self, frames: int = 1):
+        for _ in range(frames):
+            self.gate.release()
+
+    def get_frame(self):
+        if not self.gate.acquire(timeout=0.05):
+            return None
+        self.n += 1
+        return np.full((4, 4, 3), self.n, dtype=np.uint8)
+
+
+def wait_captured(grabber, count, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while grabber.captured < count and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert grabber.captured == count
+
+
+def test_reader_gets_latest_frame_and_counts_drops():
+    camera = FakeCamera()
+    grabber = FrameGrabber(camera)
+    grabber.start()
+    try:
+        reader = FrameReader(grabber)
+        camera.release()
+        wait_captured(grabber, 1)
+        frame, _, seq = reader.read(timeout=1.0)
+        assert seq == 1 and frame[0, 0, 0] == 1
+
+        # Three frames arrive before the next read: only the newest is seen
+        camera.release(3)
+        wait_captured(grabber, 4)
+        frame, _, seq = reader.read(timeout=1.0)
+        assert seq == 4 and frame[0, 0, 0] == 4
+        assert reader.dropped == 2
+        assert reader.delivered == 2
+
+        # Nothing newer yet
+        assert reader.read(timeout=0.05) is None
+        stats = reader.get_stats()
+        assert stats["captured"] == 4 and stats["dropped"] == 2
+    finally:
+        grabber.stop()
+
+
+def test_readers_keep_their_own_cursor():
+    camera = FakeCamera()
+    grabber = FrameGrabber(camera)
+    grabber.start()
+    try:
+        fast, slow = FrameReader(grabber), FrameReader(grabber)
+        for n in range(1, 4):
+            camera.release()
+            wait_captured(grabber, n)
+            assert fast.read(timeout=1.0)[2] == n
+        assert slow.read(timeout=1.0)[2] == 3
+        assert fast.dropped == 0 and slow.dropped == 0
+    finally:
+        grabber.stop()
+
+
+def test_stop_wakes_a_waiting_reader():
+    grabber = FrameGrabber(FakeCamera())
+    grabber.start()
+    reader = FrameReader(grabber)
+    threading.Timer(0.05, grabber.stop).start()
+    assert reader.read(timeout=2.0) is None
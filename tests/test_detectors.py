@@ -0,0 +1,47 @@
+import numpy as np
+
+from lib.detectors import CascadeFaceDetector
+
+
+class FakeCascade:
+    """Stands in for cv2.CascadeClassifier: canned results per image shape"""
+
+    def __init__(self, results):
+        self.results = results
+        self.calls = []
+
+    def detectMultiScale(self, image, **kwargs):
+        self.calls.append(image.shape)
+        return [np.array(r) for r in self.results.get(image.shape, [])]
+
+
+def test_roi_hit_maps_back_to_frame_coordinates():
+    gray = np.zeros((480, 640), dtype=np.uint8)
+    # A 160 px face padded by 80 px is a 320x320 window, halved once to 160x160
+    cascade = FakeCascade({(160, 160): [(40, 40, 80, 80)]})
+    detector = CascadeFaceDetector(cascade, roi_margin=0.5, roi_face_size=64)
+    detector.last_rect = np.array([200, 100, 160, 160])
+
+    detected = detector.detect(gray)
+
+    assert cascade.calls == [(160, 160)]
+    assert [list(r) for r in detected] == [[200, 100, 160, 160]]
+    assert list(detector.last_rect) == [200, 100, 160, 160]
+    assert detector.misses == 0
+
+
+def test_roi_miss_falls_back_to_full_frame():
+    gray = np.zeros((480, 640), dtype=np.uint8)
+    cascade = FakeCascade({(480, 640): [(300, 200, 120, 120)]})
+    detector = CascadeFaceDetector(cascade, max_misses=2)
+    detector.last_rect = np.array([200, 100, 160, 160])
+
+    # The first miss only counts; the second one scans the whole frame
+    assert detector.detect(gray) == []
+    assert (480, 640) not in cascade.calls
+    detected = detector.detect(gray)
+
+    assert cascade.calls[-1] == (480, 640)
+    assert [list(r) for r in detected] == [[300, 200, 120, 120]]
+    assert list(detector.last_rect) == [300, 200, 120, 120]
+    assert detector.misses == 0
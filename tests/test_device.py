@@ -0,0 +1,41 @@
+import cv2
+import numpy as np
+import pytest
+
+from lib.device import SyntheticCamera, VideoFileCamera, open_camera
+
+
+def test_synthetic_camera_is_deterministic():
+    a = SyntheticCamera(width=160, height=120, seed=3, realtime=False)
+    b = SyntheticCamera(width=160, height=120, seed=3, realtime=False)
+    for _ in range(3):
+        frame = a.get_frame()
+        assert frame.shape == (120, 160, 3)
+        assert np.array_equal(frame, b.get_frame())
+
+
+def test_synthetic_camera_follows_waveform():
+    camera = SyntheticCamera(width=160, height=120, fps=10, noise=0, motion=0, amplitude=10,
+                             waveform=lambda t: 1.0 if t >= 0.1 else -1.0, realtime=False)
+    dark, bright = camera.get_frame(), camera.get_frame()
+    assert abs(float(bright[60, 80].mean()) - float(dark[60, 80].mean()) - 20) < 1
+
+
+def test_video_file_camera_loops(tmp_path):
+    path = str(tmp_path / "loop.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (64, 48))
+    if not writer.isOpened():
+        pytest.skip("no MJPG encoder available")
+    for level in (0, 120, 240):
+        writer.write(np.full((48, 64, 3), level, np.uint8))
+    writer.release()
+
+    camera = open_camera(source="file", path=path, realtime=False)
+    assert isinstance(camera, VideoFileCamera) and camera.valid
+    levels = [int(round(camera.get_frame().mean() / 120)) for _ in range(5)]
+    assert levels == [0, 1, 2, 0, 1]
+
+
+def test_unknown_camera_source():
+    with pytest.raises(ValueError):
+        open_camera(source="nope")
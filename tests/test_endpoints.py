@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import app.core.camera_pool as camera_pool_module
+from app.core.camera_pool import camera_pool
+from app.core.protocol import FramePacket
+from app.core.video_stream import stream_manager
+from app.main import app
+
+
+class FakeCamera:
+    valid = True
+
+    def get_frame(self):
+        return None
+
+    def release(self):
+        pass
+
+
+class FakePipeline:
+    """Hands the stream one packet per process() call"""
+
+    def __init__(self):
+        self.value = 0.0
+
+    def process(self, timeout, tiers=(0,)):
+        self.value += 1.0
+        return FramePacket(None, 70.0, 1.0, True, 1000.0 + self.value, 1000.0 + self.value,
+                           raw_signal=np.array([self.value]))
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(camera_pool_module, "open_source", lambda camera_id: FakeCamera())
+    monkeypatch.setattr(stream_manager, "pipeline", FakePipeline())
+    yield TestClient(app)
+    # Do not leave the fake camera warm in the pool for later tests
+    camera_pool.close_all()
+
+
+def test_stream_samples_reach_a_rest_session(client):
+    session_id = client.post("/api/v1/pulse/start", json={"camera_id": 0}).json()["session_id"]
+    try:
+        stream_manager._process_next(0.1)
+        first = client.get("/api/v1/data/current", params={"session_id": session_id}).json()
+        assert first["snapshot"] and first["raw_values"] == [1.0]
+        assert first["timestamps"] == [1001.0]
+
+        stream_manager._process_next(0.1)
+        stream_manager._process_next(0.1)
+        delta = client.get("/api/v1/data/current",
+                           params={"session_id": session_id, "since": first["next_cursor"]}).json()
+        assert not delta["snapshot"]
+        assert delta["raw_values"] == [2.0, 3.0]
+        assert (delta["first_seq"], delta["next_cursor"]) == (1, 3)
+    finally:
+        client.post("/api/v1/pulse/stop", json={"session_id": session_id})
+    assert client.get("/api/v1/data/current", params={"session_id": session_id}).status_code == 404
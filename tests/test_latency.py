@@ -0,0 +1,60 @@
+import pytest
+
+from app.core.latency import LatencyTracker
+
+
+def test_ack_is_matched_to_its_sent_frame():
+    tracker = LatencyTracker()
+    assert tracker.sent(1000.0, at=1000.02) == pytest.approx(0.02)
+    tracker.sent(1000.033333, at=1000.05)
+
+    # Client: received at 5000 ms, rendered 8 ms later, acked 2 ms after that;
+    # the ack arrives 70 ms after the send, 10 of which the client held it
+    latencies = tracker.ack(1000.0, 5000.0, 5008.0, 5010.0, at=1000.09)
+
+    assert latencies["send"] == pytest.approx(0.02)
+    assert latencies["receive"] == pytest.approx(0.02 + 0.03)
+    assert latencies["render"] == pytest.approx(0.02 + 0.03 + 0.008)
+    assert tracker.acks == 1
+    assert list(tracker.pending) == [1000.033333]
+
+
+def test_capture_ts_survives_a_json_round_trip():
+    tracker = LatencyTracker()
+    capture_ts = 1700000000.1234567
+    tracker.sent(capture_ts, at=capture_ts + 0.01)
+    assert tracker.ack(float(f"{capture_ts:.6f}"), 0.0, at=capture_ts + 0.03) is not None
+
+
+def test_unknown_and_stale_acks_are_counted_not_measured():
+    tracker = LatencyTracker(pending=2)
+    for n in range(3):
+        tracker.sent(float(n), at=n + 0.01)
+
+    assert tracker.ack(42.0, 0.0, at=50.0) is None  # never sent
+    assert tracker.ack(0.0, 0.0, at=50.0) is None   # evicted from the pending window
+    assert tracker.ack(1.0, 0.0, at=1.05) is not None
+    assert tracker.ack(1.0, 0.0, at=1.06) is None   # already acked
+    assert (tracker.acks, tracker.unmatched) == (1, 3)
+    assert len(tracker.samples["receive"]) == 1
+
+
+def test_percentiles_and_stats():
+    tracker = LatencyTracker()
+    assert tracker.percentile("send", 50) is None
+    stats = tracker.get_stats()
+    assert stats["send_p50_ms"] is None and stats["network_ms"] is None
+
+    for n in range(1, 101):
+        tracker.sent(float(n), at=n + n / 1000.0)  # n ms capture -> send
+    for n in range(1, 11):
+        tracker.ack(float(n), 0.0, at=n + n / 1000.0 + 0.02)  # 10 ms network
+
+    assert tracker.percentile("send", 50) == pytest.approx(0.0505)
+    assert tracker.percentile("send", 95) == pytest.approx(0.09505)
+    stats = tracker.get_stats()
+    assert stats["acks"] == 10
+    assert stats["send_p50_ms"] == pytest.approx(50.5)
+    assert stats["receive_p50_ms"] == pytest.approx(15.5)
+    assert stats["render_p50_ms"] is None
+    assert stats["network_ms"] == pytest.approx(10.0)
@@ -0,0 +1,71 @@
+import os
+import re
+import subprocess
+import sys
+
+from app.core.metrics import Metrics
+
+BACKEND = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+
+METRIC_NAME = r"[a-zA-Z_:][a-zA-Z0-9_:]*"
+LABEL = r'[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\\n]|\\.)*"'
+SAMPLE = re.compile(rf"^({METRIC_NAME})(\{{{LABEL}(?:,{LABEL})*\}})? "
+                    r"(-?[0-9.e+-]+|\+Inf|-Inf|NaN)$")
+
+
+def parse(text):
+    """Check the exposition format line by line; returns {family: type}, samples"""
+    assert text.endswith("\n")
+    types, samples = {}, []
+    for line in text.splitlines():
+        if line.startswith("# HELP "):
+            assert re.match(rf"^# HELP {METRIC_NAME} \S", line), line
+        elif line.startswith("# TYPE "):
+            _, _, name, kind = line.split(" ")
+            assert kind in ("counter", "gauge", "histogram") and name not in types
+            types[name] = kind
+        else:
+            match = SAMPLE.match(line)
+            assert match, line
+            samples.append((match.group(1), match.group(2) or "", float(match.group(3))))
+    return types, samples
+
+
+def test_render_is_valid_exposition_format():
+    metrics = Metrics()
+    metrics.frames.inc()
+    metrics.frames_dropped.inc(2, "client_queue")
+    metrics.stage_seconds.observe(0.003, "detect")
+    metrics.stage_seconds.observe(2.0, "detect")
+    metrics.gauge("pulse_test_viewers", "Per-viewer value",
+                  lambda: {('a "quoted"\\name',): 1.5}, ["viewer"])
+
+    types, samples = parse(metrics.render())
+
+    assert types["pulse_frames_total"] == "counter"
+    assert types["pulse_stage_seconds"] == "histogram"
+    assert ("pulse_frames_total", "", 1.0) in samples
+    assert ("pulse_frames_dropped_total", '{reason="client_queue"}', 2.0) in samples
+    assert ("pulse_test_viewers", '{viewer="a \\"quoted\\"\\\\name"}', 1.5) in samples
+
+    buckets = [value for name, labels, value in samples if name == "pulse_stage_seconds_bucket"]
+    assert buckets == sorted(buckets)  # cumulative
+    assert '{stage="detect",le="+Inf"}' in [labels for name, labels, _ in samples]
+    assert buckets[-1] == 2.0
+    assert ("pulse_stage_seconds_count", '{stage="detect"}', 2.0) in samples
+    assert ("pulse_stage_seconds_sum", '{stage="detect"}', 2.003) in samples
+
+
+def test_disabled_metrics_have_no_object_and_no_route():
+    script = (
+        "from fastapi.testclient import TestClient\n"
+        "from app.core.metrics import metrics\n"
+        "from app.main import app\n"
+        "assert metrics is None\n"
+        "assert '/api/metrics' not in [getattr(r, 'path', None) for r in app.routes]\n"
+        "assert TestClient(app).get('/api/metrics').status_code == 404\n"
+    )
+    env = dict(os.environ, METRICS_ENABLED="false", CAMERA_SOURCE="synthetic")
+    result = subprocess.run([sys.executable, "-c", script], cwd=BACKEND, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,46 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from lib.offline import analyze_video, find_videos, write_csv
+from lib.device import SyntheticCamera
+
+
+@pytest.fixture
+def pulse_video(tmp_path):
+    """An 8 s, 30 fps clip of a drawn face whose brightness pulses at 72 bpm."""
+    path = str(tmp_path / "clip.avi")
+    fps, seconds = 30.0, 8
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (320, 240))
+    if not writer.isOpened():
+        pytest.skip("no MJPG encoder available")
+    camera = SyntheticCamera(width=320, height=240, fps=fps, bpm=72.0, amplitude=6.0,
+                             noise=4.0, motion=0.0, seed=0, realtime=False)
+    for _ in range(int(fps * seconds)):
+        writer.write(camera.get_frame())
+    writer.release()
+    return path
+
+
+def test_analyze_video_uses_file_timestamps(pulse_video):
+    result = analyze_video(pulse_video, bpm_limits=[50, 160], data_spike_limit=2500.,
+                           detection_interval=5)
+    assert result.frames == 240
+    assert abs(result.duration - 8.0) < 0.1
+    assert len(result.raw_times) > 100
+    # Sample times come from the file (30 fps grid), not from how fast it was decoded
+    frames = result.raw_times * 30.0
+    assert np.allclose(frames, np.round(frames), atol=1e-3)
+    assert np.all(np.diff(result.raw_times) > 0)
+    assert len(result.bpm_values) > 0
+
+
+def test_write_csv_and_find_videos(pulse_video, tmp_path):
+    result = analyze_video(pulse_video, max_frames=60)
+    raw_csv, bpm_csv = write_csv(result, str(tmp_path / "out"))
+    raw = np.loadtxt(raw_csv, delimiter=",", skiprows=1).reshape(-1, 2)
+    assert len(raw) == len(result.raw_values)
+    assert os.path.basename(bpm_csv) == "clip_bpm.csv"
+    assert find_videos([str(tmp_path)]) == [pulse_video]
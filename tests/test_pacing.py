@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+
+from app.core.pacing import PacingClock, RateDecimator, RateMeter
+
+
+class FakeTime:
+    """Monotonic clock that only moves when slept on or advanced"""
+
+    def __init__(self, now=100.0):
+        self.now = now
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def ticks(clock, n):
+    async def run():
+        times = []
+        for _ in range(n):
+            await clock.wait()
+            times.append(clock.clock())
+        return times
+    return asyncio.run(run())
+
+
+def test_pacing_clock_spaces_ticks_by_one_period():
+    fake = FakeTime()
+    clock = PacingClock(10, clock=fake, sleep=fake.sleep)
+
+    assert ticks(clock, 4) == pytest.approx([100.0, 100.1, 100.2, 100.3])
+    # The first tick is immediate, the others wait out the period
+    assert len(fake.sleeps) == 3
+
+
+def test_pacing_clock_absorbs_work_time_without_drift():
+    fake = FakeTime()
+    clock = PacingClock(10, clock=fake, sleep=fake.sleep)
+
+    async def run():
+        times = []
+        for _ in range(5):
+            await clock.wait()
+            times.append(fake.now)
+            fake.now += 0.03  # processing the frame
+        return times
+
+    assert asyncio.run(run()) == pytest.approx([100.0, 100.1, 100.2, 100.3, 100.4])
+    assert fake.sleeps == pytest.approx([0.07] * 4)
+
+
+def test_pacing_clock_restarts_after_a_stall():
+    fake = FakeTime()
+    clock = PacingClock(10, clock=fake, sleep=fake.sleep)
+    ticks(clock, 2)
+
+    fake.now += 1.0  # a stall of ten periods
+    sleeps = len(fake.sleeps)
+    # No burst of catch-up ticks: the schedule restarts from now
+    assert ticks(clock, 3) == pytest.approx([101.1, 101.2, 101.3])
+    assert len(fake.sleeps) == sleeps + 2
+
+
+def test_unpaced_clock_never_sleeps():
+    fake = FakeTime()
+    clock = PacingClock(0, clock=fake, sleep=fake.sleep)
+    ticks(clock, 3)
+    assert fake.sleeps == []
+
+
+def test_decimator_divides_the_source_rate():
+    decimator = RateDecimator(10, source_fps=30)
+    # 30 Hz timestamps with a little jitter
+    stamps = [n / 30.0 + (0.002 if n % 2 else -0.002) for n in range(30)]
+    taken = [n for n, ts in enumerate(stamps) if decimator.take(ts)]
+
+    assert taken == list(range(0, 30, 3))
+    assert decimator.meter.get_stats()["fps"] == pytest.approx(10, rel=0.05)
+
+
+def test_decimator_due_does_not_take():
+    decimator = RateDecimator(15, source_fps=30)
+    assert decimator.take(0.0)
+    assert not decimator.due(1 / 30.0)
+    assert decimator.due(2 / 30.0) and decimator.due(2 / 30.0)
+    assert decimator.take(2 / 30.0)
+
+
+def test_decimator_catches_up_after_a_stall_without_bursting():
+    decimator = RateDecimator(10, source_fps=30)
+    for n in range(6):
+        decimator.take(n / 30.0)
+
+    # Nothing for two seconds; then one frame is due and the rate resumes
+    start = 2.0
+    taken = [n for n in range(9) if decimator.take(start + n / 30.0)]
+    assert taken == [0, 3, 6]
+
+
+def test_decimator_rate_change():
+    decimator = RateDecimator(10, source_fps=30)
+    decimator.take(0.0)
+    decimator.set_rate(5)
+    assert not decimator.take(0.1)
+    assert decimator.take(0.2)
+    decimator.set_rate(0)
+    assert decimator.take(0.21)
+
+
+def test_rate_meter_reports_rate_and_jitter():
+    meter = RateMeter(window=4)
+    assert meter.get_stats() == {"fps": 0.0, "jitter_ms": 0.0}
+    for ts in (0.0, 0.1, 0.2, 0.3):
+        meter.tick(ts)
+    assert meter.get_stats() == {"fps": 10.0, "jitter_ms": 0.0}
+
+    for ts in (0.35, 0.5, 0.55):
+        meter.tick(ts)
+    # Only the last four intervals count: 0.1, 0.05, 0.15, 0.05
+    stats = meter.get_stats()
+    assert stats["fps"] == pytest.approx(1 / 0.0875, abs=0.01)
+    assert stats["jitter_ms"] == pytest.approx(41.46, abs=0.01)
+
+    meter.reset()
+    assert meter.get_stats()["fps"] == 0.0
+    assert meter.ticks == 7
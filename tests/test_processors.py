@@ -2,7 +2,7 @@
 import pytest
 import numpy as np
 import cv2 # Import cv2 even if not directly used in all tests, as processors.py imports it
-from lib.processors import findFaceGetPulse
+from lib.processors import PulseResult, findFaceGetPulse
 
 # Fixture to create a processor instance
 @pytest.fixture
@@ -73,3 +73,55 @@ def test_find_faces_toggle(processor):
 # Note: Testing the full 'run' method is complex due to dependencies on
 # face detection results, FFT, timing, etc. It's generally better suited
 # for integration testing. These unit tests focus on isolated, deterministic functions.
+
+def test_cascade_shared_per_thread():
+    """Processors on one thread share a classifier; other threads get their own."""
+    import threading
+    from lib.detectors import model_registry
+
+    a = findFaceGetPulse()
+    b = findFaceGetPulse()
+    assert a.face_cascade is b.face_cascade
+    assert not a.face_cascade.empty()
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(a.face_cascade))
+    thread.start()
+    thread.join()
+    assert other[0] is not a.face_cascade
+    assert model_registry.get(cv2.CascadeClassifier, a.face_detector._cascade) is a.face_cascade
+
+
+def test_unknown_detector_backend():
+    with pytest.raises(ValueError):
+        findFaceGetPulse(detector_backend="nope")
+
+
+def test_missing_detector_model():
+    with pytest.raises(FileNotFoundError):
+        findFaceGetPulse(detector_backend="yunet", detector_model="missing.onnx")
+
+
+def test_run_leaves_frame_untouched_and_render_draws(processor):
+    """run() only analyses; the overlay is drawn by render()."""
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, (240, 320, 3), dtype=np.uint8)
+    original = frame.copy()
+    processor.find_faces_toggle()  # lock on a known face
+    processor.face_rect = [100, 60, 120, 120]
+
+    for _ in range(3):
+        processor.frame_in = frame
+        result = processor.run(0)
+
+    assert isinstance(result, PulseResult)
+    assert result.sample is not None
+    assert result.forehead_rect == processor.forehead_rect
+    assert np.array_equal(frame, original)
+    assert np.array_equal(processor.frame_out, original)
+
+    processor.frame_out = processor.frame_out.copy()
+    out = processor.render(0)
+    assert out is processor.frame_out
+    assert not np.array_equal(out, original)
+    assert np.array_equal(frame, original)
@@ -0,0 +1,142 @@
+import base64
+import json
+
+import numpy as np
+import pytest
+
+from app.core.protocol import (
+    FORMAT_BINARY, FORMAT_JSON, HEADER, MAGIC, VERSION, FramePacket, SignalCursor,
+    decode_binary, epoch_tag,
+)
+
+
+def make_packet(**kwargs):
+    args = dict(
+        jpeg=b"\xff\xd8jpeg\xff\xd9",
+        bpm=72.5,
+        signal_quality=0.75,
+        face_detected=True,
+        capture_ts=1700000000.25,
+        timestamp=1700000000.5,
+        fft_freqs=np.array([1.0, 1.5, 2.0]),
+        fft_power=np.array([0.25, 4.0, 0.5]),
+        raw_signal=np.array([10.5, 11.0, 11.25, 10.75]),
+        signal_seq=100,
+    )
+    args.update(kwargs)
+    return FramePacket(**args)
+
+
+def test_json_and_binary_carry_the_same_frame():
+    packet = make_packet()
+    text = json.loads(packet.encode(FORMAT_JSON))
+    binary = decode_binary(packet.encode(FORMAT_BINARY))
+
+    assert base64.b64decode(text["image"]) == binary["jpeg"]
+    assert text["bpm"] == pytest.approx(binary["bpm"])
+    assert text["face_detected"] == binary["face_detected"]
+    assert text["signal_quality"] == pytest.approx(binary["signal_quality"])
+    assert text["capture_ts"] == binary["capture_ts"]
+    assert text["timestamp"] == binary["timestamp"]
+    assert text["fft_data"]["freqs"] == pytest.approx(list(binary["fft_freqs"]))
+    assert text["fft_data"]["power"] == pytest.approx(list(binary["fft_power"]))
+    assert text["raw_signal"] == pytest.approx(list(binary["raw_signal"]))
+    assert binary["signal_seq"] == 100 and binary["snapshot"]
+
+
+def test_binary_header_layout():
+    message = make_packet().to_binary()
+
+    assert HEADER.size == 48
+    assert message[:4] == MAGIC
+    assert message[4] == VERSION
+    # Every float32 array starts on a 4-byte boundary after the header
+    assert len(message) == HEADER.size + 4 * (3 + 3 + 4) + len(b"\xff\xd8jpeg\xff\xd9")
+    assert decode_binary(message)["version"] == VERSION
+
+
+def test_missing_bpm_and_empty_spectrum():
+    packet = make_packet(jpeg=None, bpm=None, face_detected=False,
+                         fft_freqs=None, fft_power=None, raw_signal=None)
+    text = json.loads(packet.encode(FORMAT_JSON))
+    binary = decode_binary(packet.encode(FORMAT_BINARY))
+
+    assert text["bpm"] is None and binary["bpm"] is None
+    assert text["image"] is None and binary["jpeg"] == b""
+    assert text["fft_data"] is None and text["raw_signal"] is None
+    assert len(binary["fft_freqs"]) == 0 and len(binary["fft_power"]) == 0
+    assert len(binary["raw_signal"]) == 0
+    assert not binary["face_detected"]
+
+
+def test_encoding_is_cached_per_format():
+    packet = make_packet()
+    assert packet.encode(FORMAT_BINARY) is packet.encode(FORMAT_BINARY)
+    assert packet.encode(FORMAT_JSON) is packet.encode(FORMAT_JSON)
+    with pytest.raises(ValueError):
+        packet.encode("xml")
+
+
+def window(seq, n=4, epoch=0):
+    """Packet whose raw signal holds samples seq..seq+n-1 (valued by their seq)"""
+    return make_packet(raw_signal=np.arange(seq, seq + n, dtype=float),
+                       signal_seq=seq, signal_epoch=epoch)
+
+
+def test_delta_sends_only_new_samples():
+    cursor = SignalCursor()
+    first = json.loads(window(100).encode(FORMAT_JSON, cursor))
+    assert first["snapshot"] and first["raw_signal"] == [100, 101, 102, 103]
+
+    second = json.loads(window(102).encode(FORMAT_JSON, cursor))
+    assert not second["snapshot"]
+    assert second["raw_signal"] == [104, 105]
+    assert (second["signal_seq"], second["signal_next"]) == (104, 106)
+
+    binary = decode_binary(window(103).encode(FORMAT_BINARY, cursor))
+    assert not binary["snapshot"] and binary["signal_seq"] == 106
+    assert list(binary["raw_signal"]) == [106]
+    assert cursor.seq == 107
+
+
+def test_delta_resends_snapshot_after_buffer_reset():
+    cursor = SignalCursor()
+    window(100, epoch=1).encode(FORMAT_JSON, cursor)
+
+    # The analysis buffer restarted: numbering begins again in a new epoch
+    message = json.loads(window(0, epoch=2).encode(FORMAT_JSON, cursor))
+    assert message["snapshot"] and message["raw_signal"] == [0, 1, 2, 3]
+    assert message["signal_epoch"] == 2
+    binary = decode_binary(window(2, epoch=2).encode(FORMAT_BINARY, cursor))
+    assert not binary["snapshot"] and binary["signal_epoch"] == epoch_tag(2)
+
+    cursor.reset()
+    assert json.loads(window(4, epoch=2).encode(FORMAT_JSON, cursor))["snapshot"]
+
+
+def test_client_behind_the_window_gets_a_snapshot():
+    cursor = SignalCursor()
+    window(100).encode(FORMAT_JSON, cursor)
+    # Its frames were dropped while the window moved past sample 104
+    message = json.loads(window(110).encode(FORMAT_JSON, cursor))
+    assert message["snapshot"] and message["raw_signal"] == [110, 111, 112, 113]
+    assert cursor.seq == 114
+
+
+def test_ack_moves_forward_within_the_epoch_only():
+    cursor = SignalCursor()
+    cursor.ack(50)
+    assert cursor.seq is None  # nothing sent yet
+
+    epoch = (3 << 32) | 7
+    window(100, epoch=epoch).encode(FORMAT_JSON, cursor)
+    cursor.seq = 102  # as if the client confirmed only part of the window
+    cursor.ack(101)
+    assert cursor.seq == 102  # stale ack from an earlier frame
+    cursor.ack(500)
+    assert cursor.seq == 104  # clamped to the last sample sent
+    cursor.seq = 102
+    cursor.ack(103, epoch=epoch - 1)
+    assert cursor.seq == 102  # ack for an older numbering
+    cursor.ack(103, epoch=epoch_tag(epoch))
+    assert cursor.seq == 103
@@ -0,0 +1,139 @@
+import pytest
+
+from app.core.quality import (
+    DOWN_HOLD, MAX_UP_HOLD, UP_HOLD, WINDOW, QualityController, build_tiers,
+)
+
+TIERS = build_tiers(640, 480, 80)
+
+
+class Link:
+    """Feeds a controller one evaluation window at a time on a synthetic clock"""
+
+    def __init__(self, controller):
+        self.controller = controller
+        self.now = 0.0
+        controller.update(self.now)
+
+    def windows(self, n, busy=0.0, drops=0, latency=None):
+        """Run n windows with a send-busy share, drops and acked latency; tiers after each"""
+        tiers = []
+        for _ in range(n):
+            self.controller.sent(busy * WINDOW)
+            for _ in range(drops):
+                self.controller.dropped()
+            if latency is not None:
+                self.controller.acked(latency)
+            self.now += WINDOW
+            self.controller.update(self.now)
+            tiers.append(self.controller.tier)
+        return tiers
+
+
+def test_tier_ladder():
+    assert TIERS[0][:3] == (640, 480, 80)
+    assert [t.max_fps for t in TIERS] == [0, 0, 0, 15, 10, 5]
+    assert all(t.width % 2 == 0 and t.height % 2 == 0 for t in TIERS)
+    controller = QualityController(tiers=TIERS)
+    controller.tier = 3
+    assert controller.video_fps(30) == 15
+    assert controller.video_fps(10) == 10
+    assert controller.video_fps(0) == 15
+
+
+def test_congestion_steps_down_at_most_once_per_hold():
+    link = Link(QualityController(tiers=TIERS, max_latency=0.25))
+    steps_per_hold = int(DOWN_HOLD / WINDOW)
+
+    tiers = link.windows(6, busy=0.8)
+    assert tiers == [1] + [1] * (steps_per_hold - 1) + [2, 2, 3, 3]
+    # Never below the last tier
+    assert link.windows(20, busy=0.8)[-1] == len(TIERS) - 1
+
+
+def test_drops_count_as_congestion():
+    link = Link(QualityController(tiers=TIERS))
+    assert link.windows(1, drops=1) == [1]
+
+
+def test_steps_up_only_after_a_clear_hold():
+    link = Link(QualityController(tiers=TIERS))
+    link.windows(3, busy=0.8)
+    assert link.controller.tier == 2
+
+    # Busy between the marks is neither congested nor clear
+    assert link.windows(20, busy=0.3) == [2] * 20
+    clear_windows = int(UP_HOLD / WINDOW)
+    tiers = link.windows(clear_windows + 1, busy=0.0)
+    assert tiers[:clear_windows] == [2] * clear_windows
+    assert tiers[clear_windows] == 1
+    assert link.windows(clear_windows, busy=0.0)[-1] == 0
+
+
+def test_failed_probe_doubles_the_up_hold():
+    controller = QualityController(tiers=TIERS)
+    link = Link(controller)
+    link.windows(1, busy=0.8)
+    link.windows(int(UP_HOLD / WINDOW) + 1)
+    assert controller.tier == 0
+
+    # The step up did not hold (the tier it left only changes once per
+    # DOWN_HOLD): back down, and wait twice as long next time
+    link.windows(2, busy=0.8)
+    assert controller.tier == 1 and controller.up_hold == 2 * UP_HOLD
+    tiers = link.windows(int(2 * UP_HOLD / WINDOW) + 1)
+    assert tiers[-2] == 1 and tiers[-1] == 0
+
+    holds = []
+    for _ in range(5):
+        link.windows(2, busy=0.8)
+        holds.append(controller.up_hold)
+        link.windows(int(controller.up_hold / WINDOW) + 1)
+    assert holds == [4 * UP_HOLD, 8 * UP_HOLD, MAX_UP_HOLD, MAX_UP_HOLD, MAX_UP_HOLD]
+
+    # A step up that holds for MAX_UP_HOLD restores the normal pace
+    link.windows(int(MAX_UP_HOLD / WINDOW))
+    assert controller.tier == 0 and controller.up_hold == UP_HOLD
+
+
+def test_acked_latency_drives_the_tier():
+    controller = QualityController(tiers=TIERS, max_latency=0.25)
+    link = Link(controller)
+    assert link.windows(1, latency=0.3) == [1]
+    # Above the low mark (half the high mark): hold
+    assert link.windows(20, latency=0.2) == [1] * 20
+    tiers = link.windows(int(UP_HOLD / WINDOW) + 1, latency=0.1)
+    assert tiers[-1] == 0
+
+    # Only the worst ack of a window counts
+    controller.acked(0.1)
+    controller.acked(0.4)
+    controller.acked(0.1)
+    link.now += DOWN_HOLD
+    controller.update(link.now)
+    assert controller.tier == 1
+
+
+def test_fixed_quality_when_not_adaptive():
+    controller = QualityController(adaptive=False, tiers=TIERS)
+    link = Link(controller)
+    assert link.windows(10, busy=1.0, drops=3, latency=1.0) == [0] * 10
+    stats = controller.get_stats(30)
+    assert stats == {"adaptive": False, "tier": 0, "width": 640, "height": 480,
+                     "jpeg_quality": 80, "video_fps": 30, "changes": 0}
+
+
+def test_window_is_not_evaluated_early():
+    controller = QualityController(tiers=TIERS)
+    controller.update(0.0)
+    controller.sent(1.0)
+    assert not controller.update(WINDOW / 2)
+    assert controller.tier == 0
+    assert controller.update(WINDOW)
+    assert controller.tier == 1
+
+
+@pytest.mark.parametrize("busy", [0.0, 0.1])
+def test_clear_link_stays_at_full_quality(busy):
+    link = Link(QualityController(tiers=TIERS))
+    assert set(link.windows(30, busy=busy)) == {0}
@@ -0,0 +1,67 @@
+import pytest
+import numpy as np
+from lib.ringbuffer import RingBuffer
+
+
+def test_ring_buffer_keeps_order_after_wrap():
+    """
+    Once the capacity is exceeded only the newest samples remain, oldest first.
+    """
+    buffer = RingBuffer(4)
+    for i in range(7):
+        buffer.append(float(i), 10.0 * i)
+
+    assert len(buffer) == 4
+    assert buffer.full
+    np.testing.assert_array_equal(buffer.times, [3, 4, 5, 6])
+    np.testing.assert_array_equal(buffer.values, [30, 40, 50, 60])
+    assert buffer.last() == (6.0, 60.0)
+    assert buffer.oldest() == (3.0, 30.0)
+
+
+def test_ring_buffer_views_are_contiguous():
+    """
+    Reading the window back must not copy: the views share the buffer storage.
+    """
+    buffer = RingBuffer(5)
+    for i in range(8):
+        buffer.append(float(i), float(i))
+
+    values = buffer.values
+    assert values.flags['C_CONTIGUOUS']
+    assert np.shares_memory(values, buffer._values)
+
+
+def test_ring_buffer_tail_and_clear():
+    buffer = RingBuffer(3)
+    buffer.append(0.0, 1.0)
+    buffer.append(1.0, 2.0)
+
+    times, values = buffer.tail(5)
+    np.testing.assert_array_equal(values, [1.0, 2.0])
+    times, values = buffer.tail(1)
+    np.testing.assert_array_equal(times, [1.0])
+
+    buffer.clear()
+    assert len(buffer) == 0
+    assert buffer.resets == 1
+    assert buffer.values.size == 0
+    with pytest.raises(IndexError):
+        buffer.last()
+
+
+def test_ring_buffer_since_cursor():
+    buffer = RingBuffer(4)
+    for i in range(3):
+        buffer.append(float(i), float(i))
+
+    times, values = buffer.since(1)
+    np.testing.assert_array_equal(values, [1.0, 2.0])
+    assert buffer.since(buffer.count)[1].size == 0
+
+    for i in range(3, 7):
+        buffer.append(float(i), float(i))
+    # Samples 0-2 were overwritten; only the retained ones come back
+    assert buffer.first_seq == 3
+    np.testing.assert_array_equal(buffer.since(0)[1], [3.0, 4.0, 5.0, 6.0])
+    np.testing.assert_array_equal(buffer.since(5)[0], [5.0, 6.0])
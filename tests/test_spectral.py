@@ -0,0 +1,49 @@
+import pytest
+import numpy as np
+from lib.ringbuffer import RingBuffer
+from lib.spectral import (FFTSpectralEngine, SlidingDFTEngine, band_bins,
+                          create_spectral_engine)
+
+
+def _pulse(i, fps=30.0, bpm=78.0):
+    t = i / fps
+    return t, 128.0 + 2.0 * np.sin(2 * np.pi * bpm / 60.0 * t)
+
+
+def test_band_bins_match_frequency_mask():
+    """
+    The arithmetic bin range equals the mask the processor used to build.
+    """
+    for L, fps in [(250, 30.0), (120, 29.7), (251, 15.2), (40, 30.0)]:
+        freqs = 60. * fps / L * np.arange(L // 2 + 1)
+        idx = np.flatnonzero((freqs > 50) & (freqs < 180))
+        start, stop = band_bins(L, fps, 50, 180)
+        assert list(range(start, stop)) == idx.tolist()
+
+
+def test_sliding_dft_matches_fft_engine():
+    """
+    With evenly spaced samples both engines agree on frequencies and peak.
+    """
+    buffer = RingBuffer(250)
+    fft_engine = FFTSpectralEngine([50, 180])
+    sliding_engine = SlidingDFTEngine([50, 180])
+    rng = np.random.default_rng(1)
+    for i in range(900):
+        t, v = _pulse(i)
+        buffer.append(t, v + rng.normal(0, 0.3))
+        if len(buffer) <= 10:
+            continue
+        fps = len(buffer) / (buffer.times[-1] - buffer.times[0])
+        expected = fft_engine.analyze(buffer, fps)
+        actual = sliding_engine.analyze(buffer, fps)
+        np.testing.assert_allclose(actual.freqs, expected.freqs)
+        if expected.power.size:
+            assert np.argmax(actual.power) == np.argmax(expected.power)
+            np.testing.assert_allclose(actual.power, expected.power,
+                                       atol=0.02 * expected.power.max())
+
+
+def test_unknown_spectral_engine():
+    with pytest.raises(ValueError):
+        create_spectral_engine("wavelet", [50, 180])
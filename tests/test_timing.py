@@ -0,0 +1,37 @@
+import numpy as np
+
+from lib.device import SyntheticCamera
+from lib.processors import findFaceGetPulse
+from lib.timing import StageTimer
+
+
+def test_stage_timer_records_laps():
+    timer = StageTimer(window=2)
+    for _ in range(3):
+        timer.begin()
+        timer.lap("a")
+        timer.lap("b")
+    timer.record("a", 0.5)
+    stats = timer.get_stats()
+    assert list(stats) == ["a", "b"]
+    assert stats["a"]["count"] == 4
+    assert stats["a"]["max_ms"] == 500.0
+    assert len(timer.samples["a"]) == 2
+
+
+def test_processor_reports_stages_only_with_timer():
+    camera = SyntheticCamera(width=320, height=240, seed=0, realtime=False)
+    processor = findFaceGetPulse(detection_interval=5)
+    for i in range(15):
+        processor.frame_in = camera.get_frame()
+        processor.run(0, timestamp=i / 30.0)
+    processor.find_faces_toggle()
+
+    timer = StageTimer()
+    processor.timer = timer
+    for i in range(15, 30):
+        timer.begin()
+        processor.frame_in = camera.get_frame()
+        processor.run(0, timestamp=i / 30.0)
+    assert {"gray", "roi_mean", "spectral"} <= set(timer.get_stats())
+    assert all(np.isfinite(s["mean_ms"]) for s in timer.get_stats().values())
@@ -0,0 +1,45 @@
+import json
+
+from lib.timing import StageTimer
+from lib.tracing import SpanRing, SpanTimer
+
+
+def test_span_ring_keeps_newest_spans():
+    ring = SpanRing(capacity=3)
+    for i in range(5):
+        ring.add("stage", i, i + 0.5, "pipeline", frame=i)
+    assert len(ring) == 3
+    assert ring.count == 5
+    assert [s.tags["frame"] for s in ring.snapshot()] == [2, 3, 4]
+
+
+def test_chrome_trace_has_one_row_per_track(tmp_path):
+    ring = SpanRing()
+    ring.add("frame", 1.0, 1.02, "pipeline")
+    ring.add("send", 1.02, 1.021, "client 1", client=1)
+    with ring.span("send", "client 2", client=2) as tags:
+        tags["bytes"] = 100
+
+    path = tmp_path / "trace.json"
+    assert ring.dump(str(path)) == 3
+    events = json.loads(path.read_text())["traceEvents"]
+    rows = {e["args"]["name"]: e["tid"] for e in events if e["name"] == "thread_name"}
+    assert set(rows) == {"pipeline", "client 1", "client 2"}
+    spans = [e for e in events if e["ph"] == "X"]
+    assert spans[0]["ts"] == 1e6 and spans[0]["dur"] == 20000.0
+    assert spans[0]["tid"] == rows["pipeline"]
+    assert spans[2]["args"] == {"client": 2, "bytes": 100}
+
+
+def test_span_timer_turns_laps_into_spans():
+    ring = SpanRing()
+    forward = StageTimer()
+    timer = SpanTimer(ring, "pipeline", forward=forward, stream=1)
+    timer.begin()
+    timer.lap("capture")
+    timer.lap("detect")
+    capture, detect = ring.snapshot()
+    assert (capture.name, detect.name) == ("capture", "detect")
+    assert abs(capture.end - detect.start) < 1e-9
+    assert detect.tags == {"stream": 1}
+    assert forward.get_stats()["detect"]["count"] == 1
@@ -0,0 +1,36 @@
+import numpy as np
+import cv2
+from lib.tracking import DetectionScheduler, TemplateTracker
+
+
+def test_scheduler_runs_detector_every_n_frames():
+    scheduler = DetectionScheduler(interval=3, min_confidence=0.5)
+    pattern = []
+    for _ in range(7):
+        if scheduler.due():
+            pattern.append("D")
+            scheduler.detected(True)
+        else:
+            pattern.append("T")
+            scheduler.tracked(0.9)
+    assert "".join(pattern) == "DTTDTTD"
+
+
+def test_scheduler_detects_early_on_low_confidence():
+    scheduler = DetectionScheduler(interval=10, min_confidence=0.5)
+    scheduler.detected(True)
+    assert not scheduler.due()
+    scheduler.tracked(0.2)
+    assert scheduler.due()
+
+
+def test_template_tracker_follows_shift():
+    rng = np.random.default_rng(0)
+    scene = cv2.GaussianBlur(rng.integers(0, 255, (400, 400), dtype=np.uint8), (5, 5), 0)
+    tracker = TemplateTracker()
+    tracker.init(scene[50:350, 50:350], [100, 100, 96, 96])
+
+    rect, confidence = tracker.update(scene[56:356, 62:362])
+
+    assert confidence > 0.6
+    assert abs(rect[0] - 88) <= 2 and abs(rect[1] - 94) <= 2
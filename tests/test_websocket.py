@@ -0,0 +1,50 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.api.websocket import ClientSession
+from app.core.broadcast import broadcaster
+from app.core.camera_pool import camera_pool
+from app.main import app
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(settings, "CAMERA_SOURCE", "synthetic")
+    yield TestClient(app)
+    camera_pool.close_all()
+
+
+def test_disconnect_stops_reader_and_writer_before_unsubscribing(client, monkeypatch):
+    tasks = []
+    create_task = asyncio.create_task
+
+    def track(coro, **kwargs):
+        task = create_task(coro, **kwargs)
+        tasks.append(task)
+        return task
+
+    def handlers():
+        return [t for t in tasks if t.get_coro().__name__ in ("_read_messages", "_write_frames")]
+
+    # Whether the reader and writer had finished at each unsubscribe
+    finished = []
+    unsubscribe = ClientSession.unsubscribe
+
+    async def tracked_unsubscribe(self):
+        finished.append([t.done() for t in handlers()])
+        await unsubscribe(self)
+
+    monkeypatch.setattr("app.api.websocket.asyncio.create_task", track)
+    monkeypatch.setattr(ClientSession, "unsubscribe", tracked_unsubscribe)
+    with client.websocket_connect("/ws/pulse") as ws:
+        ws.send_text(json.dumps({"type": "start", "data": {"camera_id": 0}}))
+        while ws.receive_json()["type"] != "frame":
+            pass
+        assert len(broadcaster.subscribers) == 1
+
+    assert finished[-1] == [True, True]
+    assert broadcaster.subscribers == set()
@@ -0,0 +1,65 @@
+import multiprocessing
+import threading
+import time
+
+from app.core.workers import PipelineProcess
+
+
+class FakeRing:
+    def read(self, slot, seq):
+        return ("packet", slot, seq)
+
+
+class AliveWorker:
+    def is_alive(self):
+        return True
+
+
+def without_worker(frame_conn=None, control_conn=None):
+    """A PipelineProcess wired to one end of its pipes, without a worker process"""
+    process = PipelineProcess.__new__(PipelineProcess)
+    process.camera_id = 0
+    process.worker = AliveWorker()
+    process.ring = FakeRing()
+    process._frame_conn = frame_conn
+    process._control_conn = control_conn
+    process._frame_lock = threading.Lock()
+    process._control_lock = threading.Lock()
+    process._frame_id = 0
+    process._request_id = 0
+    return process
+
+
+def test_late_control_reply_is_not_taken_for_the_next_one():
+    conn, worker = multiprocessing.Pipe()
+    process = without_worker(control_conn=conn)
+
+    def slow_then_fast():
+        request_id, _ = worker.recv()
+        time.sleep(0.2)  # misses the first request's timeout
+        worker.send((request_id, "stale"))
+        request_id, command = worker.recv()
+        worker.send((request_id, command))
+
+    server = threading.Thread(target=slow_then_fast)
+    server.start()
+    assert process._request("stats", 0.05) is None
+    assert process._request("toggle", 2.0) == "toggle"
+    server.join()
+
+
+def test_late_frame_reply_is_not_read_as_the_next_frame():
+    conn, worker = multiprocessing.Pipe()
+    process = without_worker(frame_conn=conn)
+    # Frame request 1 timed out; its reply (slot 0) only arrives now
+    process._frame_id = 1
+    worker.send((1, (0, 6)))
+
+    def answer():
+        _, frame_id, _, _ = worker.recv()
+        worker.send((frame_id, (1, 8)))
+
+    server = threading.Thread(target=answer)
+    server.start()
+    assert process.process(1.0) == ("packet", 1, 8)
+    server.join()